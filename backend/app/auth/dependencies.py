@@ -1,7 +1,9 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
-from app.auth.service import decode_access_token, get_user_by_id
+from app.auth.profiles import load_profile
+from app.auth.service import decode_access_token
+from app.config import settings
 
 bearer_scheme = HTTPBearer()
 
@@ -10,7 +12,7 @@ async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
 ) -> dict:
     """FastAPI dependency that extracts and validates the JWT Bearer token,
-    then returns the full user record from DynamoDB."""
+    then returns the user's profile (cached, without passwordHash)."""
     try:
         payload = decode_access_token(credentials.credentials)
     except Exception:
@@ -20,9 +22,16 @@ async def get_current_user(
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-    user = get_user_by_id(user_id)
+    user = await load_profile(user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
-    user.pop("passwordHash", None)
     return user
+
+
+async def get_admin_user(current_user: dict = Depends(get_current_user)) -> dict:
+    """FastAPI dependency that only admits users listed in settings.admin_usernames."""
+    admins = {name.strip() for name in settings.admin_usernames.split(",") if name.strip()}
+    if current_user["username"] not in admins:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
@@ -0,0 +1,200 @@
+"""Batched, cached loading of user profiles.
+
+Code that needs several users (room members, chat recipients) asks the
+ProfileLoader for them. Lookups issued within the same event-loop tick are
+coalesced into DynamoDB BatchGetItem requests of up to 100 keys, and
+results are kept in a small in-process TTL cache shared by every caller.
+Profiles never include the password hash. There is no profile update path
+yet, so cached entries only ever expire; one would need to drop its user
+from the cache.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from boto3.dynamodb.conditions import Key
+
+from app.config import settings
+from app.dependencies import get_dynamo_client
+
+logger = logging.getLogger(__name__)
+
+# BatchGetItem accepts at most 100 keys per request
+_BATCH_GET_MAX_KEYS = 100
+_MAX_UNPROCESSED_RETRIES = 5
+_PROFILE_ATTRIBUTES = ("userId", "username", "firstName", "lastName", "nativeLanguage", "createdAt")
+
+
+class ProfileLoadError(Exception):
+    """Raised when DynamoDB keeps returning unprocessed keys after all retries."""
+
+
+def batch_get_users(user_ids: list[str]) -> dict[str, dict]:
+    """Fetch user profiles by ID with BatchGetItem. Missing users are omitted.
+    Unprocessed keys (throttling) are retried with exponential backoff."""
+    dynamo = get_dynamo_client()
+    unique_ids = list(dict.fromkeys(user_ids))
+    names = {f"#a{i}": attr for i, attr in enumerate(_PROFILE_ATTRIBUTES)}
+    profiles = {}
+    for start in range(0, len(unique_ids), _BATCH_GET_MAX_KEYS):
+        request = {
+            "users": {
+                "Keys": [
+                    {"PK": f"USER#{uid}", "SK": "PROFILE"}
+                    for uid in unique_ids[start:start + _BATCH_GET_MAX_KEYS]
+                ],
+                "ProjectionExpression": ", ".join(names),
+                "ExpressionAttributeNames": names,
+            }
+        }
+        for attempt in range(_MAX_UNPROCESSED_RETRIES + 1):
+            resp = dynamo.batch_get_item(RequestItems=request)
+            for item in resp.get("Responses", {}).get("users", []):
+                profiles[item["userId"]] = item
+            request = resp.get("UnprocessedKeys") or {}
+            if not request:
+                break
+            if attempt < _MAX_UNPROCESSED_RETRIES:
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+        else:
+            remaining = len(request["users"]["Keys"])
+            raise ProfileLoadError(f"{remaining} user profiles still unprocessed after retries")
+    return profiles
+
+
+class ProfileCache:
+    """Thread-safe TTL + LRU cache of user profiles. Misses are not cached."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: str) -> dict | None:
+        """Return a copy of the cached profile, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, profile = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return dict(profile)
+
+    def put(self, user_id: str, profile: dict):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, dict(profile))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class ProfileLoader:
+    """DataLoader-style batching of profile lookups.
+
+    load() calls made before the event loop next runs its callbacks are
+    collected and fetched together in one executor job, so N concurrent
+    lookups cost ceil(N / 100) BatchGetItem calls instead of N GetItems.
+    """
+
+    def __init__(self, cache: ProfileCache):
+        self.cache = cache
+        self._pending: dict[str, list[asyncio.Future]] = {}
+        self._fetches: set[asyncio.Task] = set()
+
+    async def load(self, user_id: str) -> dict | None:
+        cached = self.cache.get(user_id)
+        if cached is not None:
+            return cached
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            loop.call_soon(self._dispatch)
+        future = loop.create_future()
+        self._pending.setdefault(user_id, []).append(future)
+        return await future
+
+    async def load_many(self, user_ids: list[str]) -> dict[str, dict]:
+        """Load several profiles at once. Returns {user_id: profile} for users that exist."""
+        results = await asyncio.gather(*(self.load(uid) for uid in user_ids))
+        return {uid: profile for uid, profile in zip(user_ids, results) if profile is not None}
+
+    def _dispatch(self):
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._fetch(batch))
+        self._fetches.add(task)
+        task.add_done_callback(self._fetches.discard)
+
+    async def _fetch(self, batch: dict[str, list[asyncio.Future]]):
+        loop = asyncio.get_running_loop()
+        try:
+            profiles = await loop.run_in_executor(None, batch_get_users, list(batch))
+        except Exception as e:
+            logger.warning("Batch profile load of %d users failed", len(batch), exc_info=True)
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for user_id, futures in batch.items():
+            profile = profiles.get(user_id)
+            if profile is not None:
+                self.cache.put(user_id, profile)
+            for future in futures:
+                if not future.done():
+                    future.set_result(dict(profile) if profile is not None else None)
+
+
+_profile_loader: ProfileLoader | None = None
+
+
+def get_profile_loader() -> ProfileLoader:
+    global _profile_loader
+    if _profile_loader is None:
+        cache = ProfileCache(settings.profile_cache_ttl_seconds, settings.profile_cache_max_entries)
+        _profile_loader = ProfileLoader(cache)
+    return _profile_loader
+
+
+async def load_profile(user_id: str) -> dict | None:
+    """Return a user's profile (without passwordHash), or None if the user does not exist."""
+    return await get_profile_loader().load(user_id)
+
+
+async def load_profiles(user_ids: list[str]) -> dict[str, dict]:
+    """Return {user_id: profile} for the given users, batched and cached."""
+    return await get_profile_loader().load_many(user_ids)
+
+
+def _user_id_for_username(username: str) -> str | None:
+    """Resolve a username to its user ID via GSI1, reading only the ID."""
+    resp = get_dynamo_client().Table("users").query(
+        IndexName="GSI1",
+        KeyConditionExpression=Key("GSI1PK").eq(f"USERNAME#{username}") & Key("GSI1SK").eq("PROFILE"),
+        ProjectionExpression="userId",
+    )
+    items = resp.get("Items", [])
+    return items[0]["userId"] if items else None
+
+
+async def load_profiles_by_username(usernames: list[str]) -> dict[str, dict]:
+    """Return {username: profile} for the usernames that exist.
+
+    A GSI query cannot be batched, so the usernames are resolved to IDs
+    concurrently off the event loop; the profiles then come through the
+    loader in one batch.
+    """
+    unique = list(dict.fromkeys(usernames))
+    loop = asyncio.get_running_loop()
+    user_ids = await asyncio.gather(*(loop.run_in_executor(None, _user_id_for_username, name) for name in unique))
+    found = await load_profiles([uid for uid in user_ids if uid is not None])
+    return {name: found[uid] for name, uid in zip(unique, user_ids) if uid in found}
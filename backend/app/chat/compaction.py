@@ -0,0 +1,162 @@
+"""Roll old messages into compressed per-day blocks (cold history).
+
+Each user's copies of messages older than settings.history_hot_days move
+from individual items into BLK#<day>#<part> items in the same
+partition, holding the day's messages as zlib-compressed JSON. Scrolling
+far back then reads one item per day instead of one per message, and the
+long tail takes a fraction of the storage. app.chat.service reads hot items
+and blocks alike with the same cursors.
+
+A day's blocks are written before its items are deleted and merge with any
+blocks already there, so an interrupted pass is finished by the next one.
+Run a pass with ``python -m app.chat.compaction``; unless
+settings.history_compaction_enabled is off, the API also runs one every
+settings.history_compaction_interval_seconds, on one worker at a time.
+"""
+import asyncio
+import json
+import logging
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from itertools import chain, groupby
+
+from boto3.dynamodb.conditions import Key
+from redis.exceptions import RedisError
+
+from app.chat.keys import KEY_PREFIX, LEGACY_PREFIX, key_bound, key_day, order_key
+from app.chat.service import block_sort_key, decode_block, encode_block, lean_message
+from app.config import settings
+from app.dependencies import get_dynamo_client, get_redis_client
+from app.observability.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+_compacted = counter("history_compacted_messages_total", "Message copies moved into cold history blocks")
+
+# Uncompressed JSON per block; compressed it stays well under DynamoDB's 400 KB item limit
+_BLOCK_MAX_BYTES = 300_000
+_LEASE_KEY = "chat:compaction:lease"
+
+_compactor_task: asyncio.Task | None = None
+
+
+def _pages(method, **kwargs) -> Iterator[dict]:
+    while True:
+        resp = method(**kwargs)
+        yield from resp.get("Items", [])
+        if "LastEvaluatedKey" not in resp:
+            return
+        kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def _chunks(messages: list[dict]) -> Iterator[list[dict]]:
+    chunk: list[dict] = []
+    size = 0
+    for message in messages:
+        message_size = len(json.dumps(message, separators=(",", ":")))
+        if chunk and size + message_size > _BLOCK_MAX_BYTES:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(message)
+        size += message_size
+    if chunk:
+        yield chunk
+
+
+def compact_partition(user_id: str, chat_id: str, before_day: str) -> int:
+    """Move a user's messages in a chat dated before before_day (YYYY-MM-DD) into blocks.
+
+    Returns the number of messages moved.
+    """
+    table = get_dynamo_client().Table("messages")
+    partition = f"USER#{user_id}#CHAT#{chat_id}"
+    cutoff = datetime.fromisoformat(before_day).replace(tzinfo=timezone.utc)
+    # Legacy keys, then current ones (all newer); both ranges come back in send order
+    ranges = ((LEGACY_PREFIX, f"{LEGACY_PREFIX}{before_day}"), (KEY_PREFIX, key_bound(cutoff)))
+    old = chain(*(
+        _pages(table.query, KeyConditionExpression=Key("PK").eq(partition) & Key("SK").between(low, high))
+        for low, high in ranges
+    ))
+    moved = 0
+    for day, items in groupby(old, key=lambda item: key_day(item["SK"])):
+        items = list(items)
+        existing = table.query(
+            KeyConditionExpression=Key("PK").eq(partition) & Key("SK").begins_with(f"BLK#{day}#"),
+        ).get("Items", [])
+        merged = {m["SK"]: m for block in existing for m in decode_block(block)}
+        merged.update({item["SK"]: lean_message(item) for item in items})
+        messages = [merged[sk] for sk in sorted(merged, key=order_key)]
+        for part, chunk in enumerate(_chunks(messages)):
+            table.put_item(Item={
+                "PK": partition,
+                "SK": block_sort_key(day, part),
+                "data": encode_block(chunk),
+                "messageCount": len(chunk),
+            })
+        with table.batch_writer() as batch:
+            for item in items:
+                batch.delete_item(Key={"PK": partition, "SK": item["SK"]})
+        moved += len(items)
+    return moved
+
+
+def compact_history(now: datetime | None = None) -> int:
+    """Compact every user's chats; returns the number of messages moved."""
+    now = now or datetime.now(timezone.utc)
+    before_day = (now - timedelta(days=settings.history_hot_days)).date().isoformat()
+    inboxes = get_dynamo_client().Table("user_chats")
+    total = 0
+    for entry in _pages(inboxes.scan, ProjectionExpression="PK, chatId"):
+        user_id = entry["PK"].removeprefix("USER#")
+        moved = compact_partition(user_id, entry["chatId"], before_day)
+        if moved:
+            _compacted.inc(moved)
+            total += moved
+    logger.info("Compacted %d messages dated before %s", total, before_day)
+    return total
+
+
+async def _compaction_loop():
+    interval = settings.history_compaction_interval_seconds
+    redis_down = False
+    while True:
+        try:
+            client = await get_redis_client()
+            # One pass per interval across all workers
+            leased = await client.set(_LEASE_KEY, "1", nx=True, px=int(interval * 1000))
+        except RedisError:
+            # No lease, no pass; say so once rather than every interval
+            if not redis_down:
+                logger.warning("Redis unreachable, history compaction paused until it is back", exc_info=True)
+            redis_down = True
+        else:
+            if redis_down:
+                logger.info("Redis reachable again, history compaction resumed")
+            redis_down = False
+            if leased:
+                try:
+                    await asyncio.to_thread(compact_history)
+                except Exception:
+                    logger.exception("History compaction pass failed")
+        await asyncio.sleep(interval)
+
+
+async def start_compactor():
+    global _compactor_task
+    if _compactor_task is None and settings.history_compaction_interval_seconds > 0:
+        _compactor_task = asyncio.create_task(_compaction_loop())
+
+
+async def stop_compactor():
+    global _compactor_task
+    if _compactor_task is not None:
+        _compactor_task.cancel()
+        await asyncio.gather(_compactor_task, return_exceptions=True)
+        _compactor_task = None
+
+
+if __name__ == "__main__":
+    from app.observability.logs import configure_logging
+
+    configure_logging()
+    compact_history()
@@ -0,0 +1,84 @@
+"""Message sort keys.
+
+New messages are keyed ``m<ULID>``: a 26-character Crockford base32 ULID
+(48-bit millisecond time, 80 random bits) that is also the message ID and
+carries its timestamp, 27 characters in all. Older messages keep their
+legacy ``MSG#<ISO timestamp>#<UUID>`` keys (86 characters), which sort
+before every new key as the messages are older. Both forms are valid
+cursors and decode to the same (message ID, timestamp) pair.
+"""
+import secrets
+from datetime import datetime, timezone
+
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {c: i for i, c in enumerate(_ALPHABET)}
+
+KEY_PREFIX = "m"
+LEGACY_PREFIX = "MSG#"
+# Lowest hot message key of either form; block keys (BLK#) sort below it
+HOT_START = LEGACY_PREFIX
+
+
+def new_message_id(now: datetime | None = None) -> str:
+    """A ULID for a message sent at now."""
+    now = now or datetime.now(timezone.utc)
+    value = int(now.timestamp() * 1000) << 80 | secrets.randbits(80)
+    return "".join(_ALPHABET[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+
+def _id_millis(message_id: str) -> int:
+    value = 0
+    for c in message_id:
+        value = value << 5 | _DECODE[c]
+    return value >> 80
+
+
+def message_sort_key(message_id: str) -> str:
+    return KEY_PREFIX + message_id
+
+
+def message_key(message_id: str, timestamp: str) -> str:
+    """The sort key of a message with this ID and timestamp, in whichever form it was written."""
+    if len(message_id) == 26 and set(message_id) <= _DECODE.keys():
+        return message_sort_key(message_id)
+    return f"{LEGACY_PREFIX}{timestamp}#{message_id}"
+
+
+def key_bound(when: datetime) -> str:
+    """Sorts after current keys of messages sent before when and before those sent at or after it."""
+    # The first 10 ULID characters are the timestamp
+    return KEY_PREFIX + new_message_id(when)[:10]
+
+
+def key_time(sort_key: str) -> datetime:
+    """When the message with this sort key was sent; ValueError when it is not one."""
+    if sort_key.startswith(LEGACY_PREFIX):
+        sent = datetime.fromisoformat(sort_key[len(LEGACY_PREFIX):].split("#", 1)[0])
+        if sent.tzinfo is None:
+            raise ValueError("Invalid message key")
+        return sent
+    message_id = sort_key[len(KEY_PREFIX):]
+    if not sort_key.startswith(KEY_PREFIX) or len(message_id) != 26 or not set(message_id) <= _DECODE.keys():
+        raise ValueError("Invalid message key")
+    millis = _id_millis(message_id)
+    return datetime.fromtimestamp(millis // 1000, timezone.utc).replace(microsecond=millis % 1000 * 1000)
+
+
+def key_day(sort_key: str) -> str:
+    """The UTC day (YYYY-MM-DD) a message was sent on, from its sort key."""
+    return key_time(sort_key).astimezone(timezone.utc).date().isoformat()
+
+
+def parse_sort_key(sort_key: str) -> tuple[str, str]:
+    """(message ID, ISO timestamp) of a message sort key."""
+    if sort_key.startswith(LEGACY_PREFIX):
+        _, timestamp, message_id = sort_key.split("#", 2)
+        return message_id, timestamp
+    return sort_key[len(KEY_PREFIX):], key_time(sort_key).isoformat()
+
+
+def order_key(sort_key: str) -> tuple[int, str]:
+    """Orders message sort keys of both forms by send time, matching key order within each form."""
+    sent = key_time(sort_key)
+    micros = int(sent.timestamp()) * 1_000_000 + sent.microsecond
+    return micros, sort_key
@@ -5,12 +5,23 @@ class CreateChatRequest(BaseModel):
     username: str = Field(min_length=1)
 
 
+class CreateGroupChatRequest(BaseModel):
+    usernames: list[str] = Field(min_length=2)
+    name: str = Field(min_length=1, max_length=100)
+
+
 class ChatResponse(BaseModel):
     chat_id: str
-    other_username: str
-    other_user_id: str
+    other_username: str | None = None
+    other_user_id: str | None = None
+    name: str | None = None
+    is_group: bool = False
+    member_user_ids: list[str] = []
     last_message_preview: str | None = None
     updated_at: str | None = None
+    unread_count: int = 0
+    # Cursor of the last message the user has read
+    last_read_cursor: str | None = None
 
 
 class MessageResponse(BaseModel):
@@ -19,8 +30,36 @@ class MessageResponse(BaseModel):
     from_user_id: str
     language: str
     timestamp: str
+    # The message's position: a page cursor, and what to pass when marking it read
+    cursor: str
 
 
 class MessagesPageResponse(BaseModel):
     messages: list[MessageResponse]
     next_cursor: str | None = None
+
+
+class MarkReadRequest(BaseModel):
+    # Cursor of the newest message the user has seen
+    cursor: str = Field(min_length=1)
+
+
+class ReadReceiptResponse(BaseModel):
+    chat_id: str
+    unread_count: int
+    last_read_cursor: str | None = None
+    read_at: str | None = None
+
+
+class SyncMessageResponse(MessageResponse):
+    chat_id: str
+
+
+class SyncResponse(BaseModel):
+    messages: list[SyncMessageResponse]
+    # Current inbox entries of the chats that changed
+    chats: list[ChatResponse]
+    next_token: str
+    has_more: bool = False
+    # The since token is older than the change log; reload chats and messages
+    reset: bool = False
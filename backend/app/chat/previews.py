@@ -0,0 +1,209 @@
+"""Write-back buffer for inbox entries (lastMessagePreview/updatedAt and unreadCount on user_chats).
+
+send_message records each member's new preview here, and for each
+recipient the sort key of the message to count as unread, instead of
+writing them. Only the latest preview per (user, chat) is kept and unread
+keys accumulate, so a burst of messages in one chat costs one write per
+member instead of two per message. Pending entries are written every
+settings.preview_flush_interval_seconds, on shutdown, and for a user before
+their inbox is read in this process; other processes see them within the
+interval. Writes are conditional on updatedAt, so a stale preview from a
+slower process never replaces a newer one, and never recreate an inbox
+entry that no longer exists.
+
+Unread keys are added as one ``ADD unreadCount :n`` when they all sort
+after the read watermark and after any message a mark_read recounted
+(recountedTo); otherwise each is counted under its own condition, as in
+app.chat.service.mark_read.
+"""
+import asyncio
+import logging
+import threading
+from collections.abc import Collection
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from app.config import settings
+from app.dependencies import get_dynamo_client
+from app.observability.metrics import counter, track_executor
+
+logger = logging.getLogger(__name__)
+
+_coalesced = counter("inbox_previews_coalesced_total", "Inbox preview updates replaced by a newer one before being written")
+_written = counter("inbox_preview_writes_total", "Inbox preview updates written to user_chats")
+_unread_fallbacks = counter(
+    "inbox_unread_fallbacks_total", "Pending unread counts applied one message at a time after a read got in the way",
+)
+
+# user_id -> chat_id -> (preview, updated_at, unread message keys); preview
+# and updated_at are None once written when only unread keys are left to retry
+_Entry = tuple[str | None, str | None, tuple[str, ...]]
+_pending: dict[str, dict[str, _Entry]] = {}
+_lock = threading.Lock()
+# user_id -> one event per flush currently writing that user's entries
+_in_flight: dict[str, list[threading.Event]] = {}
+_write_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="previews")
+track_executor("previews", _write_pool)
+
+_flusher_task: asyncio.Task | None = None
+
+
+def buffer_previews(
+    chat_id: str,
+    previews: dict[str, str],
+    updated_at: str,
+    unread_key: str | None = None,
+    unread_ids: Collection[str] = (),
+):
+    """Record each user's new preview of a chat ({user_id: preview}) as of updated_at,
+    and the message at unread_key as unread for unread_ids."""
+    with _lock:
+        for user_id, preview in previews.items():
+            keys = (unread_key,) if unread_key is not None and user_id in unread_ids else ()
+            if _merge_locked(user_id, chat_id, (preview, updated_at, keys)):
+                _coalesced.inc()
+    if settings.preview_flush_interval_seconds <= 0:
+        flush_previews(list(previews))
+
+
+def _merge_locked(user_id: str, chat_id: str, entry: _Entry) -> bool:
+    """Add entry to the buffer, keeping the newer preview and every unread key; True if one was pending."""
+    chats = _pending.setdefault(user_id, {})
+    previous = chats.get(chat_id)
+    if previous is None:
+        chats[chat_id] = entry
+        return False
+    preview, updated_at, keys = entry
+    if preview is None or (previous[1] is not None and previous[1] > updated_at):
+        preview, updated_at = previous[0], previous[1]
+    chats[chat_id] = (preview, updated_at, tuple(sorted({*previous[2], *keys})))
+    return True
+
+
+def _update(table, key: dict, expression: str, condition: str, values: dict) -> bool:
+    """Conditional UpdateItem; False when the condition did not hold."""
+    try:
+        table.update_item(
+            Key=key, UpdateExpression=expression, ConditionExpression=condition, ExpressionAttributeValues=values,
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        return False
+    return True
+
+
+def _write(
+    user_id: str, chat_id: str, preview: str | None, updated_at: str | None, unread: tuple[str, ...],
+) -> _Entry | None:
+    """Write one pending entry; returns what is left of it after a failed write, or None."""
+    table = get_dynamo_client().Table("user_chats")
+    key = {"PK": f"USER#{user_id}", "SK": f"CHAT#{chat_id}"}
+    try:
+        if preview is not None and unread and _update(
+            table, key,
+            "SET lastMessagePreview = :preview, updatedAt = :now ADD unreadCount :n",
+            "attribute_exists(PK) AND updatedAt <= :now"
+            " AND (attribute_not_exists(lastReadKey) OR lastReadKey < :first)"
+            " AND (attribute_not_exists(recountedTo) OR recountedTo < :first)",
+            {":preview": preview, ":now": updated_at, ":n": len(unread), ":first": unread[0]},
+        ):
+            return None
+        if preview is not None:
+            _update(
+                table, key,
+                "SET lastMessagePreview = :preview, updatedAt = :now",
+                "attribute_exists(PK) AND updatedAt <= :now",
+                {":preview": preview, ":now": updated_at},
+            )
+            preview = updated_at = None
+        if unread:
+            # A read, a recount or a newer preview got in the way: count each message on its own
+            _unread_fallbacks.inc()
+        while unread:
+            # Already read past or recounted (or no inbox entry): nothing to count
+            _update(
+                table, key,
+                "ADD unreadCount :one",
+                "attribute_exists(PK) AND (attribute_not_exists(lastReadKey) OR lastReadKey < :key)"
+                " AND NOT contains(recountedKeys, :key)",
+                {":one": 1, ":key": unread[0]},
+            )
+            unread = unread[1:]
+    except (ClientError, BotoCoreError):
+        logger.warning("Could not write inbox entry for chat %s", chat_id, exc_info=True)
+        return preview, updated_at, unread
+    return None
+
+
+def flush_previews(user_ids: list[str] | None = None):
+    """Write the pending entries of the given users, or of everyone.
+
+    A flush for given users also waits for their entries that another
+    flush has already taken, but not for anyone else's.
+    """
+    done = threading.Event()
+    with _lock:
+        users = list(_pending) if user_ids is None else [u for u in user_ids if u in _pending]
+        waits = [event for user_id in user_ids or () for event in _in_flight.get(user_id, ())]
+        taken = [
+            (user_id, chat_id, *entry)
+            for user_id in users
+            for chat_id, entry in _pending.pop(user_id).items()
+        ]
+        for user_id in users:
+            _in_flight.setdefault(user_id, []).append(done)
+    try:
+        if taken:
+            _write_taken(taken)
+    finally:
+        with _lock:
+            for user_id in users:
+                events = _in_flight[user_id]
+                events.remove(done)
+                if not events:
+                    del _in_flight[user_id]
+        done.set()
+    for event in waits:
+        event.wait()
+
+
+def _write_taken(taken: list[tuple]):
+    left = list(_write_pool.map(lambda entry: _write(*entry), taken))
+    failed = []
+    for (user_id, chat_id, preview, *_), rest in zip(taken, left):
+        if preview is not None and (rest is None or rest[0] is None):
+            _written.inc()
+        if rest is not None:
+            failed.append((user_id, chat_id, rest))
+    # What failed goes back, merged with anything buffered meanwhile
+    if failed:
+        with _lock:
+            for user_id, chat_id, rest in failed:
+                _merge_locked(user_id, chat_id, rest)
+
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(settings.preview_flush_interval_seconds)
+        try:
+            await asyncio.to_thread(flush_previews)
+        except Exception:
+            logger.exception("Inbox preview flush failed")
+
+
+async def start_flusher():
+    global _flusher_task
+    if _flusher_task is None and settings.preview_flush_interval_seconds > 0:
+        _flusher_task = asyncio.create_task(_flush_loop())
+
+
+async def stop_flusher():
+    """Stop the timer and write everything still pending."""
+    global _flusher_task
+    if _flusher_task is not None:
+        _flusher_task.cancel()
+        await asyncio.gather(_flusher_task, return_exceptions=True)
+        _flusher_task = None
+    await asyncio.to_thread(flush_previews)
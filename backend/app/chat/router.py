@@ -1,17 +1,70 @@
+import asyncio
+import json
+from collections.abc import Iterator
+
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 
 from app.auth.dependencies import get_current_user
+from app.auth.profiles import load_profiles_by_username
 from app.auth.service import get_user_by_username
-from app.chat.models import ChatResponse, CreateChatRequest, MessagesPageResponse, MessageResponse
+from app.chat.models import (
+    ChatResponse,
+    CreateChatRequest,
+    CreateGroupChatRequest,
+    MarkReadRequest,
+    MessagesPageResponse,
+    MessageResponse,
+    ReadReceiptResponse,
+    SyncMessageResponse,
+    SyncResponse,
+)
+from app.chat.keys import message_key
 from app.chat.service import (
+    check_cursor,
     create_chat,
+    create_group_chat,
     find_existing_chat,
+    get_changes,
     get_chat_meta,
     get_messages,
+    get_user_chats,
+    iter_messages,
     list_user_chats,
+    mark_read,
 )
+from app.chat.websocket import publish_read_receipt
 
 router = APIRouter()
+# Mounted at /api/sync
+sync_router = APIRouter()
+
+# Export rows are sent in chunks of about this many characters
+_EXPORT_CHUNK_CHARS = 64 * 1024
+
+
+def _chat_response(item: dict) -> ChatResponse:
+    return ChatResponse(
+        chat_id=item["chatId"],
+        other_username=item.get("otherUsername"),
+        other_user_id=item.get("otherUserId"),
+        name=item.get("name"),
+        is_group=item.get("isGroup", False),
+        member_user_ids=item.get("memberUserIds", []),
+        last_message_preview=item.get("lastMessagePreview"),
+        updated_at=item.get("updatedAt"),
+        unread_count=item.get("unreadCount", 0),
+        last_read_cursor=item.get("lastReadKey"),
+    )
+
+
+def _receipt_response(item: dict) -> ReadReceiptResponse:
+    return ReadReceiptResponse(
+        chat_id=item["chatId"],
+        unread_count=item.get("unreadCount", 0),
+        last_read_cursor=item.get("lastReadKey"),
+        read_at=item.get("lastReadAt"),
+    )
 
 
 @router.post("", response_model=ChatResponse, status_code=status.HTTP_201_CREATED)
@@ -29,35 +82,62 @@ async def create_chat_endpoint(
     # Return existing chat if one already exists
     existing = find_existing_chat(current_user["userId"], other_user["userId"])
     if existing:
-        return ChatResponse(
-            chat_id=existing["chatId"],
-            other_username=existing["otherUsername"],
-            other_user_id=existing["otherUserId"],
-            last_message_preview=existing.get("lastMessagePreview"),
-            updated_at=existing.get("updatedAt"),
-        )
+        return _chat_response(existing)
 
     chat_id = create_chat(current_user, other_user)
     return ChatResponse(
         chat_id=chat_id,
         other_username=other_user["username"],
         other_user_id=other_user["userId"],
+        member_user_ids=[current_user["userId"], other_user["userId"]],
+    )
+
+
+@router.post("/group", response_model=ChatResponse, status_code=status.HTTP_201_CREATED)
+async def create_group_chat_endpoint(
+    body: CreateGroupChatRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    members = []
+    seen = {current_user["userId"]}
+    found = await load_profiles_by_username(body.usernames)
+    for username in body.usernames:
+        user = found.get(username)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User not found: {username}")
+        if user["userId"] not in seen:
+            seen.add(user["userId"])
+            members.append(user)
+
+    if len(members) < 2:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A group chat needs at least two other members",
+        )
+
+    chat_id = create_group_chat(current_user, members, body.name)
+    return ChatResponse(
+        chat_id=chat_id,
+        name=body.name,
+        is_group=True,
+        member_user_ids=[current_user["userId"]] + [m["userId"] for m in members],
     )
 
 
 @router.get("", response_model=list[ChatResponse])
 async def list_chats_endpoint(current_user: dict = Depends(get_current_user)):
-    items = list_user_chats(current_user["userId"])
-    return [
-        ChatResponse(
-            chat_id=item["chatId"],
-            other_username=item["otherUsername"],
-            other_user_id=item["otherUserId"],
-            last_message_preview=item.get("lastMessagePreview"),
-            updated_at=item.get("updatedAt"),
-        )
-        for item in items
-    ]
+    # Reading the inbox may first write the user's buffered previews
+    items = await asyncio.get_running_loop().run_in_executor(None, list_user_chats, current_user["userId"])
+    return [_chat_response(item) for item in items]
+
+
+def _check_member(chat_id: str, user_id: str):
+    chat_meta = get_chat_meta(chat_id)
+    if not chat_meta:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+
+    if user_id not in chat_meta.get("memberUserIds", []):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this chat")
 
 
 @router.get("/{chat_id}/messages", response_model=MessagesPageResponse)
@@ -68,22 +148,139 @@ async def get_messages_endpoint(
     current_user: dict = Depends(get_current_user),
 ):
     # Verify user is a member of this chat
+    _check_member(chat_id, current_user["userId"])
+
+    try:
+        items, next_cursor = get_messages(current_user["userId"], chat_id, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    messages = [
+        MessageResponse(
+            message_id=item["messageId"],
+            text=item["text"],
+            from_user_id=item["fromUserId"],
+            language=item["language"],
+            timestamp=item["timestamp"],
+            cursor=item["SK"],
+        )
+        for item in items
+    ]
+    return MessagesPageResponse(messages=messages, next_cursor=next_cursor)
+
+
+@router.post("/{chat_id}/read", response_model=ReadReceiptResponse)
+async def mark_read_endpoint(
+    chat_id: str,
+    body: MarkReadRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """Mark the chat read up to a message: resets the unread count and tells the other members."""
+    user_id = current_user["userId"]
     chat_meta = get_chat_meta(chat_id)
     if not chat_meta:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
-
-    if current_user["userId"] not in chat_meta.get("memberUserIds", []):
+    if user_id not in chat_meta.get("memberUserIds", []):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this chat")
 
-    items, next_cursor = get_messages(current_user["userId"], chat_id, cursor, limit)
+    loop = asyncio.get_running_loop()
+    try:
+        item = await loop.run_in_executor(None, mark_read, user_id, chat_id, body.cursor)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if item is None:
+        # Already read this far: report the current state
+        items = await loop.run_in_executor(None, get_user_chats, user_id, [chat_id])
+        if not items:
+            # The inbox entry went away (chat deleted or membership changed meanwhile)
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+        item = items[0]
+    else:
+        await publish_read_receipt(chat_id, chat_meta["memberUserIds"], user_id, item)
+    return _receipt_response(item)
+
+
+def _export_chunks(user_id: str, chat_id: str, cursor: str | None) -> Iterator[str]:
+    """NDJSON message rows, oldest first, joined into chunks of about _EXPORT_CHUNK_CHARS."""
+    lines: list[str] = []
+    size = 0
+    for item in iter_messages(user_id, chat_id, cursor):
+        line = json.dumps({
+            "message_id": item["messageId"],
+            "text": item["text"],
+            "from_user_id": item["fromUserId"],
+            "language": item["language"],
+            "timestamp": item["timestamp"],
+            "cursor": item["SK"],
+        }, ensure_ascii=False, separators=(",", ":")) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= _EXPORT_CHUNK_CHARS:
+            yield "".join(lines)
+            lines, size = [], 0
+    if lines:
+        yield "".join(lines)
+
+
+@router.get("/{chat_id}/messages/export")
+async def export_messages_endpoint(
+    chat_id: str,
+    cursor: str | None = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """Stream the user's whole history of a chat as NDJSON, oldest first.
+
+    Rows are written as DynamoDB pages arrive, so memory use does not grow
+    with the history. Every row carries a cursor; pass the last one received
+    to resume an interrupted export.
+    """
+    _check_member(chat_id, current_user["userId"])
+    if cursor:
+        try:
+            check_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    # A sync iterator, so Starlette runs each DynamoDB page fetch in its threadpool
+    return StreamingResponse(
+        _export_chunks(current_user["userId"], chat_id, cursor),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="chat-{chat_id}.ndjson"'},
+    )
+
+
+@sync_router.get("", response_model=SyncResponse)
+async def sync_endpoint(
+    since: str | None = None,
+    limit: int = Query(default=100, ge=1, le=500),
+    current_user: dict = Depends(get_current_user),
+):
+    """New messages and changed inbox entries across all of the user's chats since a token.
+
+    Replaces listing chats and then fetching each one's messages on launch.
+    Repeat with next_token while has_more is set.
+    """
+    user_id = current_user["userId"]
+    loop = asyncio.get_running_loop()
+    try:
+        changes = await loop.run_in_executor(None, get_changes, user_id, since, limit)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token")
+    chats = await loop.run_in_executor(None, get_user_chats, user_id, changes["chat_ids"]) if changes["chat_ids"] else []
     messages = [
-        MessageResponse(
+        SyncMessageResponse(
+            chat_id=item["chatId"],
             message_id=item["messageId"],
             text=item["text"],
             from_user_id=item["fromUserId"],
             language=item["language"],
             timestamp=item["timestamp"],
+            cursor=message_key(item["messageId"], item["timestamp"]),
         )
-        for item in items
+        for item in changes["messages"]
     ]
-    return MessagesPageResponse(messages=messages, next_cursor=next_cursor)
+    return SyncResponse(
+        messages=messages,
+        chats=[_chat_response(item) for item in chats],
+        next_token=changes["next_token"],
+        has_more=changes["has_more"],
+        reset=changes["reset"],
+    )
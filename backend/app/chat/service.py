@@ -1,25 +1,93 @@
+from __future__ import annotations
+
+import json
 import logging
+import time
 import uuid
-from datetime import datetime, timezone
-
-from boto3.dynamodb.conditions import Key
-from openai import OpenAI
-
+import zlib
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import TYPE_CHECKING
+
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import Binary
+from botocore.exceptions import ClientError
+
+from app.chat.keys import (
+    HOT_START,
+    key_bound,
+    key_day,
+    key_time,
+    message_sort_key,
+    new_message_id,
+    order_key,
+    parse_sort_key,
+)
+from app.chat.previews import buffer_previews, flush_previews
 from app.config import settings
 from app.dependencies import get_dynamo_client
+from app.observability.metrics import counter, histogram, track_executor
+from app.search.service import index_messages
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
 
 logger = logging.getLogger(__name__)
 
 _openai_client: OpenAI | None = None
+_async_openai_client: AsyncOpenAI | None = None
+# Runs the per-language translations of one message concurrently
+_translation_pool = ThreadPoolExecutor(max_workers=settings.translation_max_concurrency, thread_name_prefix="translate")
+track_executor("translation", _translation_pool)
+
+_translation_seconds = histogram(
+    "translation_duration_seconds", "OpenAI translation latency (streaming: until the last token)", ("mode",),
+)
+_translation_tokens = counter("translation_tokens_total", "OpenAI tokens used for translation", ("kind",))
+_translation_errors = counter("translation_errors_total", "Failed OpenAI translation calls", ("mode",))
+
+# BatchWriteItem accepts at most 25 puts per request, BatchGetItem 100 keys
+_BATCH_WRITE_MAX_ITEMS = 25
+_BATCH_GET_MAX_KEYS = 100
+# mark_read retries its optimistic update this many times when messages keep arriving
+_MARK_READ_ATTEMPTS = 5
+# A message's unread increments land this soon after it is sent (keys are
+# taken before translating, increments wait in the preview buffer). mark_read
+# records the keys it counted from within this window, and their increments
+# are skipped if they land later.
+_UNREAD_SETTLE = timedelta(minutes=5)
+
+# A message partition holds recent messages as individual items (keys in
+# app.chat.keys) and older ones as cold blocks (see app.chat.compaction): one
+# BLK#<day>#<part> item per day, its messages stored as zlib-compressed JSON.
+# Every block key sorts before every message key, and blocks only hold
+# messages older than any hot item.
+_BLOCK_PREFIX = "BLK#"
+# Stored attribute names of message items. The message ID and timestamp are
+# read from the sort key; items written before the switch carry the long
+# names and the redundant attributes, and are read the same way.
+_STORED_NAMES = {"text": "t", "fromUserId": "f", "language": "l"}
 
 
 def _get_openai_client() -> OpenAI:
     global _openai_client
     if _openai_client is None:
+        # The SDK takes a third of a second to import; defer it until the first translation
+        from openai import OpenAI
         _openai_client = OpenAI(api_key=settings.openai_api_key)
     return _openai_client
 
 
+def _get_async_openai_client() -> AsyncOpenAI:
+    global _async_openai_client
+    if _async_openai_client is None:
+        from openai import AsyncOpenAI
+        _async_openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+    return _async_openai_client
+
+
 def _query_all_pages(table, **kwargs) -> list[dict]:
     """Query DynamoDB and paginate through all result pages."""
     items = []
@@ -32,6 +100,42 @@ def _query_all_pages(table, **kwargs) -> list[dict]:
     return items
 
 
+def _batch_put(items_by_table: dict[str, list[dict]]):
+    """Put items into several tables with as few BatchWriteItem requests as possible.
+
+    Unprocessed items (throttling) are resent with capped exponential backoff
+    until they are all written, like boto3's batch_writer.
+    """
+    dynamo = get_dynamo_client()
+    pending = [(table, item) for table, items in items_by_table.items() for item in items]
+    for start in range(0, len(pending), _BATCH_WRITE_MAX_ITEMS):
+        request: dict[str, list[dict]] = {}
+        for table, item in pending[start:start + _BATCH_WRITE_MAX_ITEMS]:
+            request.setdefault(table, []).append({"PutRequest": {"Item": item}})
+        attempt = 0
+        while request:
+            request = dynamo.batch_write_item(RequestItems=request).get("UnprocessedItems") or {}
+            if request:
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+                attempt += 1
+
+
+def _change_item(user_id: str, changed_at: str, change_id: str, kind: str, chat_id: str, **fields) -> dict:
+    """An entry in a user's sync_log, the change feed read by get_changes().
+
+    Entries sort by the time they were written and expire after
+    settings.sync_log_ttl_seconds (DynamoDB TTL on expiresAt).
+    """
+    return {
+        "PK": f"USER#{user_id}",
+        "SK": f"CHG#{changed_at}#{change_id}",
+        "kind": kind,
+        "chatId": chat_id,
+        "expiresAt": int(time.time()) + settings.sync_log_ttl_seconds,
+        **fields,
+    }
+
+
 def find_existing_chat(user_id: str, other_user_id: str) -> dict | None:
     """Check if a chat already exists between two users via user_chats table."""
     dynamo = get_dynamo_client()
@@ -63,25 +167,62 @@ def create_chat(current_user: dict, other_user: dict) -> str:
         "createdAt": now,
     })
 
-    # Write user_chats entry for both users
-    user_chats_table = dynamo.Table("user_chats")
-    user_chats_table.put_item(Item={
-        "PK": f"USER#{current_user['userId']}",
-        "SK": f"CHAT#{chat_id}",
-        "chatId": chat_id,
-        "otherUsername": other_user["username"],
-        "otherUserId": other_user["userId"],
-        "lastMessagePreview": None,
-        "updatedAt": now,
+    # Write user_chats entry for both users, and tell both users' sync feeds
+    pair = ((current_user, other_user), (other_user, current_user))
+    _batch_put({
+        "user_chats": [
+            {
+                "PK": f"USER#{user['userId']}",
+                "SK": f"CHAT#{chat_id}",
+                "chatId": chat_id,
+                "otherUsername": other["username"],
+                "otherUserId": other["userId"],
+                "lastMessagePreview": None,
+                "updatedAt": now,
+                "unreadCount": 0,
+            }
+            for user, other in pair
+        ],
+        "sync_log": [_change_item(user["userId"], now, chat_id, "chat", chat_id) for user, _ in pair],
     })
-    user_chats_table.put_item(Item={
-        "PK": f"USER#{other_user['userId']}",
-        "SK": f"CHAT#{chat_id}",
+
+    return chat_id
+
+
+def create_group_chat(creator: dict, members: list[dict], name: str) -> str:
+    """Create a group chat with the creator and members. Writes to chats + user_chats tables.
+    Returns the chat_id."""
+    chat_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc).isoformat()
+    member_ids = [creator["userId"]] + [m["userId"] for m in members]
+    dynamo = get_dynamo_client()
+
+    dynamo.Table("chats").put_item(Item={
+        "PK": f"CHAT#{chat_id}",
+        "SK": "META",
         "chatId": chat_id,
-        "otherUsername": current_user["username"],
-        "otherUserId": current_user["userId"],
-        "lastMessagePreview": None,
-        "updatedAt": now,
+        "memberUserIds": member_ids,
+        "name": name,
+        "isGroup": True,
+        "createdAt": now,
+    })
+
+    _batch_put({
+        "user_chats": [
+            {
+                "PK": f"USER#{member_id}",
+                "SK": f"CHAT#{chat_id}",
+                "chatId": chat_id,
+                "name": name,
+                "isGroup": True,
+                "memberUserIds": member_ids,
+                "lastMessagePreview": None,
+                "updatedAt": now,
+                "unreadCount": 0,
+            }
+            for member_id in member_ids
+        ],
+        "sync_log": [_change_item(member_id, now, chat_id, "chat", chat_id) for member_id in member_ids],
     })
 
     return chat_id
@@ -89,6 +230,8 @@ def create_chat(current_user: dict, other_user: dict) -> str:
 
 def list_user_chats(user_id: str) -> list[dict]:
     """Return all chats for a user, sorted by most recently updated."""
+    # Read-your-writes: write this user's buffered previews first
+    flush_previews([user_id])
     dynamo = get_dynamo_client()
     table = dynamo.Table("user_chats")
     items = _query_all_pages(
@@ -107,108 +250,428 @@ def get_chat_meta(chat_id: str) -> dict | None:
     return resp.get("Item")
 
 
-def send_message(chat_id: str, sender: dict, recipient: dict, text: str) -> tuple[dict, dict]:
-    """Dual-write a message: original for sender, translated for recipient.
-    Returns (sender_item, recipient_item).
-    Translates first before any writes to avoid partial state on failure."""
-    msg_id = str(uuid.uuid4())
-    now = datetime.now(timezone.utc).isoformat()
+def _message_item(owner_id: str, chat_id: str, msg_id: str, text: str, sender_id: str, language: str) -> dict:
+    """A message copy as stored: sort key plus short attribute names."""
+    return {
+        "PK": f"USER#{owner_id}#CHAT#{chat_id}",
+        "SK": message_sort_key(msg_id),
+        "t": text,
+        "f": sender_id,
+        "l": language,
+    }
+
+
+def lean_message(item: dict) -> dict:
+    """A stored message item of either format reduced to the current stored attributes, without PK."""
+    message = {"SK": item["SK"]}
+    for name, short in _STORED_NAMES.items():
+        message[short] = item[short] if short in item else item[name]
+    return message
+
+
+def _message_from_item(item: dict) -> dict:
+    """The message a stored item or block entry holds, with full attribute names."""
+    message_id, timestamp = parse_sort_key(item["SK"])
+    message = {"SK": item["SK"], "messageId": message_id, "timestamp": timestamp}
+    for name, short in _STORED_NAMES.items():
+        message[name] = item[short] if short in item else item[name]
+    return message
+
+
+def _translate_for_languages(text: str, source_lang: str, target_langs: list[str]) -> dict[str, str]:
+    """Translate text once per target language, concurrently when there is more than one."""
+    if len(target_langs) == 1:
+        return {target_langs[0]: translate_text(text, source_lang, target_langs[0])}
+    results = _translation_pool.map(lambda lang: translate_text(text, source_lang, lang), target_langs)
+    return dict(zip(target_langs, results))
+
+
+def send_message(chat_id: str, sender: dict, recipients: list[dict], text: str) -> tuple[dict, dict[str, dict]]:
+    """Write a message for every chat member: the original for the sender and a
+    copy in each recipient's language. Each distinct recipient language is
+    translated exactly once. Returns (sender_item, {recipient_id: recipient_item}),
+    with full attribute names. Translates first before any writes to avoid
+    partial state on failure."""
+    msg_id = new_message_id()
+    # The ID encodes the send time (to the millisecond); derive the timestamp from it
+    now = key_time(message_sort_key(msg_id)).isoformat()
     sender_id = sender["userId"]
-    recipient_id = recipient["userId"]
     sender_lang = sender["nativeLanguage"]
-    recipient_lang = recipient["nativeLanguage"]
 
     # Translate BEFORE writing anything to avoid partial writes on failure
-    if sender_lang == recipient_lang:
-        translated_text = text
+    target_langs = sorted({r["nativeLanguage"] for r in recipients} - {sender_lang})
+    translations = {sender_lang: text}
+    if target_langs:
+        translations.update(_translate_for_languages(text, sender_lang, target_langs))
+
+    stored = {sender_id: _message_item(sender_id, chat_id, msg_id, text, sender_id, sender_lang)}
+    stored.update({
+        r["userId"]: _message_item(
+            r["userId"], chat_id, msg_id, translations[r["nativeLanguage"]], sender_id, r["nativeLanguage"],
+        )
+        for r in recipients
+    })
+    sender_item = _message_from_item(stored[sender_id])
+    recipient_items = {r["userId"]: _message_from_item(stored[r["userId"]]) for r in recipients}
+
+    # Write every copy, and a sync_log entry for each member, in shared
+    # BatchWriteItem requests. Entries are stamped with the write time rather
+    # than the send time, so they land in the log close to timestamp order.
+    logged_at = datetime.now(timezone.utc).isoformat()
+    copies = [sender_item, *recipient_items.values()]
+    owners = [sender_id, *recipient_items]
+    _batch_put({
+        "messages": list(stored.values()),
+        "sync_log": [
+            _change_item(
+                owner_id, logged_at, msg_id, "message", chat_id,
+                messageId=msg_id, text=item["text"], fromUserId=sender_id,
+                language=item["language"], timestamp=now,
+            )
+            for owner_id, item in zip(owners, copies)
+        ],
+    })
+
+    # Update last message preview in user_chats for every member, and count the
+    # message as unread for each recipient, coalesced with later messages
+    previews = {sender_id: text[:100]}
+    previews.update({uid: item["text"][:100] for uid, item in recipient_items.items()})
+    buffer_previews(chat_id, previews, now, sender_item["SK"], recipient_items.keys())
+
+    index_messages(chat_id, {sender_id: sender_item, **recipient_items})
+
+    return sender_item, recipient_items
+
+
+def check_cursor(cursor: str):
+    """Raise ValueError unless cursor is a message sort key."""
+    _cursor_day(cursor)
+
+
+def _cursor_day(cursor: str) -> str:
+    try:
+        return key_day(cursor)
+    except ValueError:
+        raise ValueError("Invalid cursor") from None
+
+
+def block_sort_key(day: str, part: int) -> str:
+    return f"{_BLOCK_PREFIX}{day}#{part:03d}"
+
+
+def encode_block(messages: list[dict]) -> Binary:
+    """Compress lean message items (oldest first) into a block's data attribute."""
+    return Binary(zlib.compress(json.dumps(messages, separators=(",", ":")).encode()))
+
+
+def decode_block(item: dict) -> list[dict]:
+    """The message items held by a block, oldest first."""
+    return json.loads(zlib.decompress(bytes(item["data"])))
+
+
+def _query_messages(table, key, newest_first: bool, page_size: int, names: dict | None) -> Iterator[dict]:
+    """Yield the messages in a key range, expanding blocks, one query page at a time."""
+    query_kwargs: dict = {"KeyConditionExpression": key, "ScanIndexForward": not newest_first, "Limit": page_size}
+    if names:
+        query_kwargs["ProjectionExpression"] = ", ".join(names)
+        query_kwargs["ExpressionAttributeNames"] = names
+    while True:
+        resp = table.query(**query_kwargs)
+        for item in resp.get("Items", []):
+            if item["SK"].startswith(_BLOCK_PREFIX):
+                messages = decode_block(item)
+                for message in reversed(messages) if newest_first else messages:
+                    yield _message_from_item(message)
+            else:
+                yield _message_from_item(item)
+        if "LastEvaluatedKey" not in resp:
+            return
+        query_kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def _walk_messages(
+    user_id: str, chat_id: str, cursor: str | None, newest_first: bool, page_size: int,
+    attributes: tuple[str, ...] = (),
+) -> Iterator[dict]:
+    """Yield a user's messages in a chat after cursor, from hot items and cold blocks alike.
+
+    Queries are issued lazily, so a caller that stops early reads no further.
+    Cursor bounds are key conditions rather than start keys, so a cursor
+    keeps working after its message has been compacted. A message present
+    both in a block and as an item (compaction interrupted before its
+    deletes) is yielded once.
+    """
+    table = get_dynamo_client().Table("messages")
+    partition = Key("PK").eq(f"USER#{user_id}#CHAT#{chat_id}")
+    names = {f"#a{i}": attr for i, attr in enumerate(attributes)} if attributes else None
+    if newest_first:
+        # Hot items first, then blocks one at a time: a page rarely spans more than a day
+        hot = Key("SK").between(HOT_START, cursor) if cursor else Key("SK").gte(HOT_START)
+        cold = (
+            Key("SK").between(_BLOCK_PREFIX, f"{_BLOCK_PREFIX}{_cursor_day(cursor)}#~") if cursor
+            else Key("SK").begins_with(_BLOCK_PREFIX)
+        )
+        ranges = [(partition & hot, page_size), (partition & cold, 1)]
     else:
-        translated_text = translate_text(text, sender_lang, recipient_lang)
+        # Blocks sort first, so one ascending walk from the cursor's day covers both
+        key = partition & Key("SK").gte(block_sort_key(_cursor_day(cursor), 0)) if cursor else partition
+        ranges = [(key, page_size)]
 
-    dynamo = get_dynamo_client()
-    messages_table = dynamo.Table("messages")
-
-    sender_item = {
-        "PK": f"USER#{sender_id}#CHAT#{chat_id}",
-        "SK": f"MSG#{now}#{msg_id}",
-        "messageId": msg_id,
-        "text": text,
-        "fromUserId": sender_id,
-        "language": sender_lang,
-        "timestamp": now,
-    }
+    # Legacy and current keys are compared by send time
+    last = order_key(cursor) if cursor else None
+    for key, limit in ranges:
+        for item in _query_messages(table, key, newest_first, limit, names):
+            position = order_key(item["SK"])
+            if last is None or (position < last if newest_first else position > last):
+                last = position
+                yield item
 
-    recipient_item = {
-        "PK": f"USER#{recipient_id}#CHAT#{chat_id}",
-        "SK": f"MSG#{now}#{msg_id}",
-        "messageId": msg_id,
-        "text": translated_text,
-        "fromUserId": sender_id,
-        "language": recipient_lang,
-        "timestamp": now,
-    }
 
-    # Write both messages
-    messages_table.put_item(Item=sender_item)
-    messages_table.put_item(Item=recipient_item)
+def get_messages(user_id: str, chat_id: str, cursor: str | None = None, limit: int = 50) -> tuple[list[dict], str | None]:
+    """Fetch paginated messages for a user in a chat, newest first.
+    Returns (messages, next_cursor); next_cursor is None on the last page.
+    Raises ValueError for a malformed cursor."""
+    if cursor:
+        check_cursor(cursor)
+    items = list(islice(_walk_messages(user_id, chat_id, cursor, True, limit + 1), limit + 1))
+    next_cursor = items[limit - 1]["SK"] if len(items) > limit else None
+    return items[:limit], next_cursor
 
-    # Update last message preview in user_chats for both users
-    user_chats_table = dynamo.Table("user_chats")
-    user_chats_table.update_item(
-        Key={"PK": f"USER#{sender_id}", "SK": f"CHAT#{chat_id}"},
-        UpdateExpression="SET lastMessagePreview = :preview, updatedAt = :now",
-        ExpressionAttributeValues={":preview": text[:100], ":now": now},
-    )
-    user_chats_table.update_item(
-        Key={"PK": f"USER#{recipient_id}", "SK": f"CHAT#{chat_id}"},
-        UpdateExpression="SET lastMessagePreview = :preview, updatedAt = :now",
-        ExpressionAttributeValues={":preview": translated_text[:100], ":now": now},
+
+# Stored attributes read by the export, for current and legacy items and blocks
+_EXPORT_ATTRIBUTES = ("SK", *_STORED_NAMES.values(), *_STORED_NAMES, "data")
+
+
+def iter_messages(user_id: str, chat_id: str, cursor: str | None = None) -> Iterator[dict]:
+    """Yield a user's messages in a chat oldest first, starting after cursor.
+
+    Walks the partition with paginated queries of settings.export_page_size
+    items that fetch only the exported attributes, so memory stays bounded by one page however long the history is. Each
+    item's SK resumes the walk from just after it.
+    """
+    return _walk_messages(
+        user_id, chat_id, cursor, False, settings.export_page_size, _EXPORT_ATTRIBUTES,
     )
 
-    return sender_item, recipient_item
 
+def get_changes(user_id: str, since: str | None = None, limit: int = 100) -> dict:
+    """Read a user's sync_log after the since token, oldest first.
+
+    Returns {"messages", "chat_ids", "next_token", "has_more", "reset"}:
+    the new message copies (with chatId), the chats whose inbox entry
+    changed, and the token to pass as since next time. When since is older
+    than the log's retention the feed may have gaps, so nothing is returned
+    and reset tells the client to reload its chats.
+
+    The final page's token trails the present by settings.sync_settle_seconds,
+    so a change written slightly out of order is still picked up by the next
+    call; clients drop messages they already have by ID.
+    """
+    now = datetime.now(timezone.utc)
+    settled = f"CHG#{(now - timedelta(seconds=settings.sync_settle_seconds)).isoformat()}"
+    if since is not None:
+        since_time = _token_time(since)
+        if since_time < now - timedelta(seconds=settings.sync_log_ttl_seconds):
+            return {"messages": [], "chat_ids": [], "next_token": settled, "has_more": False, "reset": True}
+
+    key = Key("PK").eq(f"USER#{user_id}")
+    key = key & (Key("SK").gt(since) if since else Key("SK").begins_with("CHG#"))
+    resp = get_dynamo_client().Table("sync_log").query(KeyConditionExpression=key, Limit=limit)
+    items = resp.get("Items", [])
 
-def get_messages(user_id: str, chat_id: str, cursor: str | None = None, limit: int = 50) -> tuple[list[dict], str | None]:
-    """Fetch paginated messages for a user in a chat.
-    Returns (messages, next_cursor)."""
-    dynamo = get_dynamo_client()
-    table = dynamo.Table("messages")
+    has_more = "LastEvaluatedKey" in resp
+    if has_more:
+        # Resume right after the last change sent, wherever DynamoDB stopped reading
+        next_token = items[-1]["SK"]
+    else:
+        last = items[-1]["SK"] if items else since
+        next_token = min(last, settled) if last else settled
 
+    messages = [item for item in items if item["kind"] == "message"]
+    chat_ids = list(dict.fromkeys(item["chatId"] for item in items))
+    return {"messages": messages, "chat_ids": chat_ids, "next_token": next_token, "has_more": has_more, "reset": False}
+
+
+def _token_time(token: str) -> datetime:
+    """The time a sync token points at; ValueError when it is not one."""
+    prefix, _, rest = token.partition("#")
+    if prefix != "CHG":
+        raise ValueError("Invalid sync token")
+    changed_at = datetime.fromisoformat(rest.split("#", 1)[0])
+    if changed_at.tzinfo is None:
+        raise ValueError("Invalid sync token")
+    return changed_at
+
+
+def _unread_keys(user_id: str, chat_id: str, message_key: str) -> list[str]:
+    """Keys of the messages in a user's copy of a chat sent by others after message_key."""
+    table = get_dynamo_client().Table("messages")
     query_kwargs: dict = {
-        "KeyConditionExpression": Key("PK").eq(f"USER#{user_id}#CHAT#{chat_id}"),
-        "ScanIndexForward": False,
-        "Limit": limit,
+        "KeyConditionExpression": Key("PK").eq(f"USER#{user_id}#CHAT#{chat_id}") & Key("SK").gt(message_key),
+        "FilterExpression": ~(Attr("f").eq(user_id) | Attr("fromUserId").eq(user_id)),
+        "ProjectionExpression": "SK",
     }
+    keys = []
+    while True:
+        resp = table.query(**query_kwargs)
+        keys.extend(item["SK"] for item in resp["Items"])
+        if "LastEvaluatedKey" not in resp:
+            return keys
+        query_kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
 
-    if cursor:
-        query_kwargs["ExclusiveStartKey"] = {
-            "PK": f"USER#{user_id}#CHAT#{chat_id}",
-            "SK": cursor,
+
+def _newest_key(user_id: str, chat_id: str) -> str | None:
+    """Sort key of the newest message item in a user's copy of a chat."""
+    resp = get_dynamo_client().Table("messages").query(
+        KeyConditionExpression=Key("PK").eq(f"USER#{user_id}#CHAT#{chat_id}") & Key("SK").gte(HOT_START),
+        ProjectionExpression="SK",
+        ScanIndexForward=False,
+        Limit=1,
+    )
+    return resp["Items"][0]["SK"] if resp["Items"] else None
+
+
+def mark_read(user_id: str, chat_id: str, cursor: str) -> dict | None:
+    """Move the user's read watermark in a chat up to the message at cursor.
+
+    The unread count becomes the number of messages from others after the
+    cursor, usually none. The update is conditional on the count being
+    unchanged since it was read, so a message arriving meanwhile makes it
+    recount rather than be lost; recently sent messages it counted are kept
+    in recountedKeys (the latest in recountedTo), so their increments
+    landing afterwards from the buffer in app.chat.previews do not count
+    them again. A "read" entry in the user's sync_log tells their other
+    devices. Returns the updated user_chats item, or
+    None when nothing changed: the watermark was already at or past cursor,
+    or the entry kept changing. Raises ValueError for a malformed cursor or
+    one past both the current time and the newest message.
+    """
+    check_cursor(cursor)
+    # A later watermark would make every future message count as read
+    if cursor > key_bound(datetime.now(timezone.utc)) and cursor > (_newest_key(user_id, chat_id) or ""):
+        raise ValueError("Cursor is past the newest message")
+    table = get_dynamo_client().Table("user_chats")
+    key = {"PK": f"USER#{user_id}", "SK": f"CHAT#{chat_id}"}
+    for _ in range(_MARK_READ_ATTEMPTS):
+        item = table.get_item(Key=key, ConsistentRead=True).get("Item")
+        # Keys of both forms sort in send order, so watermarks compare as strings
+        if item is None or item.get("lastReadKey", "") >= cursor:
+            return None
+        seen_key, seen_count = item.get("lastReadKey"), item.get("unreadCount")
+        condition = Attr("lastReadKey").eq(seen_key) if seen_key else Attr("lastReadKey").not_exists()
+        condition &= Attr("unreadCount").eq(seen_count) if seen_count is not None else Attr("unreadCount").not_exists()
+        now = datetime.now(timezone.utc)
+        unread = _unread_keys(user_id, chat_id, cursor)
+        settle_bound = key_bound(now - _UNREAD_SETTLE)
+        recent = {message_key for message_key in unread if message_key > settle_bound}
+        values = {":key": cursor, ":now": now.isoformat(), ":unread": len(unread)}
+        update = "SET lastReadKey = :key, lastReadAt = :now, unreadCount = :unread"
+        if recent:
+            update += ", recountedKeys = :recent, recountedTo = :recent_to"
+            values[":recent"], values[":recent_to"] = recent, max(recent)
+        else:
+            update += " REMOVE recountedKeys, recountedTo"
+        try:
+            resp = table.update_item(
+                Key=key,
+                UpdateExpression=update,
+                ConditionExpression=condition,
+                ExpressionAttributeValues=values,
+                ReturnValues="ALL_NEW",
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            continue
+        # Other devices pick the new watermark and count up from the sync feed
+        _batch_put({"sync_log": [_change_item(user_id, now.isoformat(), uuid.uuid4().hex, "read", chat_id)]})
+        return resp["Attributes"]
+    logger.warning("Gave up marking chat %s read for user %s after %d attempts", chat_id, user_id, _MARK_READ_ATTEMPTS)
+    return None
+
+
+def get_user_chats(user_id: str, chat_ids: list[str]) -> list[dict]:
+    """Fetch a user's user_chats items for the given chats with BatchGetItem, most recently updated first."""
+    flush_previews([user_id])
+    dynamo = get_dynamo_client()
+    items = []
+    for start in range(0, len(chat_ids), _BATCH_GET_MAX_KEYS):
+        request = {
+            "user_chats": {
+                "Keys": [
+                    {"PK": f"USER#{user_id}", "SK": f"CHAT#{chat_id}"}
+                    for chat_id in chat_ids[start:start + _BATCH_GET_MAX_KEYS]
+                ],
+            }
         }
+        attempt = 0
+        while request:
+            resp = dynamo.batch_get_item(RequestItems=request)
+            items.extend(resp.get("Responses", {}).get("user_chats", []))
+            request = resp.get("UnprocessedKeys") or {}
+            if request:
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+                attempt += 1
+    items.sort(key=lambda x: x.get("updatedAt", ""), reverse=True)
+    return items
 
-    resp = table.query(**query_kwargs)
-    items = resp.get("Items", [])
-    next_cursor = None
-    if "LastEvaluatedKey" in resp:
-        next_cursor = resp["LastEvaluatedKey"]["SK"]
 
-    return items, next_cursor
+def _translation_messages(text: str, source_lang: str, target_lang: str) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": (
+                f"You are a translator. Translate the following text from {source_lang} to {target_lang}. "
+                "Return only the translated text, nothing else."
+            ),
+        },
+        {"role": "user", "content": text},
+    ]
 
 
 def translate_text(text: str, source_lang: str, target_lang: str) -> str:
     """Translate text using OpenAI."""
     client = _get_openai_client()
-    response = client.chat.completions.create(
-        model=settings.openai_translation_model,
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    f"You are a translator. Translate the following text from {source_lang} to {target_lang}. "
-                    "Return only the translated text, nothing else."
-                ),
-            },
-            {"role": "user", "content": text},
-        ],
-        temperature=0.3,
-    )
+    start = time.perf_counter()
+    try:
+        response = client.chat.completions.create(
+            model=settings.openai_translation_model,
+            messages=_translation_messages(text, source_lang, target_lang),
+            temperature=0.3,
+        )
+    except Exception:
+        _translation_errors.inc(mode="sync")
+        raise
+    _translation_seconds.observe(time.perf_counter() - start, mode="sync")
+    _record_usage(response.usage)
     return response.choices[0].message.content.strip()
+
+
+def _record_usage(usage):
+    if usage is not None:
+        _translation_tokens.inc(usage.prompt_tokens, kind="prompt")
+        _translation_tokens.inc(usage.completion_tokens, kind="completion")
+
+
+async def stream_translate_text(text: str, source_lang: str, target_lang: str) -> AsyncIterator[str]:
+    """Translate text using OpenAI, yielding content deltas as they are generated."""
+    client = _get_async_openai_client()
+    start = time.perf_counter()
+    try:
+        stream = await client.chat.completions.create(
+            model=settings.openai_translation_model,
+            messages=_translation_messages(text, source_lang, target_lang),
+            temperature=0.3,
+            stream=True,
+            # The final chunk then carries token usage for the whole response
+            stream_options={"include_usage": True},
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if chunk.usage is not None:
+                _record_usage(chunk.usage)
+    except Exception:
+        _translation_errors.inc(mode="stream")
+        raise
+    _translation_seconds.observe(time.perf_counter() - start, mode="stream")
@@ -1,32 +1,67 @@
 import asyncio
 import json
 import logging
+import time
+import uuid
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
 
-from app.auth.service import decode_access_token, get_user_by_id
-from app.chat.service import get_chat_meta, send_message
-from app.db.redis import publish, subscribe
+from app.auth.profiles import load_profile, load_profiles
+from app.auth.service import decode_access_token
+from app.chat.service import get_chat_meta, mark_read, send_message
+from app.db.redis import add_presence, get_presence, publish, remove_presence, subscribe
+from app.observability.metrics import counter, gauge, histogram
+from app.voice.service import ensure_pipeline_for_room, room_name_for_chat
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Identifies this process for fan-out: messages for users connected here are
+# published once to this node's channel, whatever the number of recipients
+NODE_ID = uuid.uuid4().hex
+# Presence entries expire unless refreshed, so a crashed node stops receiving publishes
+_PRESENCE_TTL_SECONDS = 300
+_PRESENCE_REFRESH_SECONDS = 60
+
 # In-memory map of user_id -> set of active WebSocket connections
 _connections: dict[str, set[WebSocket]] = {}
-# Single Redis listener task per user (shared across all their connections)
-_listener_tasks: dict[str, asyncio.Task] = {}
-
-
-def _register(user_id: str, ws: WebSocket):
+# Single Redis listener task per node (shared across all local connections)
+_listener_task: asyncio.Task | None = None
+
+_ws_connections = gauge("ws_connections", "Open chat WebSocket connections on this process")
+_ws_users = gauge("ws_connected_users", "Distinct users with a chat WebSocket on this process")
+_ws_users.set_function(lambda: len(_connections))
+_ws_listener_tasks = gauge("ws_listener_tasks", "Running Redis pub/sub listener tasks")
+_ws_listener_tasks.set_function(lambda: int(_listener_task is not None and not _listener_task.done()))
+_ws_messages = counter("ws_messages_total", "Chat messages sent over WebSocket, by outcome", ("outcome",))
+# Cross-host lag also includes clock skew between nodes
+_pubsub_lag_seconds = histogram(
+    "pubsub_delivery_lag_seconds",
+    "Time from publishing a fan-out batch to delivering it on the receiving node",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+def _node_channel(node_id: str) -> str:
+    return f"node:{node_id}:messages"
+
+
+def _register(user_id: str, ws: WebSocket) -> bool:
+    """Add a connection. Returns True if it is the user's first on this node."""
+    first = user_id not in _connections
     _connections.setdefault(user_id, set()).add(ws)
+    return first
 
 
-def _unregister(user_id: str, ws: WebSocket):
+def _unregister(user_id: str, ws: WebSocket) -> bool:
+    """Remove a connection. Returns True if it was the user's last on this node."""
     if user_id in _connections:
         _connections[user_id].discard(ws)
         if not _connections[user_id]:
             del _connections[user_id]
+            return True
+    return False
 
 
 async def _deliver_to_local(user_id: str, payload: str):
@@ -38,24 +73,93 @@ async def _deliver_to_local(user_id: str, payload: str):
             _unregister(user_id, ws)
 
 
-async def _redis_listener(user_id: str):
-    """Listen on a Redis pub/sub channel for messages targeting this user.
-    Delivers to all local WebSocket connections for the user."""
-    pubsub = await subscribe(f"user:{user_id}:messages")
+async def _deliver_batch(deliveries: list[dict]):
+    """Deliver [{"user_ids": [...], "payload": str}, ...] to local connections."""
+    for delivery in deliveries:
+        for user_id in delivery["user_ids"]:
+            await _deliver_to_local(user_id, delivery["payload"])
+
+
+async def _fan_out(deliveries: list[tuple[list[str], str]]):
+    """Deliver payloads to users wherever they are connected.
+
+    Recipients are grouped by the nodes they are connected to, and each node
+    receives a single publish carrying every delivery for its users. Users
+    on this node are delivered to directly, without a Redis round trip.
+    """
+    user_ids = [uid for ids, _ in deliveries for uid in ids]
+    presence = await get_presence(user_ids)
+    by_node: dict[str, list[dict]] = {}
+    for ids, payload in deliveries:
+        node_users: dict[str, list[str]] = {}
+        for uid in ids:
+            for node_id in presence.get(uid, ()):
+                node_users.setdefault(node_id, []).append(uid)
+        for node_id, uids in node_users.items():
+            by_node.setdefault(node_id, []).append({"user_ids": uids, "payload": payload})
+
+    for node_id, node_deliveries in by_node.items():
+        if node_id == NODE_ID:
+            await _deliver_batch(node_deliveries)
+        else:
+            await publish(_node_channel(node_id), json.dumps({"sent_at": time.time(), "deliveries": node_deliveries}))
+
+
+async def _redis_listener():
+    """Listen on this node's Redis channel and deliver each batch to the local
+    connections it names. Also keeps local users' presence entries fresh."""
+    pubsub = await subscribe(_node_channel(NODE_ID))
+    last_refresh = time.monotonic()
     try:
         while True:
             msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
             if msg and msg["type"] == "message":
-                logger.info("Redis listener received message for user %s", user_id)
-                await _deliver_to_local(user_id, msg["data"])
+                batch = json.loads(msg["data"])
+                await _deliver_batch(batch["deliveries"])
+                if "sent_at" in batch:
+                    _pubsub_lag_seconds.observe(max(time.time() - batch["sent_at"], 0.0))
             else:
                 await asyncio.sleep(0.05)
+            if time.monotonic() - last_refresh >= _PRESENCE_REFRESH_SECONDS:
+                await add_presence(list(_connections), NODE_ID, _PRESENCE_TTL_SECONDS)
+                last_refresh = time.monotonic()
     finally:
-        await pubsub.unsubscribe(f"user:{user_id}:messages")
+        await pubsub.unsubscribe(_node_channel(NODE_ID))
         await pubsub.close()
 
 
-def _authenticate(websocket: WebSocket) -> dict | None:
+def _message_payload(chat_id: str, item: dict) -> str:
+    return json.dumps({
+        "type": "message",
+        "chat_id": chat_id,
+        "message": {
+            "message_id": item["messageId"],
+            "text": item["text"],
+            "from_user_id": item["fromUserId"],
+            "language": item["language"],
+            "timestamp": item["timestamp"],
+            "cursor": item["SK"],
+        },
+    })
+
+
+async def publish_read_receipt(chat_id: str, member_ids: list[str], user_id: str, item: dict):
+    """Tell every member of a chat how far user_id has read; the reader's own tabs also get the unread count."""
+    receipt = {
+        "type": "read",
+        "chat_id": chat_id,
+        "user_id": user_id,
+        "last_read_cursor": item.get("lastReadKey"),
+        "read_at": item.get("lastReadAt"),
+    }
+    others = [uid for uid in member_ids if uid != user_id]
+    deliveries = [([user_id], json.dumps({**receipt, "unread_count": item.get("unreadCount", 0)}))]
+    if others:
+        deliveries.append((others, json.dumps(receipt)))
+    await _fan_out(deliveries)
+
+
+async def _authenticate(websocket: WebSocket) -> dict | None:
     """Validate JWT from query param and return user dict, or None."""
     token = websocket.query_params.get("token")
     if not token:
@@ -65,30 +169,40 @@ def _authenticate(websocket: WebSocket) -> dict | None:
         user_id = payload.get("sub")
         if not user_id:
             return None
-        user = get_user_by_id(user_id)
-        if user:
-            user.pop("passwordHash", None)
-        return user
+        return await load_profile(user_id)
     except Exception:
         return None
 
 
+async def _member_chat_meta(chat_id: str | None, user_id: str) -> dict | None:
+    """The chat's metadata if user_id is a member of it, read in the executor (boto3 blocks)."""
+    if not chat_id:
+        return None
+    chat_meta = await asyncio.get_running_loop().run_in_executor(None, get_chat_meta, chat_id)
+    if not chat_meta or user_id not in chat_meta.get("memberUserIds", []):
+        return None
+    return chat_meta
+
+
 @router.websocket("/chat")
 async def chat_websocket(websocket: WebSocket):
+    global _listener_task
     # Accept first, then authenticate (WebSocket lifecycle requires accept before close)
     await websocket.accept()
 
-    user = _authenticate(websocket)
+    user = await _authenticate(websocket)
     if not user:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
     user_id = user["userId"]
-    _register(user_id, websocket)
+    _ws_connections.inc()
+    if _register(user_id, websocket):
+        await add_presence([user_id], NODE_ID, _PRESENCE_TTL_SECONDS)
 
-    # Start a single Redis listener per user (shared across tabs)
-    if user_id not in _listener_tasks or _listener_tasks[user_id].done():
-        _listener_tasks[user_id] = asyncio.create_task(_redis_listener(user_id))
+    # Start a single Redis listener per node (shared across users and tabs)
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_redis_listener(), name="chat-node-listener")
 
     try:
         while True:
@@ -100,6 +214,32 @@ async def chat_websocket(websocket: WebSocket):
                 continue
 
             chat_id = data.get("chat_id")
+
+            # Hint that the user opened a chat: warm the room agent so the first push-to-talk is fast
+            if data.get("type") == "open_chat":
+                if await _member_chat_meta(chat_id, user_id):
+                    try:
+                        await ensure_pipeline_for_room(room_name_for_chat(chat_id), chat_id)
+                    except Exception:
+                        logger.warning("Failed to warm voice agent for chat %s", chat_id, exc_info=True)
+                continue
+
+            if data.get("type") == "mark_read":
+                chat_meta = await _member_chat_meta(chat_id, user_id)
+                if not chat_meta:
+                    await websocket.send_text(json.dumps({"error": "Not a member of this chat"}))
+                    continue
+                try:
+                    item = await asyncio.get_running_loop().run_in_executor(
+                        None, mark_read, user_id, chat_id, data.get("cursor") or "",
+                    )
+                except ValueError:
+                    await websocket.send_text(json.dumps({"error": "Invalid cursor"}))
+                    continue
+                if item is not None:
+                    await publish_read_receipt(chat_id, chat_meta["memberUserIds"], user_id, item)
+                continue
+
             text = data.get("text", "").strip()
 
             if not chat_id or not text:
@@ -107,72 +247,52 @@ async def chat_websocket(websocket: WebSocket):
                 continue
 
             # Verify membership
-            chat_meta = get_chat_meta(chat_id)
-            if not chat_meta or user_id not in chat_meta.get("memberUserIds", []):
+            chat_meta = await _member_chat_meta(chat_id, user_id)
+            if not chat_meta:
                 await websocket.send_text(json.dumps({"error": "Not a member of this chat"}))
                 continue
 
-            # Identify the other user
-            other_user_id = next(
-                (uid for uid in chat_meta["memberUserIds"] if uid != user_id),
-                None,
-            )
-            if not other_user_id:
-                continue
-
-            other_user = get_user_by_id(other_user_id)
-            if not other_user:
+            # Identify the other members (one batched, cached profile lookup)
+            other_ids = [uid for uid in chat_meta["memberUserIds"] if uid != user_id]
+            recipients = list((await load_profiles(other_ids)).values())
+            if not recipients:
                 continue
 
-            # Dual-write message (translate + store) with error handling
+            # Write the message for every member (translate once per language + store) with error handling
             # Run in executor to avoid blocking the event loop with synchronous DynamoDB/OpenAI calls
             try:
                 loop = asyncio.get_event_loop()
-                sender_msg, recipient_msg = await loop.run_in_executor(
-                    None, send_message, chat_id, user, other_user, text
+                sender_msg, recipient_msgs = await loop.run_in_executor(
+                    None, send_message, chat_id, user, recipients, text
                 )
             except Exception:
+                _ws_messages.inc(outcome="error")
                 logger.exception("Failed to send message in chat %s", chat_id)
                 await websocket.send_text(json.dumps({"error": "Failed to send message"}))
                 continue
 
-            # Build payloads from the already-written records
-            sender_payload = json.dumps({
-                "type": "message",
-                "chat_id": chat_id,
-                "message": {
-                    "message_id": sender_msg["messageId"],
-                    "text": sender_msg["text"],
-                    "from_user_id": user_id,
-                    "language": sender_msg["language"],
-                    "timestamp": sender_msg["timestamp"],
-                },
-            })
-
-            recipient_payload = json.dumps({
-                "type": "message",
-                "chat_id": chat_id,
-                "message": {
-                    "message_id": recipient_msg["messageId"],
-                    "text": recipient_msg["text"],
-                    "from_user_id": user_id,
-                    "language": recipient_msg["language"],
-                    "timestamp": recipient_msg["timestamp"],
-                },
-            })
-
-            # Deliver to sender via local connection
-            logger.info("Delivering message to sender %s locally", user_id)
-            await _deliver_to_local(user_id, sender_payload)
-
-            # Deliver to recipient via Redis pub/sub (works across instances)
-            logger.info("Publishing message to recipient %s via Redis", other_user_id)
-            await publish(f"user:{other_user_id}:messages", recipient_payload)
+            # Recipients sharing a language get byte-identical payloads, so serialize once per language
+            by_language: dict[str, list[str]] = {}
+            for rid, item in recipient_msgs.items():
+                by_language.setdefault(item["language"], []).append(rid)
+            deliveries = [([user_id], _message_payload(chat_id, sender_msg))]
+            deliveries.extend(
+                (rids, _message_payload(chat_id, recipient_msgs[rids[0]]))
+                for rids in by_language.values()
+            )
+
+            # Deliver to the sender's tabs and every recipient, one publish per node
+            logger.debug("Fanning out message in chat %s to %d recipients", chat_id, len(recipient_msgs))
+            await _fan_out(deliveries)
+            _ws_messages.inc(outcome="sent")
 
     except WebSocketDisconnect:
         pass
     finally:
-        _unregister(user_id, websocket)
-        # Only cancel the Redis listener when the last connection for this user disconnects
-        if user_id not in _connections and user_id in _listener_tasks:
-            _listener_tasks.pop(user_id).cancel()
+        _ws_connections.dec()
+        if _unregister(user_id, websocket):
+            await remove_presence(user_id, NODE_ID)
+        # Only cancel the Redis listener when the last connection on this node disconnects
+        if not _connections and _listener_task is not None:
+            _listener_task.cancel()
+            _listener_task = None
@@ -10,6 +10,7 @@ class Settings(BaseSettings):
     # OpenAI
     openai_api_key: str = ""
     openai_translation_model: str = "gpt-4o-mini"
+    translation_max_concurrency: int = 8
 
     # LiveKit
     livekit_api_key: str = "devkey"
@@ -20,21 +21,101 @@ class Settings(BaseSettings):
     elevenlabs_api_key: str = ""
     elevenlabs_tts_voice_id: str = "Xb7hH8MSUJpSbSDYk0k2"
     elevenlabs_tts_model: str = "eleven_flash_v2_5"
+    # Base of the realtime STT and stream-input TTS WebSocket URLs
+    elevenlabs_ws_url: str = "wss://api.elevenlabs.io"
+
+    # Voice pipeline
+    voice_phrase_min_chars: int = 40
+    voice_tts_frame_ms: int = 20
+    voice_tts_queue_ms: int = 200
+    voice_vad_enabled: bool = True
+    voice_vad_energy_threshold_db: float = -45.0
+    voice_vad_zcr_threshold: float = 0.3
+    voice_vad_preroll_ms: int = 200
+    voice_vad_hangover_ms: int = 400
+    voice_vad_min_speech_ms: int = 60
+    voice_lease_ttl_seconds: int = 15
+    voice_scheduler_interval_seconds: float = 5.0
+    # False when room agents run in dedicated processes (python -m app.voice.runner)
+    voice_run_agents: bool = True
+    voice_agent_workers: int = 0
+    voice_agent_idle_seconds: int = 120
+    # Log one JSON trace line per walkie-talkie turn (logger app.voice.trace)
+    voice_turn_trace_log: bool = False
+
+    # TTS audio cache
+    tts_cache_enabled: bool = True
+    tts_cache_dir: str = "/tmp/commonality-tts-cache"
+    tts_cache_max_bytes: int = 256 * 1024 * 1024
+    # Phrases up to this long are looked up in and stored to the cache
+    tts_cache_max_chars: int = 80
+    tts_cache_redis: bool = False
+    tts_cache_redis_ttl_seconds: int = 7 * 24 * 3600
 
     # DynamoDB
     dynamodb_endpoint: str = "http://dynamodb-local:8000"
     aws_region: str = "us-east-1"
     aws_access_key_id: str = "local"
     aws_secret_access_key: str = "local"
+    # Create missing tables at startup; turn off where tables are provisioned separately
+    dynamodb_create_tables: bool = True
+    profile_cache_ttl_seconds: int = 300
+    profile_cache_max_entries: int = 10000
+    # Per-user change feed behind GET /api/sync; older tokens get a reset
+    sync_log_ttl_seconds: int = 30 * 24 * 3600
+    # Sync tokens trail the present by this much, so changes written slightly out of order are not skipped
+    sync_settle_seconds: float = 5.0
+    # Inbox previews are coalesced per user and chat and written at most this often; 0 writes them immediately
+    preview_flush_interval_seconds: float = 1.0
+    # Messages fetched per query by the NDJSON history export
+    export_page_size: int = 500
+    # Messages older than this many days are compacted into per-day blocks
+    history_hot_days: int = 30
+    # False when compaction runs elsewhere (python -m app.chat.compaction from a scheduled job)
+    history_compaction_enabled: bool = True
+    # Seconds between compaction passes run by the API (one worker at a time); 0 disables them
+    history_compaction_interval_seconds: float = 6 * 3600
+
+    # Search: index every stored message copy in Redis for GET /api/search
+    search_enabled: bool = True
 
     # Redis
     redis_url: str = "redis://redis:6379/0"
+    # Per client; commands wait up to the timeout for a free connection when all are busy
+    redis_max_connections: int = 100
+    redis_pool_timeout_seconds: float = 5.0
 
     # Auth
     jwt_secret: str = "change-me-in-production"
     jwt_algorithm: str = "HS256"
     jwt_expiration_minutes: int = 1440
     password_min_length: int = 8
+    # Comma-separated usernames allowed to use admin endpoints
+    admin_usernames: str = ""
+
+    # Observability
+    metrics_enabled: bool = True
+    # When set, GET /api/metrics requires "Authorization: Bearer <metrics_token>"
+    metrics_token: str = ""
+    metrics_push_interval_seconds: float = 10.0
+    loop_lag_sample_interval_seconds: float = 0.5
+    # Log the stack of any code blocking the event loop longer than the threshold
+    loop_block_detector_enabled: bool = False
+    loop_block_threshold_ms: int = 100
+    # Admin-only /api/debug profiling endpoints
+    profiling_enabled: bool = False
+    profiling_max_seconds: float = 60.0
+
+    # Logging (written to stdout by a background thread)
+    log_level: str = "INFO"
+    # "json" for one structured object per line, "text" for human-readable output
+    log_format: str = "json"
+    # Comma-separated logger=rate pairs keeping a fraction of DEBUG/INFO records, e.g. "uvicorn.access=0.1"
+    log_sample_rates: str = ""
+    # Per log call site (logger, file and line), below WARNING only; 0 disables rate limiting
+    log_rate_limit_per_second: float = 20.0
+    # Records beyond this many pending writes are dropped rather than blocking
+    log_queue_size: int = 10000
 
     # Server
     backend_port: int = 8080
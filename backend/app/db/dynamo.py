@@ -1,4 +1,5 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from botocore.exceptions import ClientError
 
@@ -83,21 +84,59 @@ TABLE_DEFINITIONS = [
             "WriteCapacityUnits": 5,
         },
     },
+    {
+        # Per-user change feed: PK=USER#<id>, SK=CHG#<written at>#<id>
+        "TableName": "sync_log",
+        "KeySchema": [
+            {"AttributeName": "PK", "KeyType": "HASH"},
+            {"AttributeName": "SK", "KeyType": "RANGE"},
+        ],
+        "AttributeDefinitions": [
+            {"AttributeName": "PK", "AttributeType": "S"},
+            {"AttributeName": "SK", "AttributeType": "S"},
+        ],
+        "ProvisionedThroughput": {
+            "ReadCapacityUnits": 5,
+            "WriteCapacityUnits": 5,
+        },
+    },
 ]
 
+# Tables whose items expire: table name -> epoch-seconds attribute
+TTL_ATTRIBUTES = {"sync_log": "expiresAt"}
+
+
+def _ensure_table(client, table_def: dict):
+    table_name = table_def["TableName"]
+    try:
+        client.describe_table(TableName=table_name)
+        logger.debug("DynamoDB table already exists: %s", table_name)
+        return
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ResourceNotFoundException":
+            raise
+    try:
+        client.create_table(**table_def)
+        logger.info("Created DynamoDB table: %s", table_name)
+    except ClientError as e:
+        # Another worker created it between our describe and create
+        if e.response["Error"]["Code"] != "ResourceInUseException":
+            raise
+        return
+    if table_name in TTL_ATTRIBUTES:
+        client.update_time_to_live(
+            TableName=table_name,
+            TimeToLiveSpecification={"Enabled": True, "AttributeName": TTL_ATTRIBUTES[table_name]},
+        )
+
 
 def create_tables():
-    """Create DynamoDB tables if they don't exist. Called on startup."""
-    dynamo = get_dynamo_client()
-    client = dynamo.meta.client
+    """Create any missing DynamoDB tables. Called on startup unless settings.dynamodb_create_tables is off.
 
-    for table_def in TABLE_DEFINITIONS:
-        table_name = table_def["TableName"]
-        try:
-            client.create_table(**table_def)
-            logger.info("Created DynamoDB table: %s", table_name)
-        except ClientError as e:
-            if e.response["Error"]["Code"] == "ResourceInUseException":
-                logger.info("DynamoDB table already exists: %s", table_name)
-            else:
-                raise
+    All tables are checked concurrently, so startup waits for one round trip
+    rather than one per table.
+    """
+    client = get_dynamo_client().meta.client
+    with ThreadPoolExecutor(max_workers=len(TABLE_DEFINITIONS), thread_name_prefix="create-tables") as pool:
+        # list() re-raises the first failure
+        list(pool.map(lambda table_def: _ensure_table(client, table_def), TABLE_DEFINITIONS))
@@ -19,6 +19,41 @@ async def subscribe(channel: str):
     return pubsub
 
 
+def _presence_key(user_id: str) -> str:
+    return f"presence:{user_id}"
+
+
+async def add_presence(user_ids: list[str], node_id: str, ttl_seconds: int):
+    """Record (or refresh) that users have WebSocket connections on a node.
+    The TTL bounds how long entries from a crashed node linger."""
+    if not user_ids:
+        return
+    client = await get_redis_client()
+    async with client.pipeline(transaction=False) as pipe:
+        for user_id in user_ids:
+            pipe.sadd(_presence_key(user_id), node_id)
+            pipe.expire(_presence_key(user_id), ttl_seconds)
+        await pipe.execute()
+
+
+async def remove_presence(user_id: str, node_id: str):
+    """Remove a node from a user's presence set."""
+    client = await get_redis_client()
+    await client.srem(_presence_key(user_id), node_id)
+
+
+async def get_presence(user_ids: list[str]) -> dict[str, set[str]]:
+    """Return {user_id: node_ids} for the given users in one round trip."""
+    if not user_ids:
+        return {}
+    client = await get_redis_client()
+    async with client.pipeline(transaction=False) as pipe:
+        for user_id in user_ids:
+            pipe.smembers(_presence_key(user_id))
+        results = await pipe.execute()
+    return dict(zip(user_ids, results))
+
+
 async def ping() -> bool:
     """Check Redis connectivity."""
     try:
@@ -1,10 +1,13 @@
 import boto3
+import redis as sync_redis
 import redis.asyncio as redis
 
 from app.config import settings
 
 _dynamo_client = None
 _redis_client = None
+_redis_binary_client = None
+_redis_sync_client = None
 
 
 def get_dynamo_client():
@@ -17,18 +20,60 @@ def get_dynamo_client():
             aws_access_key_id=settings.aws_access_key_id,
             aws_secret_access_key=settings.aws_secret_access_key,
         )
+        if settings.metrics_enabled:
+            # Imported here: the metrics module itself depends on this one for Redis
+            from app.observability.dynamo import instrument_client
+            instrument_client(_dynamo_client.meta.client)
     return _dynamo_client
 
 
 async def get_redis_client() -> redis.Redis:
     global _redis_client
     if _redis_client is None:
-        _redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+        # Blocking pool: bursts beyond max_connections wait for a free connection instead of failing
+        _redis_client = redis.Redis.from_pool(redis.BlockingConnectionPool.from_url(
+            settings.redis_url,
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout_seconds,
+            decode_responses=True,
+        ))
     return _redis_client
 
 
+async def get_redis_binary_client() -> redis.Redis:
+    """Redis client returning raw bytes, for binary payloads such as audio."""
+    global _redis_binary_client
+    if _redis_binary_client is None:
+        _redis_binary_client = redis.Redis.from_pool(redis.BlockingConnectionPool.from_url(
+            settings.redis_url,
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout_seconds,
+            decode_responses=False,
+        ))
+    return _redis_binary_client
+
+
+def get_redis_sync_client() -> sync_redis.Redis:
+    """Blocking Redis client, for synchronous code that runs in executor threads."""
+    global _redis_sync_client
+    if _redis_sync_client is None:
+        _redis_sync_client = sync_redis.Redis.from_pool(sync_redis.BlockingConnectionPool.from_url(
+            settings.redis_url,
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout_seconds,
+            decode_responses=True,
+        ))
+    return _redis_sync_client
+
+
 async def close_redis():
-    global _redis_client
+    global _redis_client, _redis_binary_client, _redis_sync_client
     if _redis_client is not None:
         await _redis_client.close()
         _redis_client = None
+    if _redis_binary_client is not None:
+        await _redis_binary_client.close()
+        _redis_binary_client = None
+    if _redis_sync_client is not None:
+        _redis_sync_client.close()
+        _redis_sync_client = None
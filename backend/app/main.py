@@ -1,28 +1,56 @@
-import logging
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
+from app.observability.logs import configure_logging
 
-# Configure root logger so app.* loggers emit INFO and above
-logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s: %(message)s")
+# Route app.* and uvicorn loggers through the background log writer
+configure_logging()
 from app.db.dynamo import create_tables
 from app.dependencies import close_redis, get_redis_client
 from app.auth.router import router as auth_router
-from app.chat.router import router as chat_router
+from app.chat.compaction import start_compactor, stop_compactor
+from app.chat.previews import start_flusher, stop_flusher
+from app.chat.router import router as chat_router, sync_router
 from app.chat.websocket import router as chat_ws_router
+from app.observability import metrics
+from app.observability.http import MetricsMiddleware
+from app.observability.loop import TaskLabelMiddleware, start_loop_monitor, stop_loop_monitor
+from app.observability.router import router as observability_router
+from app.search.router import router as search_router
 from app.voice.router import router as voice_router
+from app.voice.service import room_scheduler
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    create_tables()
+    if settings.dynamodb_create_tables:
+        await asyncio.to_thread(create_tables)
     await get_redis_client()
+    if settings.metrics_enabled:
+        metrics.install_default_executor(asyncio.get_running_loop())
+        await metrics.start_publisher()
+        await start_loop_monitor()
+    if settings.voice_run_agents:
+        await room_scheduler.start()
+    if settings.history_compaction_enabled:
+        await start_compactor()
+    await start_flusher()
     yield
     # Shutdown
+    if settings.history_compaction_enabled:
+        await stop_compactor()
+    # Before Redis closes and while DynamoDB is reachable: write buffered inbox previews
+    await stop_flusher()
+    if settings.metrics_enabled:
+        await stop_loop_monitor()
+        await metrics.stop_publisher()
+    if settings.voice_run_agents:
+        await room_scheduler.stop()
     await close_redis()
 
 
@@ -35,11 +63,19 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.loop_block_detector_enabled:
+    app.add_middleware(TaskLabelMiddleware)
+if settings.metrics_enabled:
+    # Added last so it is outermost and times the whole middleware stack
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth_router, prefix="/api/auth", tags=["auth"])
 app.include_router(chat_router, prefix="/api/chats", tags=["chat"])
+app.include_router(sync_router, prefix="/api/sync", tags=["chat"])
+app.include_router(search_router, prefix="/api/search", tags=["search"])
 app.include_router(chat_ws_router, prefix="/api/ws", tags=["chat-ws"])
 app.include_router(voice_router, prefix="/api/voice", tags=["voice"])
+app.include_router(observability_router, prefix="/api", tags=["observability"])
 
 
 @app.get("/api/health")
@@ -0,0 +1,83 @@
+"""DynamoDB latency and consumed-capacity metrics via botocore event hooks.
+
+Every call made through the shared boto3 resource is timed per operation
+and table, and ReturnConsumedCapacity is requested so the consumed
+read/write units can be counted too. The hooks do a dict lookup and a
+histogram update per call, which is negligible next to the network round
+trip.
+"""
+import time
+
+from app.observability.metrics import counter, histogram
+
+_call_seconds = histogram(
+    "dynamodb_call_duration_seconds",
+    "DynamoDB call latency, including botocore retries",
+    ("operation", "table"),
+)
+_call_errors = counter("dynamodb_call_errors_total", "Failed DynamoDB calls", ("operation", "table", "code"))
+_consumed_capacity = counter(
+    "dynamodb_consumed_capacity_units_total",
+    "Capacity units consumed by DynamoDB calls",
+    ("operation", "table"),
+)
+
+# Operations that accept ReturnConsumedCapacity
+_CAPACITY_OPERATIONS = {
+    "GetItem", "PutItem", "UpdateItem", "DeleteItem", "Query", "Scan",
+    "BatchGetItem", "BatchWriteItem", "TransactGetItems", "TransactWriteItems",
+}
+_CONTEXT_KEY = "commonality_metrics_start"
+
+
+def _table_label(params: dict) -> str:
+    if "TableName" in params:
+        return params["TableName"]
+    if "RequestItems" in params:
+        return ",".join(sorted(params["RequestItems"]))
+    if "TransactItems" in params:
+        tables = {next(iter(action.values())).get("TableName", "") for action in params["TransactItems"]}
+        return ",".join(sorted(tables))
+    return ""
+
+
+def _before_parameter_build(params, model, context, **kwargs):
+    if model.name in _CAPACITY_OPERATIONS:
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+    context[_CONTEXT_KEY] = (time.perf_counter(), model.name, _table_label(params))
+
+
+def _after_call(parsed, context, **kwargs):
+    started = context.pop(_CONTEXT_KEY, None)
+    if started is None:
+        return
+    start, operation, table = started
+    _call_seconds.observe(time.perf_counter() - start, operation=operation, table=table)
+    if "Error" in parsed:
+        _call_errors.inc(operation=operation, table=table, code=parsed["Error"].get("Code", "Unknown"))
+        return
+    capacity = parsed.get("ConsumedCapacity")
+    if capacity is None:
+        return
+    for entry in capacity if isinstance(capacity, list) else [capacity]:
+        units = entry.get("CapacityUnits")
+        if units:
+            _consumed_capacity.inc(units, operation=operation, table=entry.get("TableName", table))
+
+
+def _after_call_error(exception, context, **kwargs):
+    """Connection-level failures (after retries), which never reach after-call."""
+    started = context.pop(_CONTEXT_KEY, None)
+    if started is None:
+        return
+    start, operation, table = started
+    _call_seconds.observe(time.perf_counter() - start, operation=operation, table=table)
+    _call_errors.inc(operation=operation, table=table, code=type(exception).__name__)
+
+
+def instrument_client(client):
+    """Register the metrics hooks on a botocore DynamoDB client."""
+    events = client.meta.events
+    events.register("before-parameter-build.dynamodb.*", _before_parameter_build)
+    events.register("after-call.dynamodb.*", _after_call)
+    events.register("after-call-error.dynamodb.*", _after_call_error)
@@ -0,0 +1,60 @@
+"""Request latency metrics for HTTP routes."""
+import time
+
+from app.observability.metrics import histogram
+
+_request_seconds = histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by router",
+    ("router", "method", "status"),
+)
+
+
+def _router_label(path: str) -> str:
+    parts = path.split("/", 3)
+    if len(parts) > 2 and parts[1] == "api" and parts[2]:
+        return parts[2]
+    return "other"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing each HTTP request.
+
+    Requests are labelled with the router they were served by: the first
+    path segment under /api (e.g. "chats" for /api/chats/{id}/messages),
+    and only for requests that matched a route, so label cardinality stays
+    fixed regardless of path parameters or scanners probing random URLs.
+    WebSocket traffic passes through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the (shared) scope
+            if scope.get("route") is None:
+                router = "unmatched"
+            else:
+                router = _router_label(scope["path"])
+            _request_seconds.observe(
+                time.perf_counter() - start,
+                router=router,
+                method=scope["method"],
+                status=f"{status_code // 100}xx",
+            )
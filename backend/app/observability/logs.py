@@ -0,0 +1,239 @@
+"""Process logging setup: queue-based, structured and rate limited.
+
+configure_logging() puts a single QueueHandler on the root logger. Records
+are filtered (per-logger sampling and a per-call-site rate limit) and their
+message is rendered on the calling thread, then a QueueListener thread
+formats them as JSON (or plain text) and writes them to stdout, so stream
+I/O never runs on the event loop. When the queue is full, records are
+dropped instead of blocking the caller; drops are counted in
+log_records_dropped_total.
+
+Pass expensive log arguments through lazy_json() so they are only
+serialized for records that are actually emitted.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.observability.metrics import PROCESS_ID, counter
+
+_dropped_total = counter(
+    "log_records_dropped_total",
+    "Log records discarded before output, by logger and reason",
+    ("logger", "reason"),
+)
+
+_TEXT_FORMAT = "%(levelname)s:%(name)s: %(message)s"
+# Loggers configured by uvicorn with their own stream handlers; routed through the queue instead
+_UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+# Attributes every LogRecord has; anything else was passed with extra= and is output as a field
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: logging.handlers.QueueHandler | None = None
+
+
+class _LazyJSON:
+    __slots__ = ("obj", "limit")
+
+    def __init__(self, obj, limit: int | None):
+        self.obj = obj
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = json.dumps(self.obj, default=str)
+        return text[: self.limit] if self.limit else text
+
+
+def lazy_json(obj, limit: int | None = None) -> _LazyJSON:
+    """Log argument that serializes obj (truncated to limit chars) only when the record is emitted."""
+    return _LazyJSON(obj, limit)
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    """Parse "logger=rate,..." into {logger: rate}, with rates clamped to [0, 1]."""
+    rates = {}
+    for part in spec.split(","):
+        name, sep, rate = part.partition("=")
+        if not sep or not name.strip():
+            continue
+        rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records below WARNING from the configured loggers.
+
+    A rate set for a logger also applies to its children
+    (``app.voice`` covers ``app.voice.service``).
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        _dropped_total.inc(logger=record.name, reason="sampled")
+        return False
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per call site (logger, file, line), refilled at per_second.
+
+    Repeats of one log call below WARNING beyond the budget are dropped; the
+    next record let through carries a ``suppressed`` count of what was
+    dropped. Warnings and errors always pass. At most max_buckets call sites
+    are tracked, the least recently used being forgotten first.
+    """
+
+    def __init__(
+        self, per_second: float, burst: float | None = None, clock=time.monotonic, max_buckets: int = 4096,
+    ):
+        super().__init__()
+        self.per_second = per_second
+        self.burst = burst or max(per_second, 1.0)
+        self.max_buckets = max_buckets
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (logger, pathname, lineno) -> [tokens, last refill, suppressed since last emitted]
+        self._buckets: OrderedDict[tuple[str, str, int], list] = OrderedDict()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now, 0]
+                if len(self._buckets) > self.max_buckets:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.per_second)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                _dropped_total.inc(logger=record.name, reason="rate_limited")
+                return False
+            bucket[0] -= 1.0
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message and any extra= fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": PROCESS_ID,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render only the message here (arguments may change after the call);
+        # JSON/text formatting happens on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped_total.inc(logger=record.name, reason="queue_full")
+
+
+def configure_logging():
+    """Route all logging through a background writer thread (idempotent)."""
+    global _listener, _queue_handler
+    stop_logging()
+
+    stream = logging.StreamHandler(sys.stdout)
+    if settings.log_format == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(_TEXT_FORMAT))
+
+    _queue_handler = _NonBlockingQueueHandler(queue.Queue(maxsize=settings.log_queue_size))
+    rates = parse_sample_rates(settings.log_sample_rates)
+    if rates:
+        _queue_handler.addFilter(SamplingFilter(rates))
+    if settings.log_rate_limit_per_second > 0:
+        _queue_handler.addFilter(RateLimitFilter(settings.log_rate_limit_per_second))
+
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(settings.log_level.upper())
+    for name in _UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+atexit.register(stop_logging)
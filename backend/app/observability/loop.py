@@ -0,0 +1,139 @@
+"""Event-loop lag sampling and blocking-call detection.
+
+The lag sampler sleeps for a fixed interval and records how late it woke up
+in event_loop_lag_seconds; any synchronous work on the loop (boto3, argon2,
+the sync OpenAI client) shows up there as lag.
+
+The opt-in block detector (settings.loop_block_detector_enabled) adds a
+heartbeat callback on the loop and a watchdog thread. When the heartbeat is
+late by more than settings.loop_block_threshold_ms, the watchdog captures the
+loop thread's current stack, i.e. the code that is blocking it, and logs it
+together with the running task's name. TaskLabelMiddleware names request
+tasks after their method and path so stalls are attributed to a route.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from app.config import settings
+from app.observability.metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+_lag_seconds = histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a timer scheduled to fire on time",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+_blocks_total = counter("event_loop_blocks_total", "Loop stalls longer than the block threshold")
+
+
+class LoopMonitor:
+    def __init__(self, interval_seconds: float, block_threshold_ms: int | None = None):
+        self.interval_seconds = interval_seconds
+        self.block_threshold = block_threshold_ms / 1000.0 if block_threshold_ms else None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._sampler: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._heartbeat: asyncio.TimerHandle | None = None
+        self._last_beat = 0.0
+        self._reported_beat = 0.0
+        self._loop_thread_id = 0
+
+    @property
+    def _beat_interval(self) -> float:
+        return max(self.block_threshold / 4, 0.01)
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._sampler = asyncio.create_task(self._sample(), name="loop-lag-sampler")
+        if self.block_threshold:
+            self._loop_thread_id = threading.get_ident()
+            self._stopped.clear()
+            self._beat()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-block-watchdog", daemon=True)
+            self._watchdog.start()
+            logger.info("Event loop block detector enabled (threshold %.0f ms)", self.block_threshold * 1000)
+
+    async def stop(self):
+        if self._sampler is not None:
+            self._sampler.cancel()
+            await asyncio.gather(self._sampler, return_exceptions=True)
+            self._sampler = None
+        if self._watchdog is not None:
+            self._stopped.set()
+            if self._heartbeat is not None:
+                self._heartbeat.cancel()
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval_seconds)
+            _lag_seconds.observe(max(loop.time() - start - self.interval_seconds, 0.0))
+
+    def _beat(self):
+        self._last_beat = time.monotonic()
+        self._heartbeat = self._loop.call_later(self._beat_interval, self._beat)
+
+    def _watch(self):
+        while not self._stopped.wait(self._beat_interval):
+            last_beat = self._last_beat
+            stalled = time.monotonic() - last_beat - self._beat_interval
+            if stalled > self.block_threshold and last_beat != self._reported_beat:
+                # Report each stall once, with the stack captured while it is still blocking
+                self._reported_beat = last_beat
+                self._report(stalled)
+
+    def _report(self, stalled: float):
+        _blocks_total.inc()
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "(stack unavailable)\n"
+        try:
+            task = asyncio.current_task(self._loop)
+        except Exception:
+            task = None
+        task_name = task.get_name() if task is not None else "(callback outside a task)"
+        logger.warning(
+            "Event loop blocked for more than %.0f ms in %s; loop thread stack:\n%s",
+            stalled * 1000, task_name, stack,
+        )
+
+
+class TaskLabelMiddleware:
+    """Name each request's task after its method and path, for block-detector reports."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            task = asyncio.current_task()
+            if task is not None:
+                method = scope.get("method", "WS")
+                task.set_name(f"{method} {scope['path']}")
+        await self.app(scope, receive, send)
+
+
+_monitor: LoopMonitor | None = None
+
+
+async def start_loop_monitor():
+    global _monitor
+    if _monitor is None:
+        threshold = settings.loop_block_threshold_ms if settings.loop_block_detector_enabled else None
+        _monitor = LoopMonitor(settings.loop_lag_sample_interval_seconds, threshold)
+        await _monitor.start()
+
+
+async def stop_loop_monitor():
+    global _monitor
+    if _monitor is not None:
+        await _monitor.stop()
+        _monitor = None
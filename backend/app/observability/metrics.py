@@ -0,0 +1,352 @@
+"""In-process metrics with Prometheus text exposition.
+
+Counters, gauges and histograms live in a process-wide registry. Each
+process periodically writes a JSON snapshot of its registry to Redis, and
+GET /api/metrics merges the snapshots of every live process, so room agents
+running in separate runner processes are reported alongside the API.
+Counters and histograms are summed across processes; gauges are reported
+per process with a ``process`` label.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import socket
+import threading
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import settings
+from app.dependencies import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+_SNAPSHOT_PREFIX = "metrics:process:"
+
+# Latency buckets in seconds, from sub-millisecond work up to slow network round trips
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self) -> dict:
+        return {"type": self.type, "help": self.help, "labelnames": list(self.labelnames), "series": self._series()}
+
+    def _series(self) -> list:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _series(self) -> list:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be computed at collection time."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._functions: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels: str):
+        """Compute the value for these labels on each collection instead of storing it."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def _series(self) -> list:
+        with self._lock:
+            series = dict(self._values)
+            functions = list(self._functions.items())
+        for key, function in functions:
+            try:
+                series[key] = float(function())
+            except Exception:
+                logger.warning("Gauge %s callback failed", self.name, exc_info=True)
+        return [[list(key), value] for key, value in series.items()]
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (non-cumulative, plus +Inf), sum]
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def snapshot(self) -> dict:
+        snap = super().snapshot()
+        snap["buckets"] = list(self.buckets)
+        return snap
+
+    def _series(self) -> list:
+        with self._lock:
+            return [[list(key), {"counts": list(counts), "sum": total}] for key, (counts, total) in self._values.items()]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.type}")
+            return metric
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    """Return the process-wide counter called name, creating it on first use."""
+    return REGISTRY._register(Counter, name, help, labelnames)
+
+
+def gauge(name: str, help: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+    """Return the process-wide gauge called name, creating it on first use."""
+    return REGISTRY._register(Gauge, name, help, labelnames)
+
+
+def histogram(
+    name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """Return the process-wide histogram called name, creating it on first use."""
+    return REGISTRY._register(Histogram, name, help, labelnames, buckets)
+
+
+_executor_queue_depth = gauge(
+    "executor_queue_depth", "Jobs waiting for a free thread in an executor", ("executor",),
+)
+
+
+def track_executor(name: str, executor: ThreadPoolExecutor):
+    """Report the executor's backlog as executor_queue_depth{executor=name}."""
+    _executor_queue_depth.set_function(executor._work_queue.qsize, executor=name)
+
+
+def install_default_executor(loop: asyncio.AbstractEventLoop):
+    """Give the loop an explicit default executor so run_in_executor(None, ...) backlog is measurable."""
+    executor = ThreadPoolExecutor(thread_name_prefix="asyncio")
+    loop.set_default_executor(executor)
+    track_executor("default", executor)
+
+
+def merge_snapshots(snapshots: dict[str, dict]) -> dict:
+    """Combine {process_id: snapshot} into one snapshot.
+
+    Counters and histograms with the same labels are summed; gauges gain a
+    ``process`` label so per-process values stay distinguishable.
+    """
+    merged: dict[str, dict] = {}
+    for process_id, snapshot in snapshots.items():
+        for name, metric in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = {
+                    "type": metric["type"],
+                    "help": metric["help"],
+                    "labelnames": list(metric["labelnames"]),
+                    "series": {},
+                }
+                if metric["type"] == "gauge":
+                    target["labelnames"].append("process")
+                if "buckets" in metric:
+                    target["buckets"] = metric["buckets"]
+            elif target["type"] != metric["type"] or target.get("buckets") != metric.get("buckets"):
+                logger.warning("Skipping incompatible metric %s from %s", name, process_id)
+                continue
+            for labels, value in metric["series"]:
+                if metric["type"] == "gauge":
+                    target["series"][tuple(labels) + (process_id,)] = value
+                elif metric["type"] == "counter":
+                    key = tuple(labels)
+                    target["series"][key] = target["series"].get(key, 0.0) + value
+                else:
+                    key = tuple(labels)
+                    existing = target["series"].get(key)
+                    if existing is None:
+                        target["series"][key] = {"counts": list(value["counts"]), "sum": value["sum"]}
+                    else:
+                        existing["counts"] = [a + b for a, b in zip(existing["counts"], value["counts"])]
+                        existing["sum"] += value["sum"]
+    for metric in merged.values():
+        metric["series"] = [[list(labels), value] for labels, value in metric["series"].items()]
+    return merged
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: list[str], values: list[str], extra: tuple[str, str] | None = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def render_prometheus(snapshot: dict) -> str:
+    """Render a (merged) snapshot in the Prometheus text exposition format."""
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+        for labels, value in metric["series"]:
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(names, labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric["buckets"] + [math.inf], value["counts"]):
+                cumulative += count
+                le = ("le", _format_value(bound))
+                lines.append(f"{name}_bucket{_format_labels(names, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(names, labels)} {_format_value(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(names, labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+async def publish_snapshot():
+    """Write this process's snapshot to Redis, where it expires unless refreshed."""
+    client = await get_redis_client()
+    await client.set(
+        _SNAPSHOT_PREFIX + PROCESS_ID,
+        json.dumps(REGISTRY.snapshot()),
+        ex=max(int(settings.metrics_push_interval_seconds * 3), 1),
+    )
+
+
+async def cluster_snapshot() -> dict:
+    """Merged snapshot of this process and every process that published recently."""
+    snapshots = {PROCESS_ID: REGISTRY.snapshot()}
+    try:
+        client = await get_redis_client()
+        keys = [key async for key in client.scan_iter(match=_SNAPSHOT_PREFIX + "*", count=100)]
+        keys = [key for key in keys if key != _SNAPSHOT_PREFIX + PROCESS_ID]
+        if keys:
+            for key, raw in zip(keys, await client.mget(keys)):
+                if raw:
+                    snapshots[key[len(_SNAPSHOT_PREFIX):]] = json.loads(raw)
+    except Exception:
+        logger.warning("Could not read metrics snapshots of other processes", exc_info=True)
+    return merge_snapshots(snapshots)
+
+
+_publisher_task: asyncio.Task | None = None
+
+
+async def _publish_loop():
+    while True:
+        try:
+            await publish_snapshot()
+        except Exception:
+            logger.warning("Could not publish metrics snapshot", exc_info=True)
+        await asyncio.sleep(settings.metrics_push_interval_seconds)
+
+
+async def start_publisher():
+    global _publisher_task
+    if _publisher_task is None:
+        _publisher_task = asyncio.create_task(_publish_loop())
+
+
+async def stop_publisher():
+    global _publisher_task
+    if _publisher_task is not None:
+        _publisher_task.cancel()
+        await asyncio.gather(_publisher_task, return_exceptions=True)
+        _publisher_task = None
+        try:
+            client = await get_redis_client()
+            await client.delete(_SNAPSHOT_PREFIX + PROCESS_ID)
+        except Exception:
+            pass
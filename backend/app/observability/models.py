@@ -0,0 +1,35 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class ProfileStartRequest(BaseModel):
+    mode: Literal["sampling", "cprofile"] = "sampling"
+    # Capped at settings.profiling_max_seconds
+    seconds: float = Field(default=30.0, gt=0)
+    interval_ms: float = Field(default=10.0, ge=1.0, le=1000.0)
+
+
+class ProfileStartResponse(BaseModel):
+    mode: str
+    seconds: float
+    process_id: str
+
+
+class TracemallocStartRequest(BaseModel):
+    frames: int = Field(default=10, ge=1, le=50)
+
+
+class WorkerStateResponse(BaseModel):
+    process_id: str
+    pid: int
+    rss_bytes: int | None = None
+    threads: int
+    asyncio_tasks: int
+    tasks_by_name: dict[str, int]
+    ws_connections: int
+    ws_connected_users: int
+    local_rooms: list[str]
+    profile_cache_entries: int
+    cpu_profile_running: str | None = None
+    tracemalloc_running: bool
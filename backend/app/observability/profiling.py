@@ -0,0 +1,189 @@
+"""On-demand CPU and memory profiling of the current worker process.
+
+Only one CPU profile runs at a time and every session stops itself after
+settings.profiling_max_seconds, so a forgotten profile cannot keep taxing
+a production worker.
+
+- "sampling" mode: a background thread samples every thread's stack at a
+  fixed interval and aggregates collapsed stacks (flamegraph.pl / speedscope
+  input). Overhead is bounded by the sampling rate and does not depend on
+  how much code runs.
+- "cprofile" mode: deterministic cProfile of the event-loop thread, returned
+  as a pstats file. Exact call counts, but it slows the loop noticeably, so
+  keep sessions short.
+
+Memory growth is tracked with tracemalloc: start tracing, take snapshots,
+and each snapshot is diffed against the previous one.
+"""
+import asyncio
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from app.config import settings
+
+
+class ProfilerBusyError(Exception):
+    """Raised when starting a profile while another one is running."""
+
+
+class ProfilerNotRunningError(Exception):
+    """Raised when stopping or snapshotting a profiler that is not running."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+class StackSampler:
+    """Collects collapsed stacks of all threads from a sampling thread."""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.samples = 0
+        self._stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, str(thread_id)))
+                self._stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+
+class CPUProfiler:
+    """At most one running CPU profile per process, auto-stopped after a deadline."""
+
+    def __init__(self):
+        self.mode: str | None = None
+        self.started_at: float | None = None
+        self._session = None
+        self._timeout: asyncio.TimerHandle | None = None
+        # Output of a session that hit its deadline, kept until collected
+        self._finished: tuple[str, bytes] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._session is not None
+
+    def start(self, mode: str, seconds: float, interval_ms: float = 10.0):
+        """Start profiling; must be called on the event-loop thread."""
+        if self.running:
+            raise ProfilerBusyError(f"A {self.mode} profile is already running")
+        seconds = min(seconds, settings.profiling_max_seconds)
+        if mode == "sampling":
+            session = StackSampler(max(interval_ms, 1.0) / 1000.0)
+            session.start()
+        elif mode == "cprofile":
+            session = cProfile.Profile()
+            session.enable()
+        else:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self._session = session
+        self._finished = None
+        self.mode = mode
+        self.started_at = time.monotonic()
+        self._timeout = asyncio.get_running_loop().call_later(seconds, self._expire)
+
+    def _expire(self):
+        self._finished = self._collect()
+
+    def _collect(self) -> tuple[str, bytes]:
+        session, mode = self._session, self.mode
+        self._session = None
+        self.mode = None
+        if self._timeout is not None:
+            self._timeout.cancel()
+            self._timeout = None
+        if mode == "sampling":
+            return mode, session.stop().encode("utf-8")
+        session.disable()
+        stats = pstats.Stats(session, stream=io.StringIO())
+        return mode, marshal.dumps(stats.stats)
+
+    def stop(self) -> tuple[str, bytes]:
+        """Stop the running profile (or collect one that already timed out).
+        Returns (mode, output): collapsed stacks for sampling, pstats for cprofile."""
+        if self.running:
+            return self._collect()
+        if self._finished is not None:
+            finished, self._finished = self._finished, None
+            return finished
+        raise ProfilerNotRunningError("No profile is running")
+
+
+class MemoryTracer:
+    """tracemalloc sessions with snapshot-to-snapshot diffs."""
+
+    def __init__(self):
+        self._previous: tracemalloc.Snapshot | None = None
+        self._timeout: asyncio.TimerHandle | None = None
+
+    @property
+    def running(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 10):
+        if self.running:
+            raise ProfilerBusyError("tracemalloc is already tracing")
+        tracemalloc.start(frames)
+        self._previous = tracemalloc.take_snapshot()
+        # Tracing makes every allocation slower; never leave it on indefinitely
+        self._timeout = asyncio.get_running_loop().call_later(settings.profiling_max_seconds, self.stop)
+
+    def snapshot_diff(self, limit: int = 30, group_by: str = "traceback") -> str:
+        """Diff a new snapshot against the previous one and return the top entries as text."""
+        if not self.running:
+            raise ProfilerNotRunningError("tracemalloc is not tracing")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        stats = snapshot.compare_to(self._previous, group_by)
+        self._previous = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"traced: current={current / 1024:.1f} KiB peak={peak / 1024:.1f} KiB"]
+        for stat in stats[:limit]:
+            lines.append("")
+            lines.append(str(stat))
+            if group_by == "traceback":
+                lines.extend(f"    {line}" for line in stat.traceback.format())
+        return "\n".join(lines) + "\n"
+
+    def stop(self):
+        if self._timeout is not None:
+            self._timeout.cancel()
+            self._timeout = None
+        self._previous = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+cpu_profiler = CPUProfiler()
+memory_tracer = MemoryTracer()
@@ -0,0 +1,138 @@
+import asyncio
+import hmac
+import os
+import re
+import threading
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import PlainTextResponse
+
+from app.auth.dependencies import get_admin_user
+from app.config import settings
+from app.observability.metrics import PROCESS_ID, cluster_snapshot, render_prometheus
+from app.observability.models import (
+    ProfileStartRequest,
+    ProfileStartResponse,
+    TracemallocStartRequest,
+    WorkerStateResponse,
+)
+from app.observability.profiling import ProfilerBusyError, ProfilerNotRunningError, cpu_profiler, memory_tracer
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(authorization: str | None = Header(default=None)):
+    """Cluster-wide metrics in the Prometheus text exposition format."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metrics are disabled")
+    if settings.metrics_token:
+        expected = f"Bearer {settings.metrics_token}"
+        if not authorization or not hmac.compare_digest(authorization, expected):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+    snapshot = await cluster_snapshot()
+    return PlainTextResponse(render_prometheus(snapshot), media_type="text/plain; version=0.0.4")
+
+
+async def _require_profiling(admin: dict = Depends(get_admin_user)) -> dict:
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is disabled")
+    return admin
+
+
+@router.post("/debug/profile/start", response_model=ProfileStartResponse, status_code=status.HTTP_202_ACCEPTED)
+async def start_cpu_profile(body: ProfileStartRequest, admin: dict = Depends(_require_profiling)):
+    """Start a CPU profile of the worker serving this request. It stops on its own after `seconds`."""
+    seconds = min(body.seconds, settings.profiling_max_seconds)
+    try:
+        cpu_profiler.start(body.mode, seconds, body.interval_ms)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return ProfileStartResponse(mode=body.mode, seconds=seconds, process_id=PROCESS_ID)
+
+
+@router.post("/debug/profile/stop")
+async def stop_cpu_profile(admin: dict = Depends(_require_profiling)):
+    """Stop the CPU profile and download it: collapsed stacks (sampling) or pstats (cprofile)."""
+    try:
+        mode, output = cpu_profiler.stop()
+    except ProfilerNotRunningError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if mode == "sampling":
+        media_type, filename = "text/plain; charset=utf-8", f"profile-{os.getpid()}.collapsed"
+    else:
+        media_type, filename = "application/octet-stream", f"profile-{os.getpid()}.pstats"
+    return Response(
+        content=output,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Process-Id": PROCESS_ID},
+    )
+
+
+@router.post("/debug/tracemalloc/start", status_code=status.HTTP_204_NO_CONTENT)
+async def start_tracemalloc(body: TracemallocStartRequest, admin: dict = Depends(_require_profiling)):
+    """Start tracing allocations; stops on its own after settings.profiling_max_seconds."""
+    try:
+        memory_tracer.start(body.frames)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/debug/tracemalloc/snapshot", response_class=PlainTextResponse)
+async def tracemalloc_snapshot(
+    limit: int = Query(default=30, ge=1, le=500),
+    group_by: str = Query(default="traceback", pattern="^(traceback|filename|lineno)$"),
+    admin: dict = Depends(_require_profiling),
+):
+    """Top allocation changes since the previous snapshot (or since tracing started)."""
+    try:
+        # Snapshotting walks every traced allocation; keep it off the event loop
+        loop = asyncio.get_running_loop()
+        report = await loop.run_in_executor(None, memory_tracer.snapshot_diff, limit, group_by)
+    except ProfilerNotRunningError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return PlainTextResponse(report, headers={"X-Process-Id": PROCESS_ID})
+
+
+@router.post("/debug/tracemalloc/stop", status_code=status.HTTP_204_NO_CONTENT)
+async def stop_tracemalloc(admin: dict = Depends(_require_profiling)):
+    memory_tracer.stop()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+def _rss_bytes() -> int | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+@router.get("/debug/state", response_model=WorkerStateResponse)
+async def get_worker_state(admin: dict = Depends(_require_profiling)):
+    """Sizes of this worker's long-lived in-memory structures, for chasing growth."""
+    from app.auth.profiles import get_profile_loader
+    from app.chat import websocket as chat_ws
+    from app.voice.service import room_scheduler
+
+    tasks_by_name: dict[str, int] = {}
+    for task in asyncio.all_tasks():
+        name = re.sub(r"^Task-\d+$", "Task", task.get_name())
+        tasks_by_name[name] = tasks_by_name.get(name, 0) + 1
+
+    return WorkerStateResponse(
+        process_id=PROCESS_ID,
+        pid=os.getpid(),
+        rss_bytes=_rss_bytes(),
+        threads=threading.active_count(),
+        asyncio_tasks=sum(tasks_by_name.values()),
+        tasks_by_name=dict(sorted(tasks_by_name.items(), key=lambda kv: -kv[1])),
+        ws_connections=sum(len(sockets) for sockets in chat_ws._connections.values()),
+        ws_connected_users=len(chat_ws._connections),
+        local_rooms=room_scheduler.local_rooms,
+        profile_cache_entries=len(get_profile_loader().cache),
+        cpu_profile_running=cpu_profiler.mode,
+        tracemalloc_running=memory_tracer.running,
+    )
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+
+class SearchResult(BaseModel):
+    chat_id: str
+    message_id: str
+    timestamp: str
+    # The message's sort key, usable as a cursor for the messages and export endpoints
+    cursor: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    results: list[SearchResult]
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.auth.dependencies import get_current_user
+from app.search.models import SearchResponse, SearchResult
+from app.search.service import search_messages
+
+router = APIRouter()
+
+
+@router.get("", response_model=SearchResponse)
+async def search_endpoint(
+    q: str = Query(min_length=1, max_length=200),
+    chat_id: str | None = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user),
+):
+    """Messages across the user's chats (or one chat) containing every word of q, best match first."""
+    results = await search_messages(
+        current_user["userId"], q, current_user.get("nativeLanguage", "en"), chat_id, limit,
+    )
+    return SearchResponse(results=[SearchResult(**result) for result in results])
@@ -0,0 +1,129 @@
+"""Per-user inverted index of messages in Redis.
+
+Every stored copy of a message is indexed for the user who owns it, in the
+copy's language, so each user searches the text they actually see. Keys,
+per user:
+
+    search:{user}:t:{term}   ZSET  doc -> BM25 term weight
+    search:{user}:c:{chat}   ZSET  doc -> 0, every doc of a chat (for filtering)
+    search:{user}:docs       counter of indexed docs (for IDF)
+
+A doc is "{chat_id}|{message sort key}", enough to fetch or page to the
+message. Queries match all terms and rank by the sum of IDF-weighted term
+weights, computed by ZINTERSTORE inside Redis, so a search is two round
+trips and never touches DynamoDB.
+"""
+import logging
+import math
+import time
+import uuid
+from collections import Counter
+
+from app.chat.keys import parse_sort_key
+from app.config import settings
+from app.dependencies import get_redis_client, get_redis_sync_client
+from app.observability.metrics import counter, histogram
+from app.search.tokenize import tokenize
+
+logger = logging.getLogger(__name__)
+
+_index_errors = counter("search_index_errors_total", "Messages that could not be added to the search index")
+_query_seconds = histogram("search_query_duration_seconds", "Message search latency")
+
+# BM25 parameters. Chat messages are short and similar in length, so a fixed
+# typical length stands in for the average (no extra round trip per write).
+_K1 = 1.2
+_B = 0.75
+_TYPICAL_TERMS = 10
+
+
+def _term_key(user_id: str, term: str) -> str:
+    return f"search:{user_id}:t:{term}"
+
+
+def _chat_key(user_id: str, chat_id: str) -> str:
+    return f"search:{user_id}:c:{chat_id}"
+
+
+def _docs_key(user_id: str) -> str:
+    return f"search:{user_id}:docs"
+
+
+def _term_weights(text: str, language: str) -> dict[str, float]:
+    terms = tokenize(text, language)
+    norm = _K1 * (1 - _B + _B * len(terms) / _TYPICAL_TERMS)
+    return {term: tf * (_K1 + 1) / (tf + norm) for term, tf in Counter(terms).items()}
+
+
+def index_messages(chat_id: str, copies: dict[str, dict]):
+    """Index each user's copy of a message ({owner_id: message item}) in one pipelined round trip.
+
+    Failures are logged and counted rather than raised: a message that
+    cannot be indexed has still been delivered.
+    """
+    if not settings.search_enabled:
+        return
+    try:
+        with get_redis_sync_client().pipeline(transaction=False) as pipe:
+            for owner_id, item in copies.items():
+                doc = f"{chat_id}|{item['SK']}"
+                for term, weight in _term_weights(item["text"], item["language"]).items():
+                    pipe.zadd(_term_key(owner_id, term), {doc: weight})
+                pipe.zadd(_chat_key(owner_id, chat_id), {doc: 0})
+                pipe.incr(_docs_key(owner_id))
+            pipe.execute()
+    except Exception:
+        _index_errors.inc(len(copies))
+        logger.exception("Failed to index message in chat %s", chat_id)
+
+
+def _idf(docs: int, df: int) -> float:
+    return math.log(1 + (docs - df + 0.5) / (df + 0.5))
+
+
+async def search_messages(
+    user_id: str, query: str, language: str, chat_id: str | None = None, limit: int = 20,
+) -> list[dict]:
+    """Rank the user's messages containing every term of query.
+
+    Returns [{"chat_id", "message_id", "timestamp", "cursor", "score"}], best
+    first; cursor is the message's sort key, usable with the messages and
+    export endpoints.
+    """
+    terms = list(dict.fromkeys(tokenize(query, language)))
+    if not terms:
+        return []
+    start = time.perf_counter()
+    client = await get_redis_client()
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.get(_docs_key(user_id))
+        for term in terms:
+            pipe.zcard(_term_key(user_id, term))
+        docs, *dfs = await pipe.execute()
+    if not all(dfs):
+        _query_seconds.observe(time.perf_counter() - start)
+        return []
+
+    weights = {_term_key(user_id, term): _idf(int(docs or 0), df) for term, df in zip(terms, dfs)}
+    if chat_id:
+        weights[_chat_key(user_id, chat_id)] = 0.0
+    result_key = f"search:{user_id}:tmp:{uuid.uuid4().hex}"
+    async with client.pipeline(transaction=True) as pipe:
+        pipe.zinterstore(result_key, weights)
+        pipe.zrange(result_key, 0, limit - 1, desc=True, withscores=True)
+        pipe.delete(result_key)
+        _, ranked, _ = await pipe.execute()
+    _query_seconds.observe(time.perf_counter() - start)
+
+    results = []
+    for doc, score in ranked:
+        doc_chat_id, _, sort_key = doc.partition("|")
+        message_id, timestamp = parse_sort_key(sort_key)
+        results.append({
+            "chat_id": doc_chat_id,
+            "message_id": message_id,
+            "timestamp": timestamp,
+            "cursor": sort_key,
+            "score": round(score, 4),
+        })
+    return results
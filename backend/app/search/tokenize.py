@@ -0,0 +1,93 @@
+"""Language-aware tokenization for message search.
+
+Text is NFKC-normalized and case-folded, then split into words. Scripts
+written without spaces (Han, kana, Hangul, Thai) are indexed as overlapping
+character bigrams, the usual approach when no dictionary segmenter is
+available. Per language, common stopwords are dropped, diacritics are folded
+where they are routinely omitted when typing (so "cafe" finds "café"), and
+a light stemmer strips plural endings. Messages and queries go through the
+same function, so their terms line up.
+"""
+import re
+import unicodedata
+
+_WORD = re.compile(r"\w+")
+# Han, Hiragana, Katakana, Hangul and Thai: no spaces between words
+_UNSPACED = re.compile("[\u0e00-\u0e7f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+")
+_MAX_TERM_CHARS = 40
+
+_FOLD_DIACRITICS = {"ca", "de", "es", "fr", "it", "nl", "pt"}
+_PLURAL_S = {"ca", "en", "es", "fr", "pt"}
+
+_STOPWORDS = {
+    "en": {
+        "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "if", "in", "is", "it", "of", "on",
+        "or", "so", "that", "the", "this", "to", "was", "we", "with", "you",
+    },
+    "es": {
+        "a", "al", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los", "por", "que", "se", "su",
+        "un", "una", "y",
+    },
+    "fr": {
+        "au", "aux", "ce", "de", "des", "du", "en", "est", "et", "il", "la", "le", "les", "un", "une", "que",
+        "qui", "pour", "dans", "sur",
+    },
+    "de": {
+        "der", "die", "das", "den", "dem", "des", "ein", "eine", "einen", "und", "ist", "im", "in", "zu",
+        "mit", "von", "auf", "fur", "es",
+    },
+    "pt": {
+        "a", "as", "o", "os", "de", "da", "do", "das", "dos", "e", "em", "um", "uma", "que", "para", "com",
+        "no", "na",
+    },
+    "it": {
+        "il", "lo", "la", "i", "gli", "le", "di", "da", "in", "con", "su", "per", "e", "un", "una", "che",
+        "del", "della",
+    },
+}
+
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFD", text)
+    return unicodedata.normalize("NFC", "".join(c for c in decomposed if not unicodedata.combining(c)))
+
+
+def _stem(word: str, language: str) -> str:
+    if language not in _PLURAL_S or len(word) <= 3 or not word.isalpha():
+        return word
+    if language == "en" and word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def _bigrams(run: str) -> list[str]:
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def tokenize(text: str, language: str) -> list[str]:
+    """Return the search terms of text, in order and with repeats, for a language code like "en"."""
+    language = language.split("-")[0].lower()
+    text = unicodedata.normalize("NFKC", text).casefold()
+    if language in _FOLD_DIACRITICS:
+        text = _fold(text)
+    stopwords = _STOPWORDS.get(language, set())
+    terms = []
+    for word in _WORD.findall(text):
+        position = 0
+        for run in _UNSPACED.finditer(word):
+            terms.extend(_words(word[position:run.start()], language, stopwords))
+            terms.extend(_bigrams(run.group()))
+            position = run.end()
+        terms.extend(_words(word[position:], language, stopwords))
+    return terms
+
+
+def _words(word: str, language: str, stopwords: set[str]) -> list[str]:
+    # Single letters and stopwords carry no signal; digits such as "5" do
+    if not word or word in stopwords or (len(word) == 1 and not word.isdigit()):
+        return []
+    return [_stem(word, language)[:_MAX_TERM_CHARS]]
@@ -5,6 +5,28 @@ class VoiceTokenRequest(BaseModel):
     chat_id: str
 
 
+class VoiceWarmRequest(BaseModel):
+    chat_id: str
+
+
 class VoiceTokenResponse(BaseModel):
     token: str
     room_name: str
+
+
+class WorkerStatus(BaseModel):
+    worker_id: str
+    rooms: int
+    heartbeat_age_seconds: float
+    alive: bool
+
+
+class RoomStatus(BaseModel):
+    room_name: str
+    chat_id: str
+    owner: str | None = None
+
+
+class SchedulerStatusResponse(BaseModel):
+    workers: list[WorkerStatus]
+    rooms: list[RoomStatus]
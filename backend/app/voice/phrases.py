@@ -0,0 +1,56 @@
+"""Phrase segmentation for streaming translated text into TTS.
+
+The translation LLM streams small token deltas. Forwarding each delta to
+ElevenLabs would produce choppy prosody, while waiting for the full text
+serializes translation and synthesis. Instead, deltas are buffered and
+released on phrase boundaries: sentence punctuation always, clause
+punctuation once the phrase is long enough to be spoken naturally.
+"""
+from collections.abc import AsyncIterable, AsyncIterator
+
+# Sentence-ending punctuation (Latin and CJK)
+_STRONG_BOUNDARIES = frozenset(".!?;\n。！？；")
+# Clause punctuation — only a boundary once the phrase reaches min_chars
+_WEAK_BOUNDARIES = frozenset(",:，、：")
+# Full-width punctuation is not followed by whitespace, so it ends a phrase immediately
+_NO_SPACE_BOUNDARIES = frozenset("\n。！？；，、：")
+
+
+def _find_boundary(buffer: str, min_chars: int) -> int:
+    """Return the end index of the last complete phrase in buffer, or 0 if none.
+
+    A Latin boundary must be followed by whitespace so that "3.14" or a
+    half-streamed "e.g" is not split; the trailing whitespace belongs to
+    the phrase it ends.
+    """
+    end = 0
+    for i, ch in enumerate(buffer):
+        if ch not in _STRONG_BOUNDARIES and ch not in _WEAK_BOUNDARIES:
+            continue
+        if ch in _NO_SPACE_BOUNDARIES:
+            cut = i + 1
+        elif i + 1 < len(buffer) and buffer[i + 1].isspace():
+            cut = i + 2
+        else:
+            continue
+        if ch in _WEAK_BOUNDARIES and cut < min_chars:
+            continue
+        end = cut
+    return end
+
+
+async def chunk_phrases(tokens: AsyncIterable[str], min_chars: int = 40) -> AsyncIterator[str]:
+    """Regroup streamed text deltas into phrases.
+
+    Concatenating the yielded phrases reproduces the input text exactly.
+    Whatever remains when the token stream ends is yielded as a final phrase.
+    """
+    buffer = ""
+    async for token in tokens:
+        buffer += token
+        end = _find_boundary(buffer, min_chars)
+        if end:
+            yield buffer[:end]
+            buffer = buffer[end:]
+    if buffer:
+        yield buffer
@@ -0,0 +1,55 @@
+"""Fixed-size framing of 16-bit PCM streams.
+
+ElevenLabs delivers TTS audio in chunks of arbitrary size, sometimes with an
+odd number of bytes, so a sample can straddle two chunks. The rechunker
+carries leftover bytes over to the next chunk and emits frames of exactly
+frame_ms of audio, copied into one preallocated buffer.
+"""
+from collections.abc import Iterator
+
+_SAMPLE_WIDTH = 2  # int16
+
+
+class PCMRechunker:
+    """Regroup arbitrary-size PCM byte chunks into fixed-duration frames.
+
+    The frames yielded by push() and returned by flush() are the same reusable
+    buffer: each must be consumed (e.g. captured into an AudioSource) before
+    the rechunker is advanced again.
+    """
+
+    def __init__(self, sample_rate: int, num_channels: int = 1, frame_ms: int = 20):
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.samples_per_channel = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.samples_per_channel * num_channels * _SAMPLE_WIDTH
+        self._frame = bytearray(self.frame_bytes)
+        self._filled = 0
+
+    def push(self, data: bytes | bytearray | memoryview) -> Iterator[bytearray]:
+        """Append data and yield every frame it completes."""
+        view = memoryview(data).cast("B")
+        pos = 0
+        remaining = len(view)
+        while remaining:
+            take = min(self.frame_bytes - self._filled, remaining)
+            self._frame[self._filled:self._filled + take] = view[pos:pos + take]
+            self._filled += take
+            pos += take
+            remaining -= take
+            if self._filled == self.frame_bytes:
+                self._filled = 0
+                yield self._frame
+
+    def flush(self) -> bytearray | None:
+        """Return the final partial frame padded with silence, or None if nothing is pending.
+
+        A trailing byte that does not complete a sample is dropped rather than
+        padded, so no half sample is ever played.
+        """
+        pending = self._filled - self._filled % (self.num_channels * _SAMPLE_WIDTH)
+        self._filled = 0
+        if not pending:
+            return None
+        self._frame[pending:] = bytes(self.frame_bytes - pending)
+        return self._frame
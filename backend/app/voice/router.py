@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_admin_user, get_current_user
 from app.chat.service import get_chat_meta
-from app.voice.models import VoiceTokenRequest, VoiceTokenResponse
-from app.voice.service import ensure_pipeline_for_room, generate_livekit_token
+from app.voice.models import SchedulerStatusResponse, VoiceTokenRequest, VoiceTokenResponse, VoiceWarmRequest
+from app.voice.scheduler import scheduler_status
+from app.voice.service import ensure_pipeline_for_room, generate_livekit_token, room_name_for_chat
 
 router = APIRouter()
 
@@ -21,11 +22,12 @@ async def create_voice_token(
     if current_user["userId"] not in chat_meta.get("memberUserIds", []):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this chat")
 
-    room_name = f"chat-{body.chat_id}"
+    room_name = room_name_for_chat(body.chat_id)
     token = generate_livekit_token(
         user_id=current_user["userId"],
         username=current_user["username"],
         room_name=room_name,
+        native_language=current_user["nativeLanguage"],
     )
 
     # Start translation pipeline agent for this room (idempotent)
@@ -35,3 +37,26 @@ async def create_voice_token(
         token=token,
         room_name=room_name,
     )
+
+
+@router.post("/warm", status_code=status.HTTP_204_NO_CONTENT)
+async def warm_voice_room(
+    body: VoiceWarmRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """Start the room's translation agent ahead of the first voice session."""
+    chat_meta = get_chat_meta(body.chat_id)
+    if not chat_meta:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+
+    if current_user["userId"] not in chat_meta.get("memberUserIds", []):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this chat")
+
+    await ensure_pipeline_for_room(room_name_for_chat(body.chat_id), body.chat_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/scheduler", response_model=SchedulerStatusResponse)
+async def get_scheduler_status(admin: dict = Depends(get_admin_user)):
+    """Workers and room ownership across the cluster; lists hosts and every active chat, so admins only."""
+    return SchedulerStatusResponse(**await scheduler_status())
@@ -0,0 +1,112 @@
+"""Agent-runner mode: host room agents in dedicated worker processes.
+
+Run with ``python -m app.voice.runner``. API processes started with
+VOICE_RUN_AGENTS=false only record room requests in Redis. Each runner
+process has its own event loop and RoomScheduler and claims rooms through
+the same lease protocol, so per-frame voice work never shares an event
+loop with HTTP or chat WebSocket handlers.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for workers to hand back their rooms before killing them
+_SHUTDOWN_TIMEOUT = 10.0
+
+
+async def _serve():
+    from app.dependencies import close_redis, get_redis_client
+    from app.observability import metrics
+    from app.observability.loop import start_loop_monitor, stop_loop_monitor
+    from app.voice.service import room_scheduler
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    await get_redis_client()
+    if settings.metrics_enabled:
+        # Turn metrics of agents hosted here reach /api/metrics through Redis
+        metrics.install_default_executor(loop)
+        await metrics.start_publisher()
+        await start_loop_monitor()
+    await room_scheduler.start()
+    logger.info("Agent worker %s started", room_scheduler.worker_id)
+    try:
+        await stop_event.wait()
+    finally:
+        await room_scheduler.stop()
+        if settings.metrics_enabled:
+            await stop_loop_monitor()
+            await metrics.stop_publisher()
+        await close_redis()
+        logger.info("Agent worker %s stopped", room_scheduler.worker_id)
+
+
+def _worker_main():
+    from app.observability.logs import configure_logging
+
+    configure_logging()
+    asyncio.run(_serve())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Commonality voice room agents")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.voice_agent_workers or os.cpu_count() or 1,
+        help="number of agent processes (default: VOICE_AGENT_WORKERS or CPU count)",
+    )
+    args = parser.parse_args()
+    from app.observability.logs import configure_logging
+
+    configure_logging()
+
+    ctx = multiprocessing.get_context("spawn")
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    def spawn(slot: int):
+        proc = ctx.Process(target=_worker_main, name=f"voice-agent-{slot}")
+        proc.start()
+        return proc
+
+    procs = [spawn(slot) for slot in range(args.workers)]
+    logger.info("Started %d voice agent workers", len(procs))
+
+    while not stopping:
+        for slot, proc in enumerate(procs):
+            if not proc.is_alive():
+                # Its leases expire and the rooms fail over; the replacement takes new rooms
+                logger.error("Voice agent worker %s exited with code %s, restarting", proc.name, proc.exitcode)
+                procs[slot] = spawn(slot)
+        time.sleep(1.0)
+
+    for proc in procs:
+        if proc.is_alive():
+            proc.terminate()
+    deadline = time.monotonic() + _SHUTDOWN_TIMEOUT
+    for proc in procs:
+        proc.join(max(deadline - time.monotonic(), 0))
+        if proc.is_alive():
+            proc.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Distributed placement of room agents across workers.
+
+Rooms that need a translation agent are recorded in the ``voice:rooms``
+hash. Every worker heartbeats its load into ``voice:workers`` and runs a
+reconcile loop: a room without a live lease is claimed with ``SET NX`` by
+the least-loaded live worker, which starts the agent locally and renews
+the lease while it runs. When a worker dies its leases expire and the
+next reconcile pass on another worker picks the rooms up.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+
+from app.config import settings
+from app.db.redis import publish, subscribe
+from app.dependencies import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+ROOMS_KEY = "voice:rooms"
+WORKERS_KEY = "voice:workers"
+WAKEUP_CHANNEL = "voice:scheduler"
+
+_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _lease_key(room_name: str) -> str:
+    return f"voice:lease:{room_name}"
+
+
+def plan_assignments(unleased_rooms: list[str], loads: dict[str, int]) -> dict[str, str]:
+    """Assign each unleased room to the least-loaded worker, counting earlier assignments.
+
+    Deterministic for a given snapshot (ties break on worker ID), so every
+    worker computes the same plan and only the chosen one claims a room.
+    """
+    projected = dict(loads)
+    plan = {}
+    for room_name in sorted(unleased_rooms):
+        if not projected:
+            break
+        worker_id = min(projected, key=lambda w: (projected[w], w))
+        plan[room_name] = worker_id
+        projected[worker_id] += 1
+    return plan
+
+
+class RoomScheduler:
+    """Claims, runs and renews room agents on this worker."""
+
+    def __init__(self, run_agent: Callable[[str, str], Awaitable[None]], worker_id: str | None = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._run_agent = run_agent
+        self._agents: dict[str, asyncio.Task] = {}
+        # First time this worker saw each room without a lease
+        self._unleased_since: dict[str, float] = {}
+        self._background: set[asyncio.Task] = set()
+        self._loop_task: asyncio.Task | None = None
+
+    @property
+    def local_rooms(self) -> list[str]:
+        return list(self._agents)
+
+    def is_running(self, room_name: str) -> bool:
+        task = self._agents.get(room_name)
+        return task is not None and not task.done()
+
+    async def request_room(self, room_name: str, chat_id: str):
+        """Record that a room needs an agent and wake the workers to place it (idempotent)."""
+        if self.is_running(room_name):
+            return
+        client = await get_redis_client()
+        await client.hset(ROOMS_KEY, room_name, chat_id)
+        await publish(WAKEUP_CHANNEL, room_name)
+
+    async def start(self):
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop scheduling, cancel local agents and hand their rooms back for failover."""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        agents = list(self._agents.items())
+        for _, task in agents:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in agents), return_exceptions=True)
+        try:
+            client = await get_redis_client()
+            release = client.register_script(_RELEASE_SCRIPT)
+            for room_name, _ in agents:
+                await release(keys=[_lease_key(room_name)], args=[self.worker_id])
+            await client.hdel(WORKERS_KEY, self.worker_id)
+            if agents:
+                await publish(WAKEUP_CHANNEL, self.worker_id)
+        except Exception:
+            # Leases still expire on their own; failover is only slower
+            logger.warning("Could not release leases for %s", self.worker_id, exc_info=True)
+
+    async def _run(self):
+        while True:
+            try:
+                await self._listen()
+            except Exception:
+                logger.exception("Room scheduler subscription failed on %s, retrying", self.worker_id)
+                await asyncio.sleep(settings.voice_scheduler_interval_seconds)
+
+    async def _listen(self):
+        pubsub = await subscribe(WAKEUP_CHANNEL)
+        try:
+            while True:
+                try:
+                    await self.reconcile()
+                except Exception:
+                    logger.exception("Room scheduler reconcile failed on %s", self.worker_id)
+                # A wakeup message triggers an immediate pass; otherwise poll on the interval
+                await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=settings.voice_scheduler_interval_seconds,
+                )
+        finally:
+            await pubsub.unsubscribe(WAKEUP_CHANNEL)
+            await pubsub.close()
+
+    async def reconcile(self):
+        """One scheduling pass: heartbeat, renew own leases, claim unowned rooms."""
+        client = await get_redis_client()
+        now = time.time()
+        ttl_ms = settings.voice_lease_ttl_seconds * 1000
+
+        await client.hset(WORKERS_KEY, self.worker_id, json.dumps({
+            "rooms": len(self._agents),
+            "heartbeat": now,
+        }))
+
+        renew = client.register_script(_RENEW_SCRIPT)
+        for room_name, task in list(self._agents.items()):
+            if not await renew(keys=[_lease_key(room_name)], args=[self.worker_id, ttl_ms]):
+                logger.warning("Lost lease for room %s on %s, stopping agent", room_name, self.worker_id)
+                task.cancel()
+
+        rooms = await client.hgetall(ROOMS_KEY)
+        candidates = [r for r in rooms if r not in self._agents]
+        if not candidates:
+            self._unleased_since.clear()
+            return
+        owners = await client.mget([_lease_key(r) for r in candidates])
+        unleased = [r for r, owner in zip(candidates, owners) if owner is None]
+        self._unleased_since = {r: self._unleased_since.get(r, now) for r in unleased}
+        if not unleased:
+            return
+
+        loads = await self._live_worker_loads(now)
+        loads[self.worker_id] = len(self._agents)
+        plan = plan_assignments(unleased, loads)
+        # If the planned worker has not claimed a room for two passes it is
+        # probably dying, so any worker may take it
+        grace = 2 * settings.voice_scheduler_interval_seconds
+        for room_name in unleased:
+            overdue = now - self._unleased_since[room_name] > grace
+            if plan.get(room_name) != self.worker_id and not overdue:
+                continue
+            claimed = await client.set(_lease_key(room_name), self.worker_id, nx=True, px=ttl_ms)
+            if claimed:
+                self._start_local(room_name, rooms[room_name])
+
+    async def _live_worker_loads(self, now: float) -> dict[str, int]:
+        client = await get_redis_client()
+        loads = {}
+        stale = []
+        for worker_id, raw in (await client.hgetall(WORKERS_KEY)).items():
+            info = json.loads(raw)
+            age = now - info["heartbeat"]
+            if age <= settings.voice_lease_ttl_seconds:
+                loads[worker_id] = info["rooms"]
+            elif age > 3 * settings.voice_lease_ttl_seconds:
+                stale.append(worker_id)
+        if stale:
+            await client.hdel(WORKERS_KEY, *stale)
+        return loads
+
+    def _start_local(self, room_name: str, chat_id: str):
+        logger.info("Worker %s claimed room %s", self.worker_id, room_name)
+        self._unleased_since.pop(room_name, None)
+        # Named so event-loop stalls in the agent are attributed to its room
+        task = asyncio.create_task(self._run_agent(room_name, chat_id), name=f"room-agent {room_name}")
+        self._agents[room_name] = task
+
+        def on_done(t: asyncio.Task):
+            self._agents.pop(room_name, None)
+            if t.cancelled():
+                # Lease lost or shutting down: leave the room registered for failover
+                return
+            if t.exception():
+                logger.error("Pipeline for room %s failed: %s", room_name, t.exception())
+            cleanup = asyncio.create_task(self._finish_room(room_name))
+            self._background.add(cleanup)
+            cleanup.add_done_callback(self._background.discard)
+
+        task.add_done_callback(on_done)
+
+    async def _finish_room(self, room_name: str):
+        """Unregister a room whose agent exited on its own (room emptied or failed)."""
+        client = await get_redis_client()
+        await client.hdel(ROOMS_KEY, room_name)
+        release = client.register_script(_RELEASE_SCRIPT)
+        await release(keys=[_lease_key(room_name)], args=[self.worker_id])
+
+
+async def scheduler_status() -> dict:
+    """Snapshot of live workers and room ownership across the cluster."""
+    client = await get_redis_client()
+    now = time.time()
+    workers = []
+    for worker_id, raw in sorted((await client.hgetall(WORKERS_KEY)).items()):
+        info = json.loads(raw)
+        age = now - info["heartbeat"]
+        workers.append({
+            "worker_id": worker_id,
+            "rooms": info["rooms"],
+            "heartbeat_age_seconds": round(age, 3),
+            "alive": age <= settings.voice_lease_ttl_seconds,
+        })
+    rooms = await client.hgetall(ROOMS_KEY)
+    names = sorted(rooms)
+    owners = await client.mget([_lease_key(r) for r in names]) if names else []
+    return {
+        "workers": workers,
+        "rooms": [
+            {"room_name": r, "chat_id": rooms[r], "owner": owner}
+            for r, owner in zip(names, owners)
+        ],
+    }
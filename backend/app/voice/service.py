@@ -1,30 +1,54 @@
+from __future__ import annotations
+
 import array
 import asyncio
 import base64
 import json
 import logging
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 from datetime import timedelta
+from typing import TYPE_CHECKING
 
-import websockets
-from livekit import api, rtc
-
-from app.auth.service import get_user_by_id
-from app.chat.service import get_chat_meta, translate_text
+from app.auth.profiles import load_profiles
+from app.chat.service import get_chat_meta, stream_translate_text
 from app.config import settings
+from app.dependencies import get_redis_client
+from app.observability.logs import lazy_json
+from app.voice import tts_cache
+from app.voice.phrases import chunk_phrases
+from app.voice.rechunk import PCMRechunker
+from app.voice.scheduler import ROOMS_KEY, RoomScheduler
 from app.voice.signals import Signal, TOPIC, encode_signal, decode_signal
+from app.voice.trace import TurnTrace
+
+# LiveKit, the WebSocket client and the VAD (numpy) are imported where they
+# are used, so API workers that never run a room agent do not pay for them
+# at startup
+if TYPE_CHECKING:
+    from livekit import rtc
 
 logger = logging.getLogger(__name__)
 
-# Track active pipeline tasks per room to prevent duplicates
-_active_rooms: dict[str, asyncio.Task] = {}
+TTS_SAMPLE_RATE = 24000
+TTS_OUTPUT_FORMAT = f"pcm_{TTS_SAMPLE_RATE}"
+
+# Places room agents across workers with Redis leases so each room has exactly one agent
+room_scheduler = RoomScheduler(lambda room_name, chat_id: _room_agent(room_name, chat_id))
+
 
+def generate_livekit_token(user_id: str, username: str, room_name: str, native_language: str) -> str:
+    """Generate a LiveKit access token for joining a room.
+    The participant's language is exposed as an attribute so clients can tell
+    which speakers they can hear untranslated."""
+    from livekit import api
 
-def generate_livekit_token(user_id: str, username: str, room_name: str) -> str:
-    """Generate a LiveKit access token for joining a room."""
     token = (
         api.AccessToken(settings.livekit_api_key, settings.livekit_api_secret)
         .with_identity(user_id)
         .with_name(username)
+        .with_attributes({"language": native_language})
         .with_grants(api.VideoGrants(room_join=True, room=room_name))
         .with_ttl(timedelta(hours=1))
     )
@@ -33,6 +57,8 @@ def generate_livekit_token(user_id: str, username: str, room_name: str) -> str:
 
 def _generate_agent_token(room_name: str) -> str:
     """Generate a LiveKit token for the server-side translation agent."""
+    from livekit import api
+
     token = (
         api.AccessToken(settings.livekit_api_key, settings.livekit_api_secret)
         .with_identity("translation-agent")
@@ -43,25 +69,81 @@ def _generate_agent_token(room_name: str) -> str:
     return token.to_jwt()
 
 
+class _TrackPermissions:
+    """Per-listener subscription grants for the agent's translated-audio tracks.
+
+    The agent denies subscriptions by default and grants each language track
+    only to the listeners of that language, so clients never receive audio
+    in a language they do not speak.
+    """
+
+    def __init__(self, participant: rtc.LocalParticipant):
+        self._participant = participant
+        self._grants: dict[str, list[str]] = {}
+
+    def apply(self):
+        from livekit import rtc
+
+        allowed: dict[str, list[str]] = {}
+        for sid, identities in self._grants.items():
+            for identity in identities:
+                allowed.setdefault(identity, []).append(sid)
+        self._participant.set_track_subscription_permissions(
+            allow_all_participants=False,
+            participant_permissions=[
+                rtc.ParticipantTrackPermission(
+                    participant_identity=identity, allow_all=False, allowed_track_sids=sids,
+                )
+                for identity, sids in allowed.items()
+            ],
+        )
+
+    def grant(self, track_sid: str, identities: list[str]):
+        self._grants[track_sid] = list(identities)
+        self.apply()
+
+    def revoke(self, track_sid: str):
+        if self._grants.pop(track_sid, None) is not None:
+            self.apply()
+
+
+def room_name_for_chat(chat_id: str) -> str:
+    return f"chat-{chat_id}"
+
+
+def _warm_key(room_name: str) -> str:
+    return f"voice:warm:{room_name}"
+
+
 async def ensure_pipeline_for_room(room_name: str, chat_id: str):
-    """Start a translation pipeline agent for a room if one isn't already running."""
-    if room_name in _active_rooms and not _active_rooms[room_name].done():
+    """Ensure a translation pipeline agent runs for a room on some worker (idempotent).
+
+    Also marks the room warm for settings.voice_agent_idle_seconds, so an agent
+    started ahead of the first participant (e.g. when a user opens the chat)
+    waits for them instead of leaving the empty room.
+    """
+    client = await get_redis_client()
+    await client.set(_warm_key(room_name), "1", ex=settings.voice_agent_idle_seconds)
+    # A room already registered needs only the warm mark refreshed, so reopening
+    # a chat (a tab switch) does not wake every worker for a reconcile pass
+    if await client.hexists(ROOMS_KEY, room_name):
         return
+    await room_scheduler.request_room(room_name, chat_id)
 
-    task = asyncio.create_task(_room_agent(room_name, chat_id))
-    _active_rooms[room_name] = task
-
-    # Cleanup when done
-    def on_done(t: asyncio.Task):
-        _active_rooms.pop(room_name, None)
-        if t.exception():
-            logger.error("Pipeline for room %s failed: %s", room_name, t.exception())
 
-    task.add_done_callback(on_done)
+async def _is_warm(room_name: str) -> bool:
+    try:
+        client = await get_redis_client()
+        return bool(await client.exists(_warm_key(room_name)))
+    except Exception:
+        logger.warning("Could not check warm state of room %s", room_name, exc_info=True)
+        return False
 
 
 async def _room_agent(room_name: str, chat_id: str):
     """Join a LiveKit room and orchestrate walkie-talkie translation turns."""
+    from livekit import rtc
+
     agent_token = _generate_agent_token(room_name)
     livekit_url = settings.livekit_url
     room = rtc.Room()
@@ -69,13 +151,7 @@ async def _room_agent(room_name: str, chat_id: str):
     chat_meta = get_chat_meta(chat_id)
     if not chat_meta:
         return
-    member_ids = chat_meta.get("memberUserIds", [])
-    members = {}
-    for uid in member_ids:
-        user = get_user_by_id(uid)
-        if user:
-            user.pop("passwordHash", None)
-            members[uid] = user
+    members = await load_profiles(chat_meta.get("memberUserIds", []))
 
     if len(members) < 2:
         return
@@ -87,10 +163,10 @@ async def _room_agent(room_name: str, chat_id: str):
     # When RECORDING_START arrives before the audio track, store the pending speaker ID
     pending_speaker_id: str | None = None
 
-    async def _publish_signal(signal: Signal, **kwargs):
+    async def _publish_signal(signal: Signal, destinations: list[str] | None = None, **kwargs):
         payload = encode_signal(signal, **kwargs)
         await room.local_participant.publish_data(
-            payload, reliable=True, topic=TOPIC
+            payload, reliable=True, topic=TOPIC, destination_identities=destinations or [],
         )
 
     def _try_attach_audio(speaker_id: str) -> bool:
@@ -151,15 +227,22 @@ async def _room_agent(room_name: str, chat_id: str):
     try:
         await room.connect(livekit_url, agent_token)
         logger.info("Translation agent joined room %s", room_name)
+        permissions = _TrackPermissions(room.local_participant)
+        permissions.apply()
 
+        # Reclaimed once the room has been empty for the idle period and nobody has re-warmed it
+        last_active = time.monotonic()
         while not stop_event.is_set():
             try:
                 await asyncio.wait_for(recording_active.wait(), timeout=1.0)
             except asyncio.TimeoutError:
-                if len(room.remote_participants) == 0:
-                    await asyncio.sleep(5)
-                    if len(room.remote_participants) == 0:
+                if room.remote_participants:
+                    last_active = time.monotonic()
+                elif time.monotonic() - last_active >= settings.voice_agent_idle_seconds:
+                    if not await _is_warm(room_name):
+                        logger.info("Room %s idle, reclaiming agent", room_name)
                         break
+                    last_active = time.monotonic()
                 continue
 
             speaker_id = recording_speaker_id
@@ -167,17 +250,21 @@ async def _room_agent(room_name: str, chat_id: str):
                 recording_active.clear()
                 continue
 
+            trace = TurnTrace(room_name, speaker_id)
             try:
                 await _run_walkie_talkie_turn(
                     room, audio_stream, speaker_id, members,
-                    recording_active, _publish_signal, stop_event,
+                    recording_active, _publish_signal, stop_event, permissions, trace,
                 )
             except Exception:
+                trace.outcome = "error"
                 logger.exception("Walkie-talkie turn failed for %s", speaker_id)
                 try:
                     await _publish_signal(Signal.ERROR, message="Translation failed")
                 except Exception:
                     pass
+            finally:
+                trace.finish()
 
             recording_speaker_id = None
             audio_stream = None
@@ -189,6 +276,22 @@ async def _room_agent(room_name: str, chat_id: str):
         logger.info("Translation agent left room %s", room_name)
 
 
+def group_listeners_by_language(members: dict[str, dict], speaker_id: str) -> tuple[dict[str, list[str]], list[str]]:
+    """Split a speaker's listeners into ({target_language: user_ids}, same_language_user_ids)."""
+    source_lang = members[speaker_id].get("nativeLanguage", "en")
+    by_lang: dict[str, list[str]] = {}
+    same_lang: list[str] = []
+    for uid, member in members.items():
+        if uid == speaker_id:
+            continue
+        lang = member.get("nativeLanguage", "en")
+        if lang == source_lang:
+            same_lang.append(uid)
+        else:
+            by_lang.setdefault(lang, []).append(uid)
+    return by_lang, same_lang
+
+
 async def _run_walkie_talkie_turn(
     room: rtc.Room,
     audio_stream: rtc.AudioStream,
@@ -197,36 +300,60 @@ async def _run_walkie_talkie_turn(
     recording_active: asyncio.Event,
     publish_signal,
     stop_event: asyncio.Event,
+    permissions: _TrackPermissions,
+    trace: TurnTrace,
 ):
-    """Execute one walkie-talkie turn: collect audio -> STT -> translate -> TTS."""
+    """Execute one walkie-talkie turn: collect audio -> STT -> translate -> TTS.
+
+    The transcript is translated and synthesized once per distinct listener
+    language, each onto its own track; listeners who share the speaker's
+    language hear the speaker's original audio and cost nothing. Stage
+    timings are recorded on trace, and trace.outcome says how the turn ended.
+    """
+    import websockets
+    from livekit import rtc
+
+    from app.voice.vad import SilenceGate
+
     logger.info("=== WALKIE-TALKIE TURN START for speaker=%s ===", speaker_id)
 
     speaker = members[speaker_id]
-    listener_id = next((uid for uid in members if uid != speaker_id), None)
-    if not listener_id:
+    source_lang = speaker.get("nativeLanguage", "en")
+    if len(members) < 2:
         logger.warning("No listener found for speaker=%s, aborting turn", speaker_id)
         return
-    listener = members[listener_id]
 
-    source_lang = speaker.get("nativeLanguage", "en")
-    target_lang = listener.get("nativeLanguage", "en")
-    logger.info("Languages: source=%s (%s) -> target=%s (%s)",
-                source_lang, speaker.get("username"), target_lang, listener.get("username"))
+    listeners_by_lang, same_lang_ids = group_listeners_by_language(members, speaker_id)
+    logger.info("Languages: source=%s (%s) -> targets=%s, same-language listeners=%d",
+                source_lang, speaker.get("username"),
+                {lang: len(ids) for lang, ids in listeners_by_lang.items()}, len(same_lang_ids))
 
-    if source_lang == target_lang:
-        logger.info("Same language (%s), skipping translation", source_lang)
+    if not listeners_by_lang:
+        logger.info("All listeners speak %s, skipping translation", source_lang)
+        trace.outcome = "same_language"
         await publish_signal(Signal.TTS_COMPLETE)
         return
 
-    stt_url = "wss://api.elevenlabs.io/v1/speech-to-text/realtime?model_id=scribe_v2_realtime"
+    stt_url = f"{settings.elevenlabs_ws_url}/v1/speech-to-text/realtime?model_id=scribe_v2_realtime"
     headers = {"xi-api-key": settings.elevenlabs_api_key}
 
     transcript_parts: list[str] = []
     audio_frame_count = 0
+    gate = None
+    if settings.voice_vad_enabled:
+        gate = SilenceGate(
+            sample_rate=16000,
+            energy_threshold_db=settings.voice_vad_energy_threshold_db,
+            zcr_threshold=settings.voice_vad_zcr_threshold,
+            preroll_ms=settings.voice_vad_preroll_ms,
+            hangover_ms=settings.voice_vad_hangover_ms,
+            min_speech_ms=settings.voice_vad_min_speech_ms,
+        )
     # Event to signal that we got a committed transcript after our final commit
     stt_done = asyncio.Event()
 
     async with websockets.connect(stt_url, additional_headers=headers) as stt_ws:
+        trace.mark("stt_connected")
         logger.info("[1/4] STT WebSocket connected to ElevenLabs")
 
         async def send_audio():
@@ -258,6 +385,12 @@ async def _run_walkie_talkie_turn(
                         )
                         first_frame_logged = True
 
+                    # Drop silence before upload; the gate may release buffered pre-roll with speech
+                    if gate is not None:
+                        pcm_data = gate.process(pcm_data)
+                        if not pcm_data:
+                            continue
+
                     audio_b64 = base64.b64encode(pcm_data).decode("utf-8")
                     await stt_ws.send(json.dumps({
                         "message_type": "input_audio_chunk",
@@ -266,7 +399,13 @@ async def _run_walkie_talkie_turn(
                         "sample_rate": 16000,
                     }))
 
-            logger.info("[1/4] Audio send complete: %d frames sent to STT", audio_frame_count)
+            trace.mark("speech_end")
+            logger.info("[1/4] Audio send complete: %d frames received", audio_frame_count)
+            if gate is not None:
+                logger.info("[1/4] VAD: speech=%.0fms, forwarded=%.0fms, dropped=%.0fms",
+                            gate.speech_ms, gate.forwarded_ms, gate.dropped_ms)
+                if not gate.speech_detected:
+                    return
             try:
                 await stt_ws.send(json.dumps({
                     "message_type": "input_audio_chunk",
@@ -283,10 +422,11 @@ async def _run_walkie_talkie_turn(
             async for message in stt_ws:
                 data = json.loads(message)
                 msg_type = data.get("message_type")
-                logger.info("[2/4] STT << %s: %s", msg_type, json.dumps(data)[:300])
+                logger.debug("[2/4] STT << %s: %s", msg_type, lazy_json(data, 300))
                 if msg_type == "committed_transcript":
                     text = data.get("text", "").strip()
                     if text:
+                        trace.mark("first_transcript")
                         transcript_parts.append(text)
                         logger.info("[2/4] STT transcript chunk: '%s'", text)
                     commit_received = True
@@ -299,12 +439,20 @@ async def _run_walkie_talkie_turn(
         receiver = asyncio.create_task(receive_transcripts())
 
         await sender
+        if gate is not None and not gate.speech_detected:
+            # Nothing was said, so no transcript is coming — skip the STT wait entirely
+            receiver.cancel()
+            trace.outcome = "no_speech"
+            logger.info("[2/4] VAD: no speech detected. Ending turn.")
+            await publish_signal(Signal.TTS_COMPLETE)
+            return
         # Wait for committed transcript (fast path) or timeout (fallback)
         try:
             await asyncio.wait_for(stt_done.wait(), timeout=5.0)
         except asyncio.TimeoutError:
             logger.warning("[2/4] STT receive timed out after 5s")
         receiver.cancel()
+        trace.mark("transcript_final")
 
     has_audio = audio_frame_count > 0
     full_transcript = " ".join(transcript_parts)
@@ -313,92 +461,273 @@ async def _run_walkie_talkie_turn(
 
     if not full_transcript:
         logger.warning("[2/4] Empty transcript — no speech detected. Ending turn.")
+        trace.outcome = "empty_transcript"
         await publish_signal(Signal.TTS_COMPLETE)
         return
 
     await publish_signal(Signal.PROCESSING)
 
-    logger.info("[3/4] Sending to OpenAI for translation: '%s' (%s -> %s)",
-                full_transcript, source_lang, target_lang)
-    loop = asyncio.get_running_loop()
-    translated = await loop.run_in_executor(
-        None, translate_text, full_transcript, source_lang, target_lang
-    )
-    logger.info("[3/4] TRANSLATION RESULT: '%s'", translated)
+    # The speaker and same-language listeners see every translation; each
+    # language group only sees its own
+    observers = [speaker_id, *same_lang_ids]
+
+    async def translate_and_speak(target_lang: str, listener_ids: list[str]):
+        logger.info("[3/4] Streaming OpenAI translation: '%s' (%s -> %s)",
+                    full_transcript, source_lang, target_lang)
+        mark = trace.marker(target_lang)
+
+        async def translated_tokens():
+            mark("translation_start")
+            async for token in stream_translate_text(full_transcript, source_lang, target_lang):
+                mark("translation_first_token")
+                yield token
+            mark("translation_done")
+
+        async def translated_phrases():
+            # Phrases are forwarded to TTS as soon as they are complete, so synthesis
+            # of the first phrase overlaps generation of the rest of the translation
+            parts: list[str] = []
+            async for phrase in chunk_phrases(translated_tokens(), settings.voice_phrase_min_chars):
+                parts.append(phrase)
+                yield phrase
+            translated = "".join(parts).strip()
+            logger.info("[3/4] TRANSLATION RESULT (%s): '%s'", target_lang, translated)
+            await publish_signal(
+                Signal.TTS_PLAYING,
+                destinations=listener_ids + observers,
+                original_text=full_transcript,
+                translated_text=translated,
+                language=target_lang,
+            )
 
-    await publish_signal(
-        Signal.TTS_PLAYING,
-        original_text=full_transcript,
-        translated_text=translated,
-    )
+        track_name = f"translated-{speaker_id}-{target_lang}"
+        logger.info("[4/4] Starting streaming TTS synthesis on %s", track_name)
+        await _tts_and_publish(translated_phrases(), room, track_name, listener_ids, permissions, mark)
 
-    logger.info("[4/4] Starting TTS synthesis for: '%s'", translated)
-    await _tts_and_publish(translated, room, speaker_id)
+    await _gather_or_cancel(*(
+        translate_and_speak(lang, ids) for lang, ids in listeners_by_lang.items()
+    ))
     logger.info("[4/4] TTS complete")
 
     await publish_signal(Signal.TTS_COMPLETE)
     logger.info("=== WALKIE-TALKIE TURN COMPLETE for speaker=%s ===", speaker_id)
 
 
-async def _tts_and_publish(text: str, room: rtc.Room, speaker_id: str):
-    """Synthesize text via ElevenLabs TTS and publish audio to the LiveKit room."""
+async def _gather_or_cancel(*aws: Awaitable[None]):
+    """Run awaitables concurrently. If one fails (or the caller is cancelled),
+    cancel the others and wait for them to finish before raising, so no
+    language keeps speaking after the turn has ended."""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+@asynccontextmanager
+async def _translated_track(
+    room: rtc.Room,
+    track_name: str,
+    listener_ids: list[str],
+    permissions: _TrackPermissions,
+    mark: Callable[[str], None] = lambda stage: None,
+):
+    """Publish a translated-audio track, subscribable by listener_ids only, for the duration of the block.
+
+    Yields an async write(pcm) function that rechunks PCM of any size into
+    fixed frames and captures them. The source queue is capped at
+    settings.voice_tts_queue_ms, so capture_frame applies backpressure and
+    keeps writes paced to real time. Pending audio is flushed and played out
+    before the track is unpublished. The first write and the end of playout
+    are reported to mark as tts_first_audio and playout_done.
+    """
+    from livekit import rtc
+
+    audio_source = rtc.AudioSource(
+        sample_rate=TTS_SAMPLE_RATE,
+        num_channels=1,
+        queue_size_ms=settings.voice_tts_queue_ms,
+    )
+    rechunker = PCMRechunker(TTS_SAMPLE_RATE, num_channels=1, frame_ms=settings.voice_tts_frame_ms)
+    track = rtc.LocalAudioTrack.create_audio_track(track_name, audio_source)
+    publication = await room.local_participant.publish_track(track)
+    permissions.grant(publication.sid, listener_ids)
+    logger.info("[4/4] TTS audio track %s published to LiveKit room (sid=%s)", track_name, publication.sid)
+
+    async def capture(frame_data: bytearray):
+        await audio_source.capture_frame(rtc.AudioFrame(
+            data=frame_data,
+            sample_rate=TTS_SAMPLE_RATE,
+            num_channels=1,
+            samples_per_channel=rechunker.samples_per_channel,
+        ))
+
+    async def write(pcm: bytes | memoryview):
+        mark("tts_first_audio")
+        for frame_data in rechunker.push(pcm):
+            await capture(frame_data)
+
+    try:
+        yield write
+        tail = rechunker.flush()
+        if tail is not None:
+            await capture(tail)
+        # Let LiveKit play out the queued audio before unpublishing
+        await audio_source.wait_for_playout()
+        mark("playout_done")
+    finally:
+        permissions.revoke(publication.sid)
+        await room.local_participant.unpublish_track(publication.sid)
+        await audio_source.aclose()
+
+
+class _TranslationFailed(Exception):
+    """The translated text feeding TTS failed, so the turn must report an error."""
+
+
+async def _upstream_phrases(phrases: AsyncIterable[str]) -> AsyncIterator[str]:
+    """Pass phrases through, re-raising their failures as _TranslationFailed."""
+    try:
+        async for phrase in phrases:
+            yield phrase
+    except Exception as e:
+        raise _TranslationFailed(str(e)) from e
+
+
+async def _tts_and_publish(
+    phrases: AsyncIterable[str],
+    room: rtc.Room,
+    track_name: str,
+    listener_ids: list[str],
+    permissions: _TrackPermissions,
+    mark: Callable[[str], None] = lambda stage: None,
+):
+    """Synthesize streamed text phrases and publish the audio to the LiveKit room.
+
+    Each phrase is looked up in the TTS cache as it arrives, so nothing is
+    held back waiting for the rest of the utterance: leading phrases that
+    hit are played from the cache, and from the first miss on the rest
+    streams through ElevenLabs. An utterance that was a single short phrase
+    is cached once synthesized. TTS errors are logged; a failure of the
+    phrases stream is raised for the turn to report with Signal.ERROR.
+    """
+    try:
+        phrase_iter = aiter(_upstream_phrases(phrases))
+        phrase = await anext(phrase_iter, None)
+        if phrase is None:
+            return
+        async with _translated_track(room, track_name, listener_ids, permissions, mark) as write_audio:
+            while True:
+                mark("tts_start")
+                cache_key = _phrase_cache_key(phrase)
+                cached = await tts_cache.lookup(cache_key) if cache_key else None
+                if cached is None:
+                    break
+                logger.info("[4/4] TTS cache hit (%d bytes) for '%s'", len(cached), phrase.strip())
+                await write_audio(cached)
+                phrase = await anext(phrase_iter, None)
+                if phrase is None:
+                    return
+
+            more = False
+
+            async def rest():
+                nonlocal more
+                yield phrase
+                async for later in phrase_iter:
+                    mark("tts_start")
+                    more = True
+                    yield later
+
+            pcm = await _synthesize_and_publish(rest(), write_audio, keep_audio=cache_key is not None)
+            if cache_key and pcm and not more:
+                await tts_cache.store(cache_key, pcm)
+
+    except _TranslationFailed:
+        raise
+    except Exception:
+        logger.exception("[4/4] TTS synthesis/publish error on %s", track_name)
+
+
+def _phrase_cache_key(phrase: str) -> str | None:
+    """TTS cache key of a phrase, or None when it is not cacheable (cache off, blank or too long)."""
+    text = phrase.strip()
+    if not settings.tts_cache_enabled or not text or len(text) > settings.tts_cache_max_chars:
+        return None
+    return tts_cache.tts_cache_key(
+        text, settings.elevenlabs_tts_voice_id, settings.elevenlabs_tts_model, TTS_OUTPUT_FORMAT,
+    )
+
+
+async def _synthesize_and_publish(
+    phrases: AsyncIterable[str],
+    write_audio: Callable[[bytes | memoryview], Awaitable[None]],
+    keep_audio: bool = False,
+) -> bytes | None:
+    """Stream phrases through ElevenLabs stream-input TTS into a translated track's write_audio.
+
+    Phrases are sent to the socket as they arrive while audio chunks are
+    received and published concurrently. Returns the synthesized PCM when
+    keep_audio is set.
+    """
+    import websockets
+
     voice_id = settings.elevenlabs_tts_voice_id
     model_id = settings.elevenlabs_tts_model
     tts_url = (
-        f"wss://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream-input"
-        f"?model_id={model_id}&output_format=pcm_24000"
+        f"{settings.elevenlabs_ws_url}/v1/text-to-speech/{voice_id}/stream-input"
+        f"?model_id={model_id}&output_format={TTS_OUTPUT_FORMAT}"
     )
     headers = {"xi-api-key": settings.elevenlabs_api_key}
 
-    try:
-        async with websockets.connect(tts_url, additional_headers=headers) as tts_ws:
-            logger.info("[4/4] TTS WebSocket connected to ElevenLabs (voice=%s, model=%s)", voice_id, model_id)
+    async with websockets.connect(tts_url, additional_headers=headers) as tts_ws:
+        logger.info("[4/4] TTS WebSocket connected to ElevenLabs (voice=%s, model=%s)", voice_id, model_id)
 
-            # Initialize with voice settings
-            await tts_ws.send(json.dumps({
-                "text": " ",
-                "voice_settings": {"stability": 0.5, "similarity_boost": 0.8},
-            }))
+        # Initialize with voice settings
+        await tts_ws.send(json.dumps({
+            "text": " ",
+            "voice_settings": {"stability": 0.5, "similarity_boost": 0.8},
+        }))
 
-            # Send translated text
-            await tts_ws.send(json.dumps({"text": text, "flush": True}))
+        async def send_text():
+            try:
+                async for phrase in phrases:
+                    if phrase.strip():
+                        # Flush each phrase so generation starts without waiting for more text
+                        await tts_ws.send(json.dumps({"text": phrase, "flush": True}))
+                # Close text stream
+                await tts_ws.send(json.dumps({"text": ""}))
+            except Exception:
+                # Unblock the receive loop below; the error is re-raised when awaited
+                await tts_ws.close()
+                raise
 
-            # Close text stream
-            await tts_ws.send(json.dumps({"text": ""}))
+        sender = asyncio.create_task(send_text())
+        audio = bytearray() if keep_audio else None
 
-            # Collect and publish audio chunks
-            audio_source = rtc.AudioSource(sample_rate=24000, num_channels=1)
-            track = rtc.LocalAudioTrack.create_audio_track(
-                f"translated-{speaker_id}", audio_source
-            )
-            publication = await room.local_participant.publish_track(track)
-            logger.info("[4/4] TTS audio track published to LiveKit room (sid=%s)", publication.sid)
-
-            tts_chunk_count = 0
+        tts_chunk_count = 0
+        try:
             async for message in tts_ws:
                 data = json.loads(message)
                 audio_b64 = data.get("audio")
                 if audio_b64:
                     tts_chunk_count += 1
                     audio_bytes = base64.b64decode(audio_b64)
-                    # Ensure byte length is a multiple of 2 (int16 samples)
-                    if len(audio_bytes) % 2 != 0:
-                        audio_bytes = audio_bytes + b"\x00"
-                    frame = rtc.AudioFrame(
-                        data=audio_bytes,
-                        sample_rate=24000,
-                        num_channels=1,
-                        samples_per_channel=len(audio_bytes) // 2,
-                    )
-                    await audio_source.capture_frame(frame)
+                    if audio is not None:
+                        audio += audio_bytes
+                    await write_audio(audio_bytes)
 
                 if data.get("isFinal"):
                     break
+        except BaseException:
+            sender.cancel()
+            raise
+        # Surfaces translation errors that closed the socket early
+        await sender
 
-            logger.info("[4/4] TTS playback done: %d audio chunks published", tts_chunk_count)
-            # Wait for LiveKit to drain the audio buffer before unpublishing
-            await asyncio.sleep(2.0)
-            await room.local_participant.unpublish_track(publication.sid)
+        logger.info("[4/4] TTS synthesis done: %d audio chunks published", tts_chunk_count)
 
-    except Exception:
-        logger.exception("[4/4] TTS synthesis/publish error for speaker %s", speaker_id)
+    return bytes(audio) if audio is not None else None
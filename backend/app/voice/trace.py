@@ -0,0 +1,117 @@
+"""Per-stage timing of walkie-talkie turns.
+
+A TurnTrace collects monotonic timestamps as a turn moves through STT,
+translation and TTS. When the turn ends, the intervals between stages are
+recorded in the voice_turn_step_seconds histogram (served by
+/api/metrics) and, with settings.voice_turn_trace_log, the whole trace is
+logged as the ``trace`` field of one record (a JSON object in the JSON log
+format).
+"""
+import logging
+import time
+import uuid
+from collections.abc import Callable
+
+from app.config import settings
+from app.observability.metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+# Intervals exported as histograms: (step, from_stage, to_stage). A from_stage
+# of None means the start of the turn. Per-language stages are looked up for
+# each translated language, falling back to the turn-wide mark.
+STEPS = (
+    ("stt_connect", None, "stt_connected"),
+    ("first_transcript", None, "first_transcript"),
+    ("stt_finalize", "speech_end", "transcript_final"),
+    ("translation_first_token", "translation_start", "translation_first_token"),
+    ("translation", "translation_start", "translation_done"),
+    ("tts_first_audio", "tts_start", "tts_first_audio"),
+    ("speech_end_to_first_audio", "speech_end", "tts_first_audio"),
+    ("playout", "speech_end", "playout_done"),
+    ("turn", None, "turn_end"),
+)
+
+_step_seconds = histogram(
+    "voice_turn_step_seconds",
+    "Duration of walkie-talkie turn stages",
+    ("step", "language"),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0),
+)
+_turns_total = counter("voice_turns_total", "Walkie-talkie turns by outcome", ("outcome",))
+
+
+class TurnTrace:
+    """Stage timestamps for one turn, in seconds since the turn started.
+
+    mark() keeps the first timestamp for a stage, so it can be called on
+    every chunk of a stream to record when the first one arrived.
+    """
+
+    def __init__(self, room_name: str, speaker_id: str):
+        self.turn_id = uuid.uuid4().hex[:12]
+        self.room_name = room_name
+        self.speaker_id = speaker_id
+        self.outcome = "translated"
+        self.languages: list[str] = []
+        self.started_at = time.time()
+        self._start = time.monotonic()
+        self._marks: dict[tuple[str, str | None], float] = {}
+
+    def mark(self, stage: str, language: str | None = None):
+        self._marks.setdefault((stage, language), time.monotonic() - self._start)
+
+    def marker(self, language: str) -> Callable[[str], None]:
+        """Return mark() bound to one target language."""
+        if language not in self.languages:
+            self.languages.append(language)
+        return lambda stage: self.mark(stage, language)
+
+    def _at(self, stage: str | None, language: str | None) -> float | None:
+        if stage is None:
+            return 0.0
+        if language is not None and (stage, language) in self._marks:
+            return self._marks[(stage, language)]
+        return self._marks.get((stage, None))
+
+    def steps(self) -> list[tuple[str, str, float]]:
+        """Return (step, language, seconds) for every step whose stages were both marked."""
+        result = []
+        for language in [None, *self.languages]:
+            for step, start_stage, end_stage in STEPS:
+                if language is not None and (end_stage, language) not in self._marks:
+                    continue
+                if language is None and (end_stage, None) not in self._marks:
+                    continue
+                start = self._at(start_stage, language)
+                end = self._at(end_stage, language)
+                if start is not None and end is not None and end >= start:
+                    result.append((step, language or "", end - start))
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            "turn_id": self.turn_id,
+            "room": self.room_name,
+            "speaker_id": self.speaker_id,
+            "outcome": self.outcome,
+            "started_at": self.started_at,
+            "marks": {
+                f"{stage}[{language}]" if language else stage: round(seconds, 4)
+                for (stage, language), seconds in sorted(self._marks.items(), key=lambda kv: kv[1])
+            },
+            "steps": {
+                f"{step}[{language}]" if language else step: round(seconds, 4)
+                for step, language, seconds in self.steps()
+            },
+        }
+
+    def finish(self):
+        """Mark the end of the turn and export it."""
+        self.mark("turn_end")
+        _turns_total.inc(outcome=self.outcome)
+        for step, language, seconds in self.steps():
+            _step_seconds.observe(seconds, step=step, language=language)
+        if settings.voice_turn_trace_log:
+            # A constant message keeps one rate-limit bucket; the formatter serializes the trace field
+            logger.info("Walkie-talkie turn trace", extra={"trace": self.to_dict()})
@@ -0,0 +1,187 @@
+"""Cache of synthesized TTS audio for repeated translated phrases.
+
+Entries are raw PCM keyed by (text, voice_id, model_id, output_format). Each
+entry is one file under settings.tts_cache_dir, read back through mmap so a
+hit is served from the page cache; an in-process LRU index keeps the
+directory under settings.tts_cache_max_bytes. With settings.tts_cache_redis
+enabled, entries are also shared between workers through Redis.
+"""
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from app.config import settings
+from app.dependencies import get_redis_binary_client
+
+logger = logging.getLogger(__name__)
+
+_SUFFIX = ".pcm"
+
+
+def tts_cache_key(text: str, voice_id: str, model_id: str, output_format: str) -> str:
+    """Return the cache key for a synthesized utterance."""
+    raw = "\x1f".join((voice_id, model_id, output_format, text))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """Size-bounded LRU of PCM files on local disk."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __contains__(self, key: str) -> bool:
+        """Whether key is indexed; answered from memory, without touching the disk."""
+        with self._lock:
+            return key in self._entries
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _load_index(self):
+        """Rebuild the LRU order from files left by a previous process (oldest mtime first)."""
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(_SUFFIX):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[: -len(_SUFFIX)], stat.st_size))
+        found.sort()
+        with self._lock:
+            for _, key, size in found:
+                self._entries[key] = size
+                self._total_bytes += size
+            self._evict_locked()
+
+    def _evict_locked(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.unlink(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def _forget(self, key: str):
+        with self._lock:
+            size = self._entries.pop(key, None)
+            if size is not None:
+                self._total_bytes -= size
+
+    def get(self, key: str) -> memoryview | None:
+        """Return a read-only view of the cached PCM, or None on a miss."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # Keep mtime in step with recency so a restart reloads the same LRU order
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            # Removed externally, or an empty file that cannot be mapped
+            self._forget(key)
+            return None
+        return memoryview(mapped)
+
+    def put(self, key: str, pcm: bytes):
+        """Store PCM for key, evicting least recently used entries to stay within budget."""
+        size = len(pcm)
+        if size == 0 or size > self.max_bytes:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pcm)
+            # Atomic rename so concurrent readers never map a partially written file
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict_locked()
+
+
+_tts_cache: TTSCache | None = None
+
+
+def get_tts_cache() -> TTSCache:
+    global _tts_cache
+    if _tts_cache is None:
+        _tts_cache = TTSCache(settings.tts_cache_dir, settings.tts_cache_max_bytes)
+    return _tts_cache
+
+
+def _redis_key(key: str) -> str:
+    return f"tts:{key}"
+
+
+async def lookup(key: str) -> bytes | memoryview | None:
+    """Return cached PCM from local disk, falling back to the shared Redis cache.
+
+    A miss in the in-memory index returns without touching the disk; a
+    possible hit is read in the executor, off the event loop.
+    """
+    local = None
+    loop = asyncio.get_running_loop()
+    if _tts_cache is None or key in _tts_cache:
+        try:
+            local = await loop.run_in_executor(None, lambda: get_tts_cache().get(key))
+        except OSError:
+            logger.warning("TTS cache read failed", exc_info=True)
+    if local is not None:
+        return local
+    if not settings.tts_cache_redis:
+        return None
+    try:
+        client = await get_redis_binary_client()
+        pcm = await client.get(_redis_key(key))
+    except Exception:
+        logger.warning("TTS cache Redis lookup failed", exc_info=True)
+        return None
+    if pcm:
+        try:
+            await loop.run_in_executor(None, get_tts_cache().put, key, pcm)
+        except OSError:
+            logger.warning("TTS cache write failed", exc_info=True)
+    return pcm
+
+
+async def store(key: str, pcm: bytes):
+    """Cache synthesized PCM locally and, if enabled, in Redis. Failures are logged, never raised."""
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, get_tts_cache().put, key, pcm)
+    except OSError:
+        logger.warning("TTS cache write failed", exc_info=True)
+    if not settings.tts_cache_redis:
+        return
+    try:
+        client = await get_redis_binary_client()
+        await client.set(_redis_key(key), pcm, ex=settings.tts_cache_redis_ttl_seconds)
+    except Exception:
+        logger.warning("TTS cache Redis store failed", exc_info=True)
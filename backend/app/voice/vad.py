@@ -0,0 +1,116 @@
+"""Energy / zero-crossing voice activity detection for push-to-talk audio.
+
+Frames are classified with two cheap, vectorized features: RMS level in dBFS
+and zero-crossing rate. Voiced speech is loud with a low crossing rate,
+while background hiss is either quiet or crosses zero very often. The
+SilenceGate uses the classification to trim leading and trailing silence
+and to shorten long pauses before audio is uploaded to STT.
+"""
+import math
+from collections import deque
+
+import numpy as np
+
+# Frames this far above the energy threshold count as speech regardless of
+# zero-crossing rate, so loud fricatives ("s", "f") are not cut
+_LOUD_MARGIN_DB = 15.0
+# RMS floor, roughly -90 dBFS, so digital silence has a finite level
+_MIN_RMS = 1.0
+
+
+def frame_features(pcm: bytes) -> tuple[float, float]:
+    """Return (level_dbfs, zero_crossing_rate) for a frame of 16-bit mono PCM."""
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    if samples.size == 0:
+        return 20.0 * math.log10(_MIN_RMS / 32768.0), 0.0
+    as_float = samples.astype(np.float32)
+    rms = float(np.sqrt(np.mean(as_float * as_float)))
+    level_db = 20.0 * math.log10(max(rms, _MIN_RMS) / 32768.0)
+    signs = np.signbit(samples)
+    crossings = int(np.count_nonzero(signs[1:] != signs[:-1]))
+    zcr = crossings / max(samples.size - 1, 1)
+    return level_db, zcr
+
+
+def is_speech(pcm: bytes, energy_threshold_db: float, zcr_threshold: float) -> bool:
+    """Classify one frame of 16-bit mono PCM as speech or non-speech."""
+    level_db, zcr = frame_features(pcm)
+    if level_db < energy_threshold_db:
+        return False
+    return zcr <= zcr_threshold or level_db >= energy_threshold_db + _LOUD_MARGIN_DB
+
+
+class SilenceGate:
+    """Streaming filter that forwards speech and drops surrounding silence.
+
+    - Silence before speech is held in a pre-roll buffer of preroll_ms and
+      released with the first speech frame, so word onsets are not clipped.
+    - After speech, up to hangover_ms of silence is forwarded as a natural
+      pause; anything longer is dropped (again keeping a pre-roll).
+    - speech_detected becomes true once min_speech_ms of speech has been seen.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        energy_threshold_db: float = -45.0,
+        zcr_threshold: float = 0.3,
+        preroll_ms: int = 200,
+        hangover_ms: int = 400,
+        min_speech_ms: int = 60,
+    ):
+        self.sample_rate = sample_rate
+        self.energy_threshold_db = energy_threshold_db
+        self.zcr_threshold = zcr_threshold
+        self.preroll_ms = preroll_ms
+        self.hangover_ms = hangover_ms
+        self.min_speech_ms = min_speech_ms
+
+        self.speech_ms = 0.0
+        self.total_ms = 0.0
+        self.forwarded_ms = 0.0
+        self._preroll: deque[tuple[bytes, float]] = deque()
+        self._preroll_buffered_ms = 0.0
+        # Silence since the last speech frame; infinite until speech starts
+        self._silence_ms = math.inf
+
+    @property
+    def speech_detected(self) -> bool:
+        return self.speech_ms >= self.min_speech_ms
+
+    @property
+    def dropped_ms(self) -> float:
+        return self.total_ms - self.forwarded_ms
+
+    def _duration_ms(self, pcm: bytes) -> float:
+        return len(pcm) / 2 / self.sample_rate * 1000.0
+
+    def process(self, pcm: bytes) -> bytes:
+        """Feed one frame; return the audio to forward (possibly empty)."""
+        duration = self._duration_ms(pcm)
+        self.total_ms += duration
+
+        if is_speech(pcm, self.energy_threshold_db, self.zcr_threshold):
+            self.speech_ms += duration
+            self._silence_ms = 0.0
+            if self._preroll:
+                out = b"".join(chunk for chunk, _ in self._preroll) + pcm
+                self.forwarded_ms += self._preroll_buffered_ms
+                self._preroll.clear()
+                self._preroll_buffered_ms = 0.0
+            else:
+                out = pcm
+            self.forwarded_ms += duration
+            return out
+
+        if self._silence_ms < self.hangover_ms:
+            self._silence_ms += duration
+            self.forwarded_ms += duration
+            return pcm
+
+        self._preroll.append((pcm, duration))
+        self._preroll_buffered_ms += duration
+        while self._preroll_buffered_ms > self.preroll_ms:
+            _, dropped = self._preroll.popleft()
+            self._preroll_buffered_ms -= dropped
+        return b""
@@ -0,0 +1,5 @@
+"""Performance benchmarks and the local stand-ins they run against.
+
+Not part of the app package or the test suite; run modules with
+``python -m bench.<name>`` from the backend directory.
+"""
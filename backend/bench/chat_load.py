@@ -0,0 +1,421 @@
+"""End-to-end chat load test.
+
+Starts the API with uvicorn against an in-memory DynamoDB stand-in (or
+DynamoDB Local), a Redis instance and the mock OpenAI server, seeds users
+and chats directly in DynamoDB, then connects one /api/ws/chat client per
+user. Every client sends messages at --rate for --duration seconds and
+the harness measures, for each recipient, the time from send to delivery.
+
+Report: throughput, send-to-recipient latency percentiles, the server's
+event_loop_lag_seconds over the run (scraped from /api/metrics) and server
+RSS per open connection. --max-p99-ms and --max-rss-per-connection-kb make
+the run exit non-zero, for use as a regression gate.
+
+Example (Redis from docker compose on localhost):
+
+    python -m bench.chat_load --clients 2000 --group-size 2 --rate 0.2 --duration 60
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import websockets
+
+from bench.common import (
+    LagSampler,
+    free_port,
+    raise_fd_limit,
+    rss_bytes,
+    spawn,
+    stop,
+    summarize_ms,
+    wait_for_port,
+)
+
+_TOKEN_RE = re.compile(r"bench:(\w+)")
+_BENCH_JWT_SECRET = "bench-secret-not-for-production-use"
+_METRIC_LINE_RE = re.compile(r'^(\w+?)(_bucket|_sum|_count)(?:\{(.*)\})? (\S+)$')
+_LE_RE = re.compile(r'le="([^"]+)"')
+
+
+class _Stats:
+    def __init__(self):
+        # token -> (send time, recipients still expected)
+        self.pending: dict[str, list] = {}
+        self.latencies: list[float] = []
+        self.sent = 0
+        self.errors = 0
+        self.send_failures = 0
+        self.measuring = False
+
+    def record_send(self, token: str, expected: int):
+        self.pending[token] = [time.perf_counter(), expected]
+        self.sent += 1
+
+    def record_delivery(self, token: str):
+        entry = self.pending.get(token)
+        if entry is None:
+            return
+        self.latencies.append(time.perf_counter() - entry[0])
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self.pending[token]
+
+    @property
+    def undelivered(self) -> int:
+        return sum(entry[1] for entry in self.pending.values())
+
+
+def parse_histogram(text: str, name: str) -> dict:
+    """Cumulative bucket counts, sum and count of a histogram in Prometheus text, summed over label sets."""
+    buckets: dict[float, float] = {}
+    total = {"sum": 0.0, "count": 0.0}
+    for line in text.splitlines():
+        match = _METRIC_LINE_RE.match(line)
+        if not match or match.group(1) != name:
+            continue
+        suffix, labels, value = match.group(2), match.group(3) or "", float(match.group(4))
+        if suffix == "_bucket":
+            bound = float(_LE_RE.search(labels).group(1).replace("+Inf", "inf"))
+            buckets[bound] = buckets.get(bound, 0.0) + value
+        else:
+            total[suffix[1:]] += value
+    return {"buckets": dict(sorted(buckets.items())), **total}
+
+
+def histogram_delta(before: dict, after: dict) -> dict:
+    return {
+        "buckets": {b: c - before["buckets"].get(b, 0.0) for b, c in after["buckets"].items()},
+        "sum": after["sum"] - before["sum"],
+        "count": after["count"] - before["count"],
+    }
+
+
+def histogram_quantile(histogram: dict, q: float) -> float:
+    """Upper bound of the bucket holding the q-quantile (q in 0..1)."""
+    if not histogram["count"]:
+        return float("nan")
+    target = q * histogram["count"]
+    for bound, cumulative in histogram["buckets"].items():
+        if cumulative >= target:
+            return bound
+    return float("inf")
+
+
+def _lag_report(histogram: dict) -> dict:
+    if not histogram["count"]:
+        return {"samples": 0}
+    return {
+        "samples": int(histogram["count"]),
+        "mean_ms": round(histogram["sum"] / histogram["count"] * 1000, 2),
+        # Bucket upper bounds, so coarse: the true value is at most this
+        "p50_le_ms": histogram_quantile(histogram, 0.50) * 1000,
+        "p99_le_ms": histogram_quantile(histogram, 0.99) * 1000,
+    }
+
+
+def seed(clients: int, group_size: int, languages: list[str]) -> list[dict]:
+    """Create users and chats with the app's own write paths; returns one entry per client."""
+    from app.auth.service import create_access_token
+    from app.chat.service import create_chat, create_group_chat
+    from app.dependencies import get_dynamo_client
+
+    run_id = uuid.uuid4().hex[:6]
+    users = []
+    with get_dynamo_client().Table("users").batch_writer() as batch:
+        for i in range(clients):
+            user_id = str(uuid.uuid4())
+            username = f"bench_{run_id}_{i}"
+            user = {
+                "userId": user_id,
+                "username": username,
+                "firstName": "Bench",
+                "lastName": str(i),
+                "nativeLanguage": languages[i % len(languages)],
+            }
+            batch.put_item(Item={
+                "PK": f"USER#{user_id}",
+                "SK": "PROFILE",
+                "GSI1PK": f"USERNAME#{username}",
+                "GSI1SK": "PROFILE",
+                # Never logged into: clients authenticate with minted tokens
+                "passwordHash": "!",
+                "createdAt": "1970-01-01T00:00:00+00:00",
+                **user,
+            })
+            users.append(user)
+
+    groups = [users[i:i + group_size] for i in range(0, len(users) - group_size + 1, group_size)]
+
+    def create(group: list[dict]) -> str:
+        if group_size == 2:
+            return create_chat(group[0], group[1])
+        return create_group_chat(group[0], group[1:], f"bench {run_id}")
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        chat_ids = list(pool.map(create, groups))
+
+    return [
+        {"user_id": user["userId"], "token": create_access_token(user["userId"]), "chat_id": chat_id}
+        for group, chat_id in zip(groups, chat_ids)
+        for user in group
+    ]
+
+
+async def _run_client(
+    url: str, client: dict, stats: _Stats, recipients: int,
+    rate: float, connected: asyncio.Event, start: asyncio.Event, stop_sending: asyncio.Event, finish: asyncio.Event,
+):
+    async with websockets.connect(url, open_timeout=60, ping_interval=None, max_queue=None) as ws:
+        connected.set()
+
+        async def receive():
+            async for raw in ws:
+                data = json.loads(raw)
+                if "error" in data:
+                    stats.errors += 1
+                elif data.get("type") == "message" and data["message"]["from_user_id"] != client["user_id"]:
+                    match = _TOKEN_RE.search(data["message"]["text"])
+                    if match:
+                        stats.record_delivery(match.group(1))
+
+        receiver = asyncio.create_task(receive())
+        try:
+            await start.wait()
+            interval = 1.0 / rate
+            # Spread clients evenly over the first interval instead of sending in lockstep
+            await asyncio.sleep(random.uniform(0, interval))
+            while not stop_sending.is_set():
+                token = uuid.uuid4().hex
+                if stats.measuring:
+                    stats.record_send(token, recipients)
+                try:
+                    await ws.send(json.dumps({"chat_id": client["chat_id"], "text": f"bench:{token} hello there"}))
+                except websockets.ConnectionClosed:
+                    stats.send_failures += 1
+                    return
+                await asyncio.sleep(interval * random.uniform(0.5, 1.5))
+            # Keep receiving in-flight deliveries until the harness is done measuring
+            await finish.wait()
+        finally:
+            receiver.cancel()
+
+
+async def _drive(args, base_url: str, server_pid: int, clients: list[dict]) -> dict:
+    ws_url = base_url.replace("http://", "ws://") + "/api/ws/chat?token="
+    stats = _Stats()
+    start = asyncio.Event()
+    stop_sending = asyncio.Event()
+    finish = asyncio.Event()
+    connect_limit = asyncio.Semaphore(args.connect_concurrency)
+    connected_count = 0
+    connect_failures = 0
+    all_connected = asyncio.Event()
+
+    async def connect(client: dict):
+        nonlocal connected_count, connect_failures
+        connected = asyncio.Event()
+        async with connect_limit:
+            task = asyncio.create_task(_run_client(
+                ws_url + client["token"], client, stats, args.group_size - 1,
+                args.rate, connected, start, stop_sending, finish,
+            ))
+            waiter = asyncio.create_task(connected.wait())
+            await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+        if connected.is_set():
+            connected_count += 1
+        else:
+            connect_failures += 1
+        if connected_count + connect_failures == len(clients):
+            all_connected.set()
+        return task
+
+    lag = LagSampler()
+    lag.start()
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as http:
+        rss_baseline = rss_bytes(server_pid)
+        connect_started = time.perf_counter()
+        tasks = await asyncio.gather(*(connect(c) for c in clients))
+        await all_connected.wait()
+        connect_seconds = time.perf_counter() - connect_started
+        # Let connection bookkeeping (presence writes, listener start) settle before measuring memory
+        await asyncio.sleep(1.0)
+        rss_connected = rss_bytes(server_pid)
+
+        start.set()
+        await asyncio.sleep(args.warmup)
+        lag_before = parse_histogram((await http.get("/api/metrics")).text, "event_loop_lag_seconds")
+        stats.measuring = True
+        measure_started = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        stats.measuring = False
+        measured_seconds = time.perf_counter() - measure_started
+        lag_after = parse_histogram((await http.get("/api/metrics")).text, "event_loop_lag_seconds")
+        stop_sending.set()
+
+        # Wait for in-flight deliveries of measured messages
+        drain_deadline = time.monotonic() + args.drain_timeout
+        while stats.pending and time.monotonic() < drain_deadline:
+            await asyncio.sleep(0.1)
+        rss_final = rss_bytes(server_pid)
+
+    finish.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await lag.stop()
+
+    deliveries = len(stats.latencies)
+    report = {
+        "config": {
+            "clients": len(clients),
+            "group_size": args.group_size,
+            "languages": args.languages,
+            "rate_per_client": args.rate,
+            "duration_seconds": args.duration,
+            "openai_latency_ms": args.openai_latency_ms,
+            "openai_jitter_ms": args.openai_jitter_ms,
+            "dynamodb": args.dynamodb,
+        },
+        "connect": {
+            "connected": connected_count,
+            "failed": connect_failures,
+            "seconds": round(connect_seconds, 2),
+        },
+        "throughput": {
+            "messages_sent": stats.sent,
+            "deliveries": deliveries,
+            "messages_per_second": round(stats.sent / measured_seconds, 2),
+            "deliveries_per_second": round(deliveries / measured_seconds, 2),
+            "undelivered": stats.undelivered,
+            "error_replies": stats.errors,
+            "send_failures": stats.send_failures,
+        },
+        "send_to_recipient_latency_ms": summarize_ms(stats.latencies),
+        "server_event_loop_lag": _lag_report(histogram_delta(lag_before, lag_after)),
+        "client_event_loop_lag_max_ms": round(lag.max_lag * 1000, 2),
+    }
+    if rss_baseline is not None and connected_count:
+        report["server_rss"] = {
+            "baseline_mb": round(rss_baseline / 2**20, 1),
+            "connected_mb": round(rss_connected / 2**20, 1),
+            "final_mb": round(rss_final / 2**20, 1),
+            "per_connection_kb": round((rss_connected - rss_baseline) / connected_count / 1024, 1),
+        }
+    return report
+
+
+def check_thresholds(report: dict, max_p99_ms: float | None, max_rss_kb: float | None) -> list[str]:
+    """Threshold violations in a report, as human-readable lines."""
+    failures = []
+    p99 = report["send_to_recipient_latency_ms"].get("p99")
+    if max_p99_ms is not None and (p99 is None or p99 > max_p99_ms):
+        failures.append(f"p99 send-to-recipient latency {p99} ms > {max_p99_ms} ms")
+    per_connection = report.get("server_rss", {}).get("per_connection_kb")
+    if max_rss_kb is not None and per_connection is not None and per_connection > max_rss_kb:
+        failures.append(f"RSS per connection {per_connection} KiB > {max_rss_kb} KiB")
+    if report["throughput"]["undelivered"]:
+        failures.append(f"{report['throughput']['undelivered']} deliveries never arrived")
+    return failures
+
+
+def _print_report(report: dict):
+    for section, values in report.items():
+        if isinstance(values, dict):
+            print(f"{section}:")
+            for key, value in values.items():
+                print(f"  {key:<24} {value}")
+        else:
+            print(f"{section:<26} {values}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat WebSocket load test")
+    parser.add_argument("--clients", type=int, default=1000, help="concurrent WebSocket clients (one user each)")
+    parser.add_argument("--group-size", type=int, default=2, help="members per chat (2 = 1:1 chats)")
+    parser.add_argument("--languages", default="en,es", help="native languages assigned round-robin")
+    parser.add_argument("--rate", type=float, default=0.2, help="messages per second per client")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds of load before measuring")
+    parser.add_argument("--drain-timeout", type=float, default=15.0)
+    parser.add_argument("--connect-concurrency", type=int, default=200)
+    parser.add_argument("--dynamodb", default="memory", help='"memory" or a DynamoDB Local endpoint URL')
+    parser.add_argument("--redis-url", default=os.getenv("BENCH_REDIS_URL", "redis://localhost:6379/15"))
+    parser.add_argument("--openai-latency-ms", type=float, default=300.0)
+    parser.add_argument("--openai-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--log-level", default="WARNING", help="server LOG_LEVEL")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    parser.add_argument("--max-p99-ms", type=float, help="fail if p99 send-to-recipient latency exceeds this")
+    parser.add_argument("--max-rss-per-connection-kb", type=float, help="fail if server RSS per connection exceeds this")
+    args = parser.parse_args()
+    args.languages = [lang.strip() for lang in args.languages.split(",") if lang.strip()]
+    if args.group_size < 2 or args.clients < args.group_size:
+        parser.error("--group-size must be at least 2 and no larger than --clients")
+
+    raise_fd_limit()
+    processes = []
+    try:
+        if args.dynamodb == "memory":
+            dynamo_port = free_port()
+            processes.append(spawn(["-m", "bench.mock_dynamodb", "--port", str(dynamo_port)]))
+            wait_for_port(dynamo_port, processes[-1])
+            dynamodb_endpoint = f"http://127.0.0.1:{dynamo_port}"
+        else:
+            dynamodb_endpoint = args.dynamodb
+
+        openai_port = free_port()
+        processes.append(spawn([
+            "-m", "bench.mock_openai", "--port", str(openai_port),
+            "--latency-ms", str(args.openai_latency_ms), "--jitter-ms", str(args.openai_jitter_ms),
+        ]))
+        wait_for_port(openai_port, processes[-1])
+
+        env = {
+            "DYNAMODB_ENDPOINT": dynamodb_endpoint,
+            "AWS_ACCESS_KEY_ID": "local",
+            "AWS_SECRET_ACCESS_KEY": "local",
+            "REDIS_URL": args.redis_url,
+            "OPENAI_API_KEY": "bench",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+            "JWT_SECRET": _BENCH_JWT_SECRET,
+            "ENVIRONMENT": "development",
+            "VOICE_RUN_AGENTS": "false",
+            "METRICS_ENABLED": "true",
+            "METRICS_TOKEN": "",
+            "LOG_LEVEL": args.log_level,
+        }
+        app_port = free_port()
+        processes.append(spawn(
+            ["-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(app_port), "--log-level", "warning"],
+            env,
+        ))
+        wait_for_port(app_port, processes[-1], timeout=60)
+        server_pid = processes[-1].pid
+
+        # The seeding code below imports app modules, which read settings from the environment
+        os.environ.update({**env, "METRICS_ENABLED": "false"})
+        clients = seed(args.clients - args.clients % args.group_size, args.group_size, args.languages)
+        report = asyncio.run(_drive(args, f"http://127.0.0.1:{app_port}", server_pid, clients))
+    finally:
+        for proc in reversed(processes):
+            stop(proc)
+
+    _print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    failures = check_thresholds(report, args.max_p99_ms, args.max_rss_per_connection_kb)
+    for failure in failures:
+        print(f"REGRESSION: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Local stand-ins for the ElevenLabs realtime WebSocket APIs.
+
+Serves the two protocols the voice pipeline speaks:
+
+* ``/v1/speech-to-text/realtime`` (Scribe): accepts ``input_audio_chunk``
+  messages, emits a ``partial_transcript`` every --stt-partial-ms of audio
+  received and, after a commit, a ``committed_transcript`` with the
+  configured text once --stt-finalize-ms has passed.
+* ``/v1/text-to-speech/{voice}/stream-input``: each flushed text phrase is
+  answered after --tts-first-audio-ms with PCM audio (--tts-ms-per-char of
+  audio per character) in --tts-chunk-ms chunks, generated --tts-speed
+  times faster than real time. ``isFinal`` follows the end-of-text message
+  once all audio is sent.
+
+Every connection first waits --connect-ms, like a TLS handshake to a
+remote region. Run with ``python -m bench.fake_elevenlabs --port 8002`` and
+set ELEVENLABS_WS_URL=ws://127.0.0.1:8002.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import math
+import random
+from array import array
+
+from websockets.asyncio.server import ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+
+
+def _delay(ms: float, jitter_ms: float) -> float:
+    return max(ms + random.uniform(-jitter_ms, jitter_ms), 0.0) / 1000
+
+
+def tone_pcm(sample_rate: int, duration_ms: float, frequency: float = 220.0) -> bytes:
+    """16-bit mono sine, standing in for synthesized speech."""
+    samples = int(sample_rate * duration_ms / 1000)
+    return array("h", (
+        int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate)) for i in range(samples)
+    )).tobytes()
+
+
+class FakeElevenLabs:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self._chunk = tone_pcm(args.tts_sample_rate, args.tts_chunk_ms)
+
+    async def process_request(self, connection: ServerConnection, request):
+        await asyncio.sleep(_delay(self.args.connect_ms, self.args.jitter_ms))
+        return None
+
+    async def handler(self, connection: ServerConnection):
+        path = connection.request.path
+        try:
+            if path.startswith("/v1/speech-to-text/realtime"):
+                await self._stt(connection)
+            elif "/stream-input" in path:
+                await self._tts(connection)
+            else:
+                await connection.close(code=4404, reason="unknown endpoint")
+        except ConnectionClosed:
+            pass
+
+    async def _stt(self, ws: ServerConnection):
+        args = self.args
+        words = args.transcript.split()
+        # 16 kHz, 16-bit mono
+        bytes_per_ms = 32
+        received_ms = 0.0
+        next_partial_ms = args.stt_partial_ms
+        await ws.send(json.dumps({"message_type": "session_started"}))
+        async for message in ws:
+            data = json.loads(message)
+            if data.get("message_type") != "input_audio_chunk":
+                continue
+            received_ms += len(base64.b64decode(data.get("audio_base_64") or "")) / bytes_per_ms
+            if args.stt_partial_ms and received_ms >= next_partial_ms:
+                next_partial_ms += args.stt_partial_ms
+                shown = max(1, min(len(words), int(received_ms / 300)))
+                await ws.send(json.dumps({"message_type": "partial_transcript", "text": " ".join(words[:shown])}))
+            if data.get("commit"):
+                await asyncio.sleep(_delay(args.stt_finalize_ms, args.jitter_ms))
+                await ws.send(json.dumps({"message_type": "committed_transcript", "text": args.transcript}))
+
+    async def _tts(self, ws: ServerConnection):
+        args = self.args
+        phrases: asyncio.Queue[str | None] = asyncio.Queue()
+
+        async def receive():
+            async for message in ws:
+                text = json.loads(message).get("text")
+                if text == "":
+                    await phrases.put(None)
+                    return
+                if text and text.strip():
+                    await phrases.put(text)
+
+        receiver = asyncio.create_task(receive())
+        try:
+            chunk_seconds = args.tts_chunk_ms / 1000
+            audio = base64.b64encode(self._chunk).decode()
+            while (phrase := await phrases.get()) is not None:
+                await asyncio.sleep(_delay(args.tts_first_audio_ms, args.jitter_ms))
+                chunks = max(1, math.ceil(len(phrase) * args.tts_ms_per_char / args.tts_chunk_ms))
+                for i in range(chunks):
+                    if i:
+                        await asyncio.sleep(chunk_seconds / args.tts_speed)
+                    await ws.send(json.dumps({"audio": audio, "isFinal": None}))
+            await ws.send(json.dumps({"audio": None, "isFinal": True}))
+        finally:
+            receiver.cancel()
+
+
+async def _serve(args: argparse.Namespace):
+    fake = FakeElevenLabs(args)
+    async with serve(fake.handler, args.host, args.port, process_request=fake.process_request, max_size=None):
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake ElevenLabs Scribe and stream-input TTS servers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--connect-ms", type=float, default=80.0, help="delay before each WebSocket handshake")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="uniform ± spread applied to every delay")
+    parser.add_argument("--transcript", default="Hello, can you hear me? Let's meet at the station at five.")
+    parser.add_argument("--stt-partial-ms", type=float, default=500.0, help="audio between partial transcripts (0 = none)")
+    parser.add_argument("--stt-finalize-ms", type=float, default=250.0, help="commit to committed_transcript delay")
+    parser.add_argument("--tts-first-audio-ms", type=float, default=200.0, help="phrase to first audio chunk delay")
+    parser.add_argument("--tts-ms-per-char", type=float, default=60.0, help="audio generated per character")
+    parser.add_argument("--tts-chunk-ms", type=float, default=250.0, help="audio per message")
+    parser.add_argument("--tts-speed", type=float, default=4.0, help="generation speed relative to real time")
+    parser.add_argument("--tts-sample-rate", type=int, default=24000)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
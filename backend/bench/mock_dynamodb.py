@@ -0,0 +1,741 @@
+"""In-memory DynamoDB stand-in speaking the DynamoDB JSON wire protocol.
+
+Covers the subset of the API the app uses (table management, single-item
+reads and writes, Query/Scan, batch and transactional operations) with
+condition, update, key-condition and projection expressions on top-level
+attributes. Items are kept in wire format, so boto3 does real
+(de)serialization exactly as it would against DynamoDB Local.
+
+Run standalone with ``python -m bench.mock_dynamodb --port 8000`` and point
+DYNAMODB_ENDPOINT at it, or call attach() to serve a boto3 client from a
+store in the same process (used by the tests).
+"""
+import argparse
+import asyncio
+import bisect
+import copy
+import json
+import re
+from decimal import Decimal
+
+
+class DynamoError(Exception):
+    def __init__(self, code: str, message: str = "", extra: dict | None = None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.extra = extra or {}
+
+
+# ─── Expressions ──────────────────────────────────────────────
+
+_TOKEN_RE = re.compile(r"\s*(#\w+|:\w+|<>|<=|>=|[=<>(),+\-]|[A-Za-z_][\w.\[\]]*)")
+_KEYWORDS = {"AND", "OR", "NOT", "BETWEEN", "IN", "SET", "REMOVE", "ADD", "DELETE"}
+_CONDITION_FUNCTIONS = {"attribute_exists", "attribute_not_exists", "attribute_type", "begins_with", "contains"}
+_COMPARATORS = {"=", "<>", "<", "<=", ">", ">="}
+_parse_cache: dict[tuple[str, str], object] = {}
+
+
+def _tokenize(expression: str) -> list[str]:
+    tokens = []
+    pos = 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = _TOKEN_RE.match(expression, pos)
+        if not match:
+            raise DynamoError("ValidationException", f"Invalid expression near: {expression[pos:]!r}")
+        token = match.group(1)
+        tokens.append(token.upper() if token.upper() in _KEYWORDS else token)
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, expression: str):
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+
+    def peek(self) -> str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, expected: str | None = None) -> str:
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise DynamoError("ValidationException", f"Expected {expected or 'token'}, got {token!r}")
+        self.pos += 1
+        return token
+
+    def done(self):
+        if self.peek() is not None:
+            raise DynamoError("ValidationException", f"Unexpected token {self.peek()!r}")
+
+    # Conditions: nested tuples evaluated by _eval_condition
+    def condition(self):
+        node = self._and()
+        while self.peek() == "OR":
+            self.take()
+            node = ("or", node, self._and())
+        return node
+
+    def _and(self):
+        node = self._not()
+        while self.peek() == "AND":
+            self.take()
+            node = ("and", node, self._not())
+        return node
+
+    def _not(self):
+        if self.peek() == "NOT":
+            self.take()
+            return ("not", self._not())
+        return self._primary()
+
+    def _primary(self):
+        token = self.peek()
+        if token == "(":
+            self.take()
+            node = self.condition()
+            self.take(")")
+            return node
+        if token in _CONDITION_FUNCTIONS:
+            self.take()
+            self.take("(")
+            args = [self.operand()]
+            while self.peek() == ",":
+                self.take()
+                args.append(self.operand())
+            self.take(")")
+            return ("func", token, args)
+        left = self.operand()
+        token = self.peek()
+        if token in _COMPARATORS:
+            self.take()
+            return ("cmp", token, left, self.operand())
+        if token == "BETWEEN":
+            self.take()
+            low = self.operand()
+            self.take("AND")
+            return ("between", left, low, self.operand())
+        if token == "IN":
+            self.take()
+            self.take("(")
+            options = [self.operand()]
+            while self.peek() == ",":
+                self.take()
+                options.append(self.operand())
+            self.take(")")
+            return ("in", left, options)
+        raise DynamoError("ValidationException", f"Invalid condition near {token!r}")
+
+    def operand(self):
+        token = self.take()
+        if token.startswith(":"):
+            return ("value", token)
+        if token == "size":
+            self.take("(")
+            path = self.operand()
+            self.take(")")
+            return ("size", path)
+        if token == "if_not_exists":
+            self.take("(")
+            path = self.operand()
+            self.take(",")
+            default = self.operand()
+            self.take(")")
+            return ("if_not_exists", path, default)
+        if token == "list_append":
+            self.take("(")
+            first = self.operand()
+            self.take(",")
+            second = self.operand()
+            self.take(")")
+            return ("list_append", first, second)
+        if "." in token or "[" in token:
+            raise DynamoError("ValidationException", f"Nested attribute paths are not supported: {token}")
+        return ("path", token)
+
+    # Update expressions: list of (action, path, operand)
+    def update(self):
+        actions = []
+        while self.peek() is not None:
+            clause = self.take()
+            if clause not in ("SET", "REMOVE", "ADD", "DELETE"):
+                raise DynamoError("ValidationException", f"Invalid update clause {clause!r}")
+            while True:
+                path = self.operand()
+                if clause == "SET":
+                    self.take("=")
+                    value = self.operand()
+                    if self.peek() in ("+", "-"):
+                        op = self.take()
+                        value = ("arith", op, value, self.operand())
+                    actions.append(("SET", path, value))
+                elif clause == "REMOVE":
+                    actions.append(("REMOVE", path, None))
+                else:
+                    actions.append((clause, path, self.operand()))
+                if self.peek() != ",":
+                    break
+                self.take()
+        return actions
+
+
+def _parsed(kind: str, expression: str):
+    key = (kind, expression)
+    node = _parse_cache.get(key)
+    if node is None:
+        parser = _Parser(expression)
+        node = parser.update() if kind == "update" else parser.condition()
+        parser.done()
+        _parse_cache[key] = node
+    return node
+
+
+def _name(path_node, names: dict) -> str:
+    token = path_node[1]
+    if token.startswith("#"):
+        if token not in names:
+            raise DynamoError("ValidationException", f"Undefined attribute name {token}")
+        return names[token]
+    return token
+
+
+def _number(value: dict) -> Decimal:
+    return Decimal(value["N"])
+
+
+def _format_number(number: Decimal) -> str:
+    text = format(number, "f")
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return text or "0"
+
+
+def _scalar(value: dict | None):
+    """Comparable Python value of an S/N/B attribute value."""
+    if value is None:
+        return None
+    if "S" in value:
+        return ("S", value["S"])
+    if "N" in value:
+        return ("N", _number(value))
+    if "B" in value:
+        return ("B", value["B"])
+    return ("other", json.dumps(value, sort_keys=True))
+
+
+def _operand(node, item: dict, names: dict, values: dict) -> dict | None:
+    kind = node[0]
+    if kind == "value":
+        if node[1] not in values:
+            raise DynamoError("ValidationException", f"Undefined attribute value {node[1]}")
+        return values[node[1]]
+    if kind == "path":
+        return item.get(_name(node, names))
+    if kind == "size":
+        value = _operand(node[1], item, names, values)
+        if value is None:
+            return None
+        (type_, inner), = value.items()
+        return {"N": str(len(inner))}
+    if kind == "if_not_exists":
+        value = _operand(node[1], item, names, values)
+        return value if value is not None else _operand(node[2], item, names, values)
+    if kind == "list_append":
+        first = _operand(node[1], item, names, values) or {"L": []}
+        second = _operand(node[2], item, names, values) or {"L": []}
+        return {"L": first["L"] + second["L"]}
+    if kind == "arith":
+        left = _operand(node[2], item, names, values)
+        right = _operand(node[3], item, names, values)
+        if left is None or right is None or "N" not in left or "N" not in right:
+            raise DynamoError("ValidationException", "Arithmetic operands must be numbers")
+        result = _number(left) + _number(right) if node[1] == "+" else _number(left) - _number(right)
+        return {"N": _format_number(result)}
+    raise DynamoError("ValidationException", f"Unsupported operand {kind}")
+
+
+def _compare(op: str, left: dict | None, right: dict | None) -> bool:
+    a, b = _scalar(left), _scalar(right)
+    if op == "=":
+        return a is not None and a == b
+    if op == "<>":
+        return a != b
+    if a is None or b is None or a[0] != b[0]:
+        return False
+    return {"<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b}[op]
+
+
+def _eval_condition(node, item: dict, names: dict, values: dict) -> bool:
+    kind = node[0]
+    if kind == "and":
+        return _eval_condition(node[1], item, names, values) and _eval_condition(node[2], item, names, values)
+    if kind == "or":
+        return _eval_condition(node[1], item, names, values) or _eval_condition(node[2], item, names, values)
+    if kind == "not":
+        return not _eval_condition(node[1], item, names, values)
+    if kind == "cmp":
+        return _compare(node[1], _operand(node[2], item, names, values), _operand(node[3], item, names, values))
+    if kind == "between":
+        value = _operand(node[1], item, names, values)
+        return (
+            _compare(">=", value, _operand(node[2], item, names, values))
+            and _compare("<=", value, _operand(node[3], item, names, values))
+        )
+    if kind == "in":
+        value = _operand(node[1], item, names, values)
+        return any(_compare("=", value, _operand(option, item, names, values)) for option in node[2])
+    if kind == "func":
+        name, args = node[1], node[2]
+        if name == "attribute_exists":
+            return _operand(args[0], item, names, values) is not None
+        if name == "attribute_not_exists":
+            return _operand(args[0], item, names, values) is None
+        value = _operand(args[0], item, names, values)
+        other = _operand(args[1], item, names, values)
+        if value is None:
+            return False
+        if name == "attribute_type":
+            return next(iter(value)) == other["S"]
+        if name == "begins_with":
+            return "S" in value and value["S"].startswith(other["S"])
+        if name == "contains":
+            if "S" in value:
+                return other.get("S", "") in value["S"]
+            for set_type in ("SS", "NS", "BS"):
+                if set_type in value:
+                    return next(iter(other.values())) in value[set_type]
+            if "L" in value:
+                return other in value["L"]
+            return False
+    raise DynamoError("ValidationException", f"Unsupported condition {kind}")
+
+
+def _check_condition(request: dict, item: dict):
+    expression = request.get("ConditionExpression")
+    if expression and not _eval_condition(
+        _parsed("condition", expression), item,
+        request.get("ExpressionAttributeNames", {}), request.get("ExpressionAttributeValues", {}),
+    ):
+        raise DynamoError("ConditionalCheckFailedException", "The conditional request failed")
+
+
+def _project(item: dict, request: dict) -> dict:
+    expression = request.get("ProjectionExpression")
+    if not expression:
+        return item
+    names = request.get("ExpressionAttributeNames", {})
+    wanted = [names.get(part.strip(), part.strip()) for part in expression.split(",")]
+    return {name: item[name] for name in wanted if name in item}
+
+
+def _apply_update(item: dict, request: dict) -> set[str]:
+    """Apply UpdateExpression to item in place; returns the attribute names touched."""
+    names = request.get("ExpressionAttributeNames", {})
+    values = request.get("ExpressionAttributeValues", {})
+    source = copy.deepcopy(item)
+    touched = set()
+    for action, path, operand in _parsed("update", request.get("UpdateExpression", "")):
+        name = _name(path, names)
+        touched.add(name)
+        if action == "SET":
+            item[name] = _operand(operand, source, names, values)
+        elif action == "REMOVE":
+            item.pop(name, None)
+        elif action == "ADD":
+            value = _operand(operand, source, names, values)
+            current = item.get(name)
+            if "N" in value:
+                base = _number(current) if current else Decimal(0)
+                item[name] = {"N": _format_number(base + _number(value))}
+            else:
+                (set_type, members), = value.items()
+                existing = current[set_type] if current else []
+                item[name] = {set_type: existing + [m for m in members if m not in existing]}
+        elif action == "DELETE":
+            value = _operand(operand, source, names, values)
+            current = item.get(name)
+            if current:
+                (set_type, members), = value.items()
+                remaining = [m for m in current[set_type] if m not in members]
+                if remaining:
+                    item[name] = {set_type: remaining}
+                else:
+                    item.pop(name)
+    return touched
+
+
+# ─── Tables ───────────────────────────────────────────────────
+
+def _key_schema(schema: list[dict]) -> tuple[str, str | None]:
+    hash_key = next(k["AttributeName"] for k in schema if k["KeyType"] == "HASH")
+    range_key = next((k["AttributeName"] for k in schema if k["KeyType"] == "RANGE"), None)
+    return hash_key, range_key
+
+
+class _Table:
+    def __init__(self, definition: dict):
+        self.definition = definition
+        self.hash_key, self.range_key = _key_schema(definition["KeySchema"])
+        self.indexes = {
+            index["IndexName"]: _key_schema(index["KeySchema"])
+            for index in definition.get("GlobalSecondaryIndexes", []) + definition.get("LocalSecondaryIndexes", [])
+        }
+        # hash value -> (sorted range values, {range value: item})
+        self.partitions: dict[tuple, tuple[list, dict]] = {}
+
+    def key_of(self, key: dict) -> tuple[tuple, tuple | None]:
+        try:
+            hash_value = _scalar(key[self.hash_key])
+            range_value = _scalar(key[self.range_key]) if self.range_key else None
+        except KeyError as e:
+            raise DynamoError("ValidationException", f"Missing key attribute {e.args[0]}")
+        return hash_value, range_value
+
+    def get(self, key: dict) -> dict | None:
+        hash_value, range_value = self.key_of(key)
+        partition = self.partitions.get(hash_value)
+        return partition[1].get(range_value) if partition else None
+
+    def put(self, item: dict) -> dict | None:
+        hash_value, range_value = self.key_of(item)
+        order, items = self.partitions.setdefault(hash_value, ([], {}))
+        old = items.get(range_value)
+        if old is None:
+            if self.range_key:
+                bisect.insort(order, range_value)
+            else:
+                order.append(range_value)
+        items[range_value] = item
+        return old
+
+    def delete(self, key: dict) -> dict | None:
+        hash_value, range_value = self.key_of(key)
+        partition = self.partitions.get(hash_value)
+        if not partition or range_value not in partition[1]:
+            return None
+        order, items = partition
+        order.remove(range_value)
+        old = items.pop(range_value)
+        if not items:
+            del self.partitions[hash_value]
+        return old
+
+    def key_attributes(self, item: dict, index: str | None = None) -> dict:
+        names = [self.hash_key, self.range_key]
+        if index:
+            names.extend(self.indexes[index])
+        return {name: item[name] for name in names if name and name in item}
+
+    def all_items(self) -> list[dict]:
+        result = []
+        for hash_value in sorted(self.partitions):
+            order, items = self.partitions[hash_value]
+            result.extend(items[r] for r in order)
+        return result
+
+    def description(self) -> dict:
+        return {
+            **self.definition,
+            "TableStatus": "ACTIVE",
+            "ItemCount": sum(len(items) for _, items in self.partitions.values()),
+        }
+
+
+class DynamoStore:
+    """All tables of one mock DynamoDB endpoint."""
+
+    def __init__(self):
+        self.tables: dict[str, _Table] = {}
+
+    def table(self, name: str) -> _Table:
+        if name not in self.tables:
+            raise DynamoError("ResourceNotFoundException", f"Requested resource not found: Table: {name} not found")
+        return self.tables[name]
+
+    def handle(self, operation: str, request: dict) -> dict:
+        handler = getattr(self, f"_op_{operation}", None)
+        if handler is None:
+            raise DynamoError("UnknownOperationException", f"Unsupported operation {operation}")
+        return handler(request)
+
+    def _op_CreateTable(self, request):
+        name = request["TableName"]
+        if name in self.tables:
+            raise DynamoError("ResourceInUseException", f"Table already exists: {name}")
+        self.tables[name] = _Table(request)
+        return {"TableDescription": self.tables[name].description()}
+
+    def _op_DescribeTable(self, request):
+        return {"Table": self.table(request["TableName"]).description()}
+
+    def _op_DeleteTable(self, request):
+        table = self.table(request["TableName"])
+        del self.tables[request["TableName"]]
+        return {"TableDescription": table.description()}
+
+    def _op_ListTables(self, request):
+        return {"TableNames": sorted(self.tables)}
+
+    def _op_UpdateTimeToLive(self, request):
+        # Accepted but not enforced: items never expire
+        self.table(request["TableName"])
+        return {"TimeToLiveSpecification": request["TimeToLiveSpecification"]}
+
+    def _op_PutItem(self, request):
+        table = self.table(request["TableName"])
+        item = request["Item"]
+        _check_condition(request, table.get(item) or {})
+        old = table.put(item)
+        return {"Attributes": old} if old and request.get("ReturnValues") == "ALL_OLD" else {}
+
+    def _op_GetItem(self, request):
+        item = self.table(request["TableName"]).get(request["Key"])
+        return {"Item": _project(item, request)} if item else {}
+
+    def _op_DeleteItem(self, request):
+        table = self.table(request["TableName"])
+        _check_condition(request, table.get(request["Key"]) or {})
+        old = table.delete(request["Key"])
+        return {"Attributes": old} if old and request.get("ReturnValues") == "ALL_OLD" else {}
+
+    def _op_UpdateItem(self, request):
+        table = self.table(request["TableName"])
+        old = table.get(request["Key"])
+        _check_condition(request, old or {})
+        item = copy.deepcopy(old) if old else dict(request["Key"])
+        touched = _apply_update(item, request)
+        table.put(item)
+        return_values = request.get("ReturnValues", "NONE")
+        if return_values == "ALL_NEW":
+            return {"Attributes": item}
+        if return_values == "ALL_OLD" and old:
+            return {"Attributes": old}
+        if return_values == "UPDATED_NEW":
+            return {"Attributes": {k: item[k] for k in touched if k in item}}
+        if return_values == "UPDATED_OLD" and old:
+            return {"Attributes": {k: old[k] for k in touched if k in old}}
+        return {}
+
+    def _query_candidates(self, table: _Table, request: dict) -> list[dict]:
+        index = request.get("IndexName")
+        node = _parsed("condition", request["KeyConditionExpression"])
+        names = request.get("ExpressionAttributeNames", {})
+        values = request.get("ExpressionAttributeValues", {})
+        if index:
+            if index not in table.indexes:
+                raise DynamoError("ValidationException", f"Index not found: {index}")
+            hash_key, range_key = table.indexes[index]
+            items = [i for i in table.all_items() if hash_key in i]
+            if range_key:
+                items = [i for i in items if range_key in i]
+                items.sort(key=lambda i: _scalar(i[range_key]))
+        else:
+            hash_value = _hash_value(node, table.hash_key, names, values)
+            if hash_value is None:
+                raise DynamoError("ValidationException", "Query condition missed key schema element")
+            partition = table.partitions.get(hash_value)
+            items = [partition[1][r] for r in partition[0]] if partition else []
+        return [i for i in items if _eval_condition(node, i, names, values)]
+
+    def _op_Query(self, request):
+        table = self.table(request["TableName"])
+        items = self._query_candidates(table, request)
+        if request.get("ScanIndexForward", True) is False:
+            items.reverse()
+        return self._page(table, items, request)
+
+    def _op_Scan(self, request):
+        table = self.table(request["TableName"])
+        return self._page(table, table.all_items(), request)
+
+    def _page(self, table: _Table, items: list[dict], request: dict) -> dict:
+        start = request.get("ExclusiveStartKey")
+        if start:
+            index = request.get("IndexName")
+            start_key = table.key_attributes(start, index)
+            for position, item in enumerate(items):
+                if table.key_attributes(item, index) == start_key:
+                    items = items[position + 1:]
+                    break
+            else:
+                items = []
+        limit = request.get("Limit")
+        last_key = None
+        if limit is not None and len(items) > limit:
+            items = items[:limit]
+            last_key = table.key_attributes(items[-1], request.get("IndexName"))
+        scanned = len(items)
+        filter_expression = request.get("FilterExpression")
+        if filter_expression:
+            node = _parsed("condition", filter_expression)
+            names = request.get("ExpressionAttributeNames", {})
+            values = request.get("ExpressionAttributeValues", {})
+            items = [i for i in items if _eval_condition(node, i, names, values)]
+        response = {"Count": len(items), "ScannedCount": scanned}
+        if request.get("Select") != "COUNT":
+            response["Items"] = [_project(i, request) for i in items]
+        if last_key:
+            response["LastEvaluatedKey"] = last_key
+        return response
+
+    def _op_BatchWriteItem(self, request):
+        for name, writes in request["RequestItems"].items():
+            table = self.table(name)
+            for write in writes:
+                if "PutRequest" in write:
+                    table.put(write["PutRequest"]["Item"])
+                else:
+                    table.delete(write["DeleteRequest"]["Key"])
+        return {"UnprocessedItems": {}}
+
+    def _op_BatchGetItem(self, request):
+        responses = {}
+        for name, spec in request["RequestItems"].items():
+            table = self.table(name)
+            found = [table.get(key) for key in spec["Keys"]]
+            responses[name] = [_project(item, spec) for item in found if item]
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+    def _op_TransactGetItems(self, request):
+        responses = []
+        for entry in request["TransactItems"]:
+            spec = entry["Get"]
+            item = self.table(spec["TableName"]).get(spec["Key"])
+            responses.append({"Item": _project(item, spec)} if item else {})
+        return {"Responses": responses}
+
+    def _op_TransactWriteItems(self, request):
+        # Validate every condition before applying anything
+        reasons = []
+        staged = []
+        for entry in request["TransactItems"]:
+            (action, spec), = entry.items()
+            table = self.table(spec["TableName"])
+            key = spec["Item"] if action == "Put" else spec["Key"]
+            current = table.get(key)
+            try:
+                _check_condition(spec, current or {})
+                reasons.append({"Code": "None"})
+            except DynamoError as e:
+                reasons.append({"Code": "ConditionalCheckFailed", "Message": e.message})
+            staged.append((action, spec, table, current))
+        if any(reason["Code"] != "None" for reason in reasons):
+            raise DynamoError(
+                "TransactionCanceledException",
+                "Transaction cancelled, please refer cancellation reasons for specific reasons",
+                {"CancellationReasons": reasons},
+            )
+        for action, spec, table, current in staged:
+            if action == "Put":
+                table.put(spec["Item"])
+            elif action == "Delete":
+                table.delete(spec["Key"])
+            elif action == "Update":
+                item = copy.deepcopy(current) if current else dict(spec["Key"])
+                _apply_update(item, spec)
+                table.put(item)
+        return {}
+
+
+def _hash_value(node, hash_key: str, names: dict, values: dict):
+    """Find the partition key equality in a KeyConditionExpression."""
+    if node[0] == "and":
+        for child in node[1:]:
+            found = _hash_value(child, hash_key, names, values)
+            if found is not None:
+                return found
+        return None
+    if node[0] == "cmp" and node[1] == "=" and node[2][0] == "path" and _name(node[2], names) == hash_key:
+        return _scalar(_operand(node[3], {}, names, values))
+    return None
+
+
+def _error_body(error: DynamoError) -> dict:
+    return {"__type": f"com.amazonaws.dynamodb.v20120810#{error.code}", "message": error.message, **error.extra}
+
+
+def handle_request(store: DynamoStore, target: str, body: bytes) -> tuple[int, bytes]:
+    """Serve one wire-protocol request; target is the X-Amz-Target header."""
+    operation = target.rpartition(".")[2]
+    try:
+        request = json.loads(body or b"{}")
+        return 200, json.dumps(store.handle(operation, request)).encode()
+    except DynamoError as e:
+        return 400, json.dumps(_error_body(e)).encode()
+
+
+# ─── Transports ───────────────────────────────────────────────
+
+def create_app(store: DynamoStore | None = None, latency_ms: float = 0.0):
+    """ASGI app serving a store over HTTP, like DynamoDB Local.
+
+    latency_ms delays every response, standing in for the round trip to a
+    remote region.
+    """
+    store = store or DynamoStore()
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        headers = dict(scope["headers"])
+        status, payload = handle_request(store, headers.get(b"x-amz-target", b"").decode(), body)
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/x-amz-json-1.0"), (b"content-length", str(len(payload)).encode())],
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+    app.store = store
+    return app
+
+
+def attach(client, store: DynamoStore):
+    """Answer every request of a botocore DynamoDB client from store, without HTTP."""
+    from botocore.awsrequest import AWSResponse
+
+    class _Raw:
+        def __init__(self, payload: bytes):
+            self._payload = payload
+
+        def stream(self, **kwargs):
+            yield self._payload
+
+    def before_send(request, **kwargs):
+        target = request.headers.get("X-Amz-Target", b"")
+        target = target.decode() if isinstance(target, bytes) else target
+        body = request.body.read() if hasattr(request.body, "read") else request.body
+        status, payload = handle_request(store, target, body)
+        return AWSResponse(request.url, status, {"content-type": "application/x-amz-json-1.0"}, _Raw(payload))
+
+    client.meta.events.register("before-send.dynamodb", before_send)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="In-memory DynamoDB stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every response")
+    args = parser.parse_args()
+    uvicorn.run(create_app(latency_ms=args.latency_ms), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Mock OpenAI chat-completions server with configurable latency and jitter.
+
+Answers POST /v1/chat/completions, streaming or not, by echoing the last
+user message prefixed with the target language from the translation
+prompt, so benchmark message tokens survive "translation". Each response
+waits latency ± jitter before the first token; streamed responses then
+emit one word every --token-ms.
+
+Run with ``python -m bench.mock_openai --port 8001 --latency-ms 300`` and
+set OPENAI_BASE_URL=http://127.0.0.1:8001/v1 for the app.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+_TARGET_RE = re.compile(r"\bto (\w+)\.")
+
+
+def completion_text(messages: list[dict]) -> str:
+    """The mock "translation": the user text tagged with the requested target language."""
+    system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+    user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    target = _TARGET_RE.search(system)
+    return f"[{target.group(1)}] {user}" if target else user
+
+
+def response_delay(latency_ms: float, jitter_ms: float, rng: random.Random = random) -> float:
+    """Seconds to wait before the first token: latency ± uniform jitter, never negative."""
+    return max(latency_ms + rng.uniform(-jitter_ms, jitter_ms), 0.0) / 1000
+
+
+def _usage(messages: list[dict], text: str) -> dict:
+    prompt = sum(len(m.get("content", "").split()) for m in messages)
+    completion = len(text.split())
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+def create_app(latency_ms: float = 300.0, jitter_ms: float = 100.0, token_ms: float = 10.0):
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        if scope["method"] != "POST" or not scope["path"].endswith("/chat/completions"):
+            await send({"type": "http.response.start", "status": 404, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        request = json.loads(body)
+        messages = request.get("messages", [])
+        text = completion_text(messages)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = request.get("model", "mock")
+        await asyncio.sleep(response_delay(latency_ms, jitter_ms))
+
+        if not request.get("stream"):
+            payload = json.dumps({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": _usage(messages, text),
+            }).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            })
+            await send({"type": "http.response.body", "body": payload})
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream")],
+        })
+
+        async def event(data: dict | str):
+            encoded = data if isinstance(data, str) else json.dumps(data)
+            await send({"type": "http.response.body", "body": f"data: {encoded}\n\n".encode(), "more_body": True})
+
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(token_ms / 1000)
+            await event({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": word if i == 0 else f" {word}"},
+                    "finish_reason": None,
+                }],
+            })
+        if (request.get("stream_options") or {}).get("include_usage"):
+            await event({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": _usage(messages, text),
+            })
+        await event("[DONE]")
+        await send({"type": "http.response.body", "body": b""})
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Mock OpenAI chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="mean delay before the first token")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="uniform ± spread around the latency")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="delay between streamed words")
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(args.latency_ms, args.jitter_ms, args.token_ms),
+        host=args.host, port=args.port, log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Worker cold-start benchmark: import time and time to first request.
+
+Import time is measured in fresh interpreters (``import app.main``), with
+the packages it spends that time in listed from ``python -X importtime``.
+Time to first request is measured from spawning ``uvicorn app.main:app`` to the
+first 200 from /api/health, against the in-memory DynamoDB stand-in with
+--dynamodb-latency-ms of round trip, in three table-bootstrap modes:
+
+* ``missing``: no tables exist, so startup creates all of them
+* ``existing``: tables exist, so startup only describes them
+* ``skip``: DYNAMODB_CREATE_TABLES=false
+
+Room agents and metrics are off, so Redis is not needed.
+
+    python -m bench.startup --runs 5 --dynamodb-latency-ms 20
+"""
+import argparse
+import http.client
+import json
+import subprocess
+import sys
+import time
+
+import boto3
+
+from bench.common import BACKEND_DIR, free_port, spawn, stop, summarize_ms, wait_for_port
+
+MODES = ("missing", "existing", "skip")
+
+_IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+_BENCH_JWT_SECRET = "bench-secret-not-for-production-use"
+
+
+def measure_import(runs: int) -> list[float]:
+    """Seconds to import app.main in each of runs fresh interpreters."""
+    return [
+        float(subprocess.run(
+            [sys.executable, "-c", _IMPORT_SNIPPET], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1])
+        for _ in range(runs)
+    ]
+
+
+def import_costs(stderr: str, module: str = "app.main") -> list[tuple[str, float]]:
+    """Cumulative seconds per top-level package imported under module, slowest first.
+
+    Parses ``-X importtime`` output, which lists each import after the
+    imports it triggered, indented by nesting depth. Each package the app's
+    own modules import is charged with everything it pulls in that was not
+    already loaded.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            entries.append((len(name) - len(name.lstrip()), name.strip(), int(cumulative) / 1_000_000))
+
+    app_package = module.split(".")[0]
+    costs: dict[str, float] = {}
+    # Walk in reverse so each import is seen right after the one that triggered it
+    stack: list[tuple[int, str]] = []
+    for indent, name, seconds in reversed(entries):
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        package = name.split(".")[0]
+        parent = stack[-1][1].split(".")[0] if stack else None
+        if stack and stack[0][1] == module and parent == app_package != package:
+            costs[package] = costs.get(package, 0.0) + seconds
+        stack.append((indent, name))
+    return sorted(costs.items(), key=lambda item: item[1], reverse=True)
+
+
+def slowest_imports(top: int) -> list[tuple[str, float]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    return import_costs(proc.stderr)[:top]
+
+
+def _get_status(port: int, path: str) -> int | None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+    try:
+        conn.request("GET", path)
+        return conn.getresponse().status
+    except OSError:
+        return None
+    finally:
+        conn.close()
+
+
+def time_to_first_request(env: dict[str, str], timeout: float = 60.0) -> float:
+    """Seconds from spawning the server to its first successful /api/health response."""
+    port = free_port()
+    start = time.perf_counter()
+    proc = spawn(
+        ["-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited with code {proc.returncode}")
+            if _get_status(port, "/api/health") == 200:
+                return time.perf_counter() - start
+            time.sleep(0.005)
+        raise TimeoutError(f"server not ready after {timeout:.0f}s")
+    finally:
+        stop(proc)
+
+
+def _drop_tables(endpoint: str):
+    client = boto3.client(
+        "dynamodb", endpoint_url=endpoint, region_name="us-east-1",
+        aws_access_key_id="local", aws_secret_access_key="local",
+    )
+    for name in client.list_tables()["TableNames"]:
+        client.delete_table(TableName=name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker import time and time to first request")
+    parser.add_argument("--runs", type=int, default=5, help="repetitions of each measurement")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"table bootstrap modes ({', '.join(MODES)})")
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=20.0, help="round trip added by the DynamoDB stand-in")
+    parser.add_argument("--top", type=int, default=10, help="slowest imported packages to list")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    if unknown := set(modes) - set(MODES):
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    report = {
+        "import_ms": summarize_ms(measure_import(args.runs)),
+        "slowest_imports_ms": {name: round(seconds * 1000, 1) for name, seconds in slowest_imports(args.top)},
+        "first_request_ms": {},
+    }
+    print(f"import app.main: p50={report['import_ms']['p50']} ms max={report['import_ms']['max']} ms")
+    for name, ms in report["slowest_imports_ms"].items():
+        print(f"  {name:<32} {ms:>8} ms")
+
+    dynamo_port = free_port()
+    dynamo = spawn(["-m", "bench.mock_dynamodb", "--port", str(dynamo_port),
+                    "--latency-ms", str(args.dynamodb_latency_ms)])
+    try:
+        wait_for_port(dynamo_port, dynamo)
+        endpoint = f"http://127.0.0.1:{dynamo_port}"
+        env = {
+            "DYNAMODB_ENDPOINT": endpoint,
+            "AWS_ACCESS_KEY_ID": "local",
+            "AWS_SECRET_ACCESS_KEY": "local",
+            "JWT_SECRET": _BENCH_JWT_SECRET,
+            "ENVIRONMENT": "development",
+            "VOICE_RUN_AGENTS": "false",
+            "METRICS_ENABLED": "false",
+            "LOG_LEVEL": "WARNING",
+        }
+        for mode in modes:
+            samples = []
+            for _ in range(args.runs):
+                if mode == "missing":
+                    _drop_tables(endpoint)
+                samples.append(time_to_first_request(
+                    {**env, "DYNAMODB_CREATE_TABLES": "false" if mode == "skip" else "true"},
+                ))
+            report["first_request_ms"][mode] = summarize_ms(samples)
+            summary = report["first_request_ms"][mode]
+            print(f"first request ({mode} tables): p50={summary['p50']} ms max={summary['max']} ms")
+    finally:
+        stop(dynamo)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""Offline walkie-talkie pipeline benchmark.
+
+Runs the real _run_walkie_talkie_turn (VAD, STT streaming, streaming
+translation, phrase chunking, TTS, rechunking and LiveKit AudioSource
+pacing) with LiveKit's Room replaced by an in-process fake and ElevenLabs
+and OpenAI replaced by the local stand-ins in bench.fake_elevenlabs and
+bench.mock_openai, each in its own process so their CPU is not counted.
+
+Speaker audio is synthetic speech-like PCM, or a recorded 16-bit mono WAV
+(--wav), replayed in real time through an AudioStream-compatible fake. For
+each room count in --rooms, that many rooms run --turns turns
+concurrently; the report gives per-stage timings (from TurnTrace) and the
+benchmark process's CPU per concurrent room.
+
+    python -m bench.voice_pipeline --rooms 1,4,16 --turns 5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import time
+import uuid
+import wave
+from array import array
+
+from bench.common import free_port, spawn, stop, summarize_ms, wait_for_port
+
+_FRAME_MS = 10
+
+
+def synthetic_speech(sample_rate: int, speech_ms: float, silence_ms: float = 200.0) -> bytes:
+    """Voiced, syllable-modulated harmonics between leading and trailing silence.
+
+    Loud and low in zero crossings, so the VAD treats it as speech.
+    """
+    silence = bytes(int(sample_rate * silence_ms / 1000) * 2)
+    samples = int(sample_rate * speech_ms / 1000)
+    f0 = 140.0
+    voiced = array("h")
+    for i in range(samples):
+        t = i / sample_rate
+        envelope = 0.55 + 0.45 * math.sin(2 * math.pi * 4 * t)
+        value = sum(math.sin(2 * math.pi * f0 * h * t) / h for h in (1, 2, 3, 4))
+        voiced.append(int(6000 * envelope * value))
+    return silence + voiced.tobytes() + silence
+
+
+def load_wav(path: str) -> tuple[bytes, int]:
+    """PCM and sample rate of a 16-bit mono WAV whose rate the pipeline accepts."""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2 or f.getnchannels() != 1:
+            raise ValueError("WAV must be 16-bit mono")
+        rate = f.getframerate()
+        if rate % 16000:
+            raise ValueError("WAV sample rate must be a multiple of 16 kHz")
+        return f.readframes(f.getnframes()), rate
+
+
+class FakeAudioStream:
+    """Replays PCM as rtc.AudioFrameEvent frames in real time, like rtc.AudioStream.
+
+    When the audio runs out, push-to-talk is released: recording_active is
+    cleared and iteration stops.
+    """
+
+    def __init__(self, pcm: bytes, sample_rate: int, recording_active: asyncio.Event):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.recording_active = recording_active
+
+    def __aiter__(self):
+        return self._frames()
+
+    async def _frames(self):
+        from livekit import rtc
+
+        samples_per_frame = self.sample_rate * _FRAME_MS // 1000
+        frame_bytes = samples_per_frame * 2
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for index, offset in enumerate(range(0, len(self.pcm) - frame_bytes + 1, frame_bytes)):
+            delay = start + index * _FRAME_MS / 1000 - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield rtc.AudioFrameEvent(rtc.AudioFrame(
+                data=self.pcm[offset:offset + frame_bytes],
+                sample_rate=self.sample_rate,
+                num_channels=1,
+                samples_per_channel=samples_per_frame,
+            ))
+        self.recording_active.clear()
+
+    async def aclose(self):
+        pass
+
+
+class _FakePublication:
+    def __init__(self, track):
+        self.sid = f"TR_{uuid.uuid4().hex[:12]}"
+        self.track = track
+
+
+class _FakeLocalParticipant:
+    def __init__(self):
+        self.published: dict[str, _FakePublication] = {}
+        self.data_messages = 0
+
+    async def publish_track(self, track, options=None):
+        publication = _FakePublication(track)
+        self.published[publication.sid] = publication
+        return publication
+
+    async def unpublish_track(self, sid: str):
+        self.published.pop(sid, None)
+
+    def set_track_subscription_permissions(self, **kwargs):
+        pass
+
+    async def publish_data(self, payload, **kwargs):
+        self.data_messages += 1
+
+
+class FakeRoom:
+    """The part of rtc.Room the turn pipeline touches."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.local_participant = _FakeLocalParticipant()
+
+
+def _members(languages: list[str], listeners: int) -> dict[str, dict]:
+    members = {"speaker": {"userId": "speaker", "username": "speaker", "nativeLanguage": languages[0]}}
+    targets = languages[1:] or languages
+    for i in range(listeners):
+        uid = f"listener-{i}"
+        members[uid] = {"userId": uid, "username": uid, "nativeLanguage": targets[i % len(targets)]}
+    return members
+
+
+async def _run_room(index: int, args, pcm: bytes, sample_rate: int, traces: list):
+    from app.voice import service
+    from app.voice.trace import TurnTrace
+
+    room = FakeRoom(f"bench-room-{index}")
+    permissions = service._TrackPermissions(room.local_participant)
+    members = _members(args.languages, args.listeners)
+
+    async def publish_signal(signal, destinations=None, **kwargs):
+        await room.local_participant.publish_data(signal, destination_identities=destinations or [])
+
+    # Stagger rooms so turns do not all start on the same tick
+    await asyncio.sleep(index * args.stagger_ms / 1000)
+    for _ in range(args.turns):
+        recording_active = asyncio.Event()
+        recording_active.set()
+        trace = TurnTrace(room.name, "speaker")
+        try:
+            await service._run_walkie_talkie_turn(
+                room, FakeAudioStream(pcm, sample_rate, recording_active), "speaker", members,
+                recording_active, publish_signal, asyncio.Event(), permissions, trace,
+            )
+        except Exception:
+            trace.outcome = "error"
+            logging.getLogger(__name__).exception("Turn failed in %s", room.name)
+        finally:
+            trace.finish()
+        traces.append(trace)
+        await asyncio.sleep(args.turn_gap_ms / 1000)
+
+
+async def run_level(rooms: int, args, pcm: bytes, sample_rate: int) -> dict:
+    """Run rooms concurrently and report stage timings and CPU."""
+    traces = []
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(_run_room(i, args, pcm, sample_rate, traces) for i in range(rooms)))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    by_step: dict[str, list[float]] = {}
+    for trace in traces:
+        for step, _, seconds in trace.steps():
+            by_step.setdefault(step, []).append(seconds)
+    outcomes: dict[str, int] = {}
+    for trace in traces:
+        outcomes[trace.outcome] = outcomes.get(trace.outcome, 0) + 1
+    return {
+        "rooms": rooms,
+        "turns": len(traces),
+        "outcomes": outcomes,
+        "wall_seconds": round(wall, 2),
+        "cpu_seconds": round(cpu, 3),
+        # Fraction of one core each room keeps busy while its turns run
+        "cpu_per_room": round(cpu / wall / rooms, 4),
+        "cpu_ms_per_turn": round(cpu / max(len(traces), 1) * 1000, 1),
+        "steps_ms": {step: summarize_ms(values) for step, values in by_step.items()},
+    }
+
+
+def check_thresholds(levels: list[dict], max_p95_first_audio_ms: float | None) -> list[str]:
+    """Failed turns and p95 speech-end-to-first-audio over the limit, per level."""
+    failures = []
+    for level in levels:
+        if level["outcomes"].get("error"):
+            failures.append(f"{level['outcomes']['error']} turns failed at rooms={level['rooms']}")
+        p95 = level["steps_ms"].get("speech_end_to_first_audio", {}).get("p95")
+        if max_p95_first_audio_ms is not None and (p95 is None or p95 > max_p95_first_audio_ms):
+            failures.append(f"p95 speech_end_to_first_audio {p95} ms > {max_p95_first_audio_ms} ms "
+                            f"at rooms={level['rooms']}")
+    return failures
+
+
+def _print_level(level: dict):
+    print(f"rooms={level['rooms']} turns={level['turns']} outcomes={level['outcomes']} "
+          f"cpu/room={level['cpu_per_room']:.2%} cpu/turn={level['cpu_ms_per_turn']} ms")
+    for step, summary in level["steps_ms"].items():
+        if summary["count"]:
+            print(f"  {step:<26} p50={summary['p50']:>8} p95={summary['p95']:>8} "
+                  f"p99={summary['p99']:>8} max={summary['max']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline walkie-talkie pipeline benchmark")
+    parser.add_argument("--rooms", default="1,2,4,8", help="comma-separated concurrent room counts")
+    parser.add_argument("--turns", type=int, default=3, help="turns per room at each level")
+    parser.add_argument("--listeners", type=int, default=1, help="listeners per room")
+    parser.add_argument("--languages", default="en,es", help="speaker language, then listener languages")
+    parser.add_argument("--wav", help="16-bit mono WAV to replay instead of synthetic speech")
+    parser.add_argument("--speech-ms", type=float, default=2000.0, help="synthetic utterance length")
+    parser.add_argument("--turn-gap-ms", type=float, default=200.0)
+    parser.add_argument("--stagger-ms", type=float, default=37.0, help="start offset between rooms")
+    parser.add_argument("--openai-latency-ms", type=float, default=250.0)
+    parser.add_argument("--openai-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--openai-token-ms", type=float, default=15.0)
+    parser.add_argument("--fake-args", default="", help="extra options for bench.fake_elevenlabs, e.g. \"--stt-finalize-ms 400\"")
+    parser.add_argument("--tts-cache", action="store_true", help="leave the TTS cache enabled (needs Redis if shared)")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    parser.add_argument("--max-p95-first-audio-ms", type=float,
+                        help="fail if p95 speech_end_to_first_audio exceeds this at any level")
+    args = parser.parse_args()
+    args.languages = [lang.strip() for lang in args.languages.split(",") if lang.strip()]
+    levels = [int(n) for n in args.rooms.split(",")]
+
+    if args.wav:
+        pcm, sample_rate = load_wav(args.wav)
+    else:
+        sample_rate = 48000
+        pcm = synthetic_speech(sample_rate, args.speech_ms)
+
+    processes = []
+    try:
+        openai_port = free_port()
+        processes.append(spawn([
+            "-m", "bench.mock_openai", "--port", str(openai_port),
+            "--latency-ms", str(args.openai_latency_ms), "--jitter-ms", str(args.openai_jitter_ms),
+            "--token-ms", str(args.openai_token_ms),
+        ]))
+        wait_for_port(openai_port, processes[-1])
+        eleven_port = free_port()
+        processes.append(spawn(["-m", "bench.fake_elevenlabs", "--port", str(eleven_port), *args.fake_args.split()]))
+        wait_for_port(eleven_port, processes[-1])
+
+        # Settings are read when app modules are first imported
+        os.environ.update({
+            "OPENAI_API_KEY": "bench",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+            "ELEVENLABS_API_KEY": "bench",
+            "ELEVENLABS_WS_URL": f"ws://127.0.0.1:{eleven_port}",
+            "TTS_CACHE_ENABLED": "true" if args.tts_cache else "false",
+            "METRICS_ENABLED": "false",
+        })
+        logging.basicConfig(level=logging.WARNING, format="%(levelname)s:%(name)s: %(message)s")
+
+        async def run_all():
+            # One unmeasured turn pays for imports, client setup and first connections
+            warmup = argparse.Namespace(**{**vars(args), "turns": 1})
+            await run_level(1, warmup, pcm, sample_rate)
+            results = []
+            for rooms in levels:
+                level = await run_level(rooms, args, pcm, sample_rate)
+                _print_level(level)
+                results.append(level)
+            return results
+
+        report = {
+            "config": {
+                "turns": args.turns,
+                "listeners": args.listeners,
+                "languages": args.languages,
+                "audio_ms": round(len(pcm) / 2 / sample_rate * 1000),
+                "fake_args": args.fake_args,
+            },
+            "levels": asyncio.run(run_all()),
+        }
+    finally:
+        for proc in reversed(processes):
+            stop(proc)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    failures = check_thresholds(report["levels"], args.max_p95_first_audio_ms)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,63 @@
+import boto3
+import fakeredis
 import pytest
 
 
+def make_user(user_id, lang):
+    """A user record as the auth layer returns it, with the username equal to the id."""
+    return {"userId": user_id, "username": user_id, "nativeLanguage": lang}
+
+
 @pytest.fixture
 def app():
     from app.main import app
     return app
+
+
+@pytest.fixture
+def dynamo(monkeypatch):
+    """A boto3 resource backed by the in-memory DynamoDB stand-in, with every table created.
+
+    Chat, auth and profile code is pointed at it.
+    """
+    from app.auth import profiles, service as auth_service
+    from app.chat import compaction, previews, service as chat_service
+    from app.db.dynamo import TABLE_DEFINITIONS
+    from bench.mock_dynamodb import DynamoStore, attach
+
+    resource = boto3.resource(
+        "dynamodb", endpoint_url="http://mock-dynamodb", region_name="us-east-1",
+        aws_access_key_id="local", aws_secret_access_key="local",
+    )
+    attach(resource.meta.client, DynamoStore())
+    for definition in TABLE_DEFINITIONS:
+        resource.meta.client.create_table(**definition)
+    for module in (chat_service, compaction, previews, auth_service, profiles):
+        monkeypatch.setattr(module, "get_dynamo_client", lambda: resource)
+    return resource
+
+
+@pytest.fixture(autouse=True)
+def search_redis(monkeypatch):
+    """Back the search index with an in-memory Redis, shared by its sync and async clients."""
+    from app.search import service as search_service
+
+    server = fakeredis.FakeServer()
+    sync_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+
+    async def async_client():
+        return fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+
+    monkeypatch.setattr(search_service, "get_redis_sync_client", lambda: sync_client)
+    monkeypatch.setattr(search_service, "get_redis_client", async_client)
+    return sync_client
+
+
+@pytest.fixture(autouse=True)
+def preview_buffer(monkeypatch):
+    """Start every test with an empty inbox preview buffer."""
+    from app.chat import previews
+
+    pending = {}
+    monkeypatch.setattr(previews, "_pending", pending)
+    return pending
@@ -0,0 +1,123 @@
+"""Tests for batched, cached user-profile loading."""
+import asyncio
+
+import pytest
+
+from app.auth import profiles, service as auth_service
+from app.auth.profiles import ProfileCache, ProfileLoadError, ProfileLoader
+
+
+class _FakeDynamo:
+    """Serves batch_get_item from a dict, optionally leaving keys unprocessed."""
+
+    def __init__(self, users, unprocessed_rounds=0):
+        self.users = users
+        self.unprocessed_rounds = unprocessed_rounds
+        self.calls = []
+
+    def batch_get_item(self, RequestItems):
+        request = RequestItems["users"]
+        keys = request["Keys"]
+        self.calls.append(len(keys))
+        if self.unprocessed_rounds:
+            self.unprocessed_rounds -= 1
+            served, rest = keys[:1], keys[1:]
+        else:
+            served, rest = keys, []
+        found = [
+            self.users[k["PK"].removeprefix("USER#")]
+            for k in served
+            if k["PK"].removeprefix("USER#") in self.users
+        ]
+        resp = {"Responses": {"users": found}}
+        if rest:
+            resp["UnprocessedKeys"] = {"users": {**request, "Keys": rest}}
+        return resp
+
+
+def _users(n):
+    return {f"u{i}": {"userId": f"u{i}", "username": f"user{i}", "nativeLanguage": "en"} for i in range(n)}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(profiles.time, "sleep", lambda seconds: None)
+
+
+def test_batch_get_chunks_at_100_keys(monkeypatch):
+    dynamo = _FakeDynamo(_users(250))
+    monkeypatch.setattr(profiles, "get_dynamo_client", lambda: dynamo)
+
+    result = profiles.batch_get_users([f"u{i}" for i in range(250)] + ["u0", "missing"])
+
+    assert dynamo.calls == [100, 100, 51]
+    assert len(result) == 250
+
+
+def test_batch_get_retries_unprocessed_keys(monkeypatch):
+    dynamo = _FakeDynamo(_users(3), unprocessed_rounds=2)
+    monkeypatch.setattr(profiles, "get_dynamo_client", lambda: dynamo)
+
+    assert set(profiles.batch_get_users(["u0", "u1", "u2"])) == {"u0", "u1", "u2"}
+    assert dynamo.calls == [3, 2, 1]
+
+
+def test_batch_get_gives_up_after_retries(monkeypatch):
+    dynamo = _FakeDynamo(_users(10), unprocessed_rounds=100)
+    monkeypatch.setattr(profiles, "get_dynamo_client", lambda: dynamo)
+
+    with pytest.raises(ProfileLoadError):
+        profiles.batch_get_users([f"u{i}" for i in range(10)])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_share_one_batch(monkeypatch):
+    dynamo = _FakeDynamo(_users(5))
+    monkeypatch.setattr(profiles, "get_dynamo_client", lambda: dynamo)
+    loader = ProfileLoader(ProfileCache(ttl_seconds=60, max_entries=100))
+
+    results = await asyncio.gather(
+        loader.load("u0"), loader.load("u1"), loader.load("u0"), loader.load("missing"),
+    )
+
+    assert [r["userId"] if r else None for r in results] == ["u0", "u1", "u0", None]
+    assert dynamo.calls == [3]
+
+    # Second round is served from the cache
+    assert set(await loader.load_many(["u0", "u1"])) == {"u0", "u1"}
+    assert dynamo.calls == [3]
+
+
+def test_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(profiles.time, "monotonic", lambda: now[0])
+    cache = ProfileCache(ttl_seconds=10, max_entries=2)
+    cache.put("a", {"userId": "a"})
+    cache.put("b", {"userId": "b"})
+    cache.get("a")
+    cache.put("c", {"userId": "c"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"userId": "a"}
+    now[0] += 11
+    assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_usernames_resolve_to_profiles_in_one_batch(dynamo, monkeypatch):
+    monkeypatch.setattr(profiles, "_profile_loader", None)
+    users = [auth_service.create_user(name, "pw", name, "", "en") for name in ("ann", "ben", "cy")]
+    batches = []
+    batch_get_users = profiles.batch_get_users
+
+    def record(user_ids):
+        batches.append(user_ids)
+        return batch_get_users(user_ids)
+
+    monkeypatch.setattr(profiles, "batch_get_users", record)
+
+    found = await profiles.load_profiles_by_username(["ann", "cy", "nobody", "ann"])
+
+    assert {name: p["userId"] for name, p in found.items()} == {"ann": users[0]["userId"], "cy": users[2]["userId"]}
+    assert "passwordHash" not in found["ann"]
+    assert len(batches) == 1
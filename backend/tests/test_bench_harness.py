@@ -0,0 +1,99 @@
+"""Tests for the benchmark stand-ins and report math."""
+import pytest
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+from app.auth import profiles, service as auth_service
+from app.chat import service as chat_service
+from bench.chat_load import histogram_delta, histogram_quantile, parse_histogram
+from bench.common import percentile, summarize_ms
+from bench.mock_openai import completion_text, response_delay
+from bench.startup import import_costs
+from tests.conftest import make_user
+
+
+def test_mock_dynamodb_serves_chat_write_and_read_paths(dynamo, monkeypatch):
+    monkeypatch.setattr(chat_service, "translate_text", lambda text, source, target: f"[{target}] {text}")
+    alice, bob = make_user("alice", "en"), make_user("bob", "es")
+    chat_id = chat_service.create_chat(alice, bob)
+    assert chat_service.get_chat_meta(chat_id)["memberUserIds"] == ["alice", "bob"]
+
+    for i in range(3):
+        chat_service.send_message(chat_id, alice, [bob], f"hello {i}")
+
+    page, cursor = chat_service.get_messages("bob", chat_id, limit=2)
+    assert [m["text"] for m in page] == ["[es] hello 2", "[es] hello 1"]
+    older, cursor = chat_service.get_messages("bob", chat_id, cursor=cursor, limit=2)
+    assert [m["text"] for m in older] == ["[es] hello 0"]
+    assert cursor is None
+
+    inbox = chat_service.list_user_chats("bob")
+    assert inbox[0]["lastMessagePreview"] == "[es] hello 2"
+
+
+def test_mock_dynamodb_conditions_indexes_and_projections(dynamo):
+    user = auth_service.create_user("carol", "pw-123456", "Carol", "C", "fr")
+    assert auth_service.get_user_by_username("carol")["userId"] == user["userId"]
+    with pytest.raises(ClientError) as exc:
+        dynamo.Table("users").put_item(Item={"PK": f"USER#{user['userId']}", "SK": "PROFILE"},
+                                       ConditionExpression=Attr("PK").not_exists())
+    assert exc.value.response["Error"]["Code"] == "ConditionalCheckFailedException"
+
+    loaded = profiles.batch_get_users([user["userId"], "missing"])
+    assert set(loaded) == {user["userId"]}
+    assert "passwordHash" not in loaded[user["userId"]]
+
+    table = dynamo.Table("user_chats")
+    table.update_item(
+        Key={"PK": "USER#u", "SK": "CHAT#c"},
+        UpdateExpression="SET unread = if_not_exists(unread, :zero) + :one",
+        ExpressionAttributeValues={":zero": 0, ":one": 1},
+    )
+    resp = table.update_item(
+        Key={"PK": "USER#u", "SK": "CHAT#c"},
+        UpdateExpression="ADD unread :one",
+        ExpressionAttributeValues={":one": 1},
+        ReturnValues="ALL_NEW",
+    )
+    assert resp["Attributes"]["unread"] == 2
+    resp = table.query(KeyConditionExpression=Key("PK").eq("USER#u") & Key("SK").begins_with("CHAT#"))
+    assert resp["Count"] == 1
+
+
+def test_mock_openai_echoes_text_with_target_language():
+    messages = chat_service._translation_messages("bench:abc hi", "en", "es")
+    assert completion_text(messages) == "[es] bench:abc hi"
+    assert response_delay(100, 50) <= 0.15
+    assert response_delay(10, 50) >= 0.0
+
+
+def test_percentiles_and_histogram_quantiles():
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert summarize_ms(values)["p95"] == 95.0
+
+    def scrape(counts):
+        lines = [f'event_loop_lag_seconds_bucket{{le="{le}"}} {c}' for le, c in zip(("0.01", "0.1", "+Inf"), counts)]
+        lines += [f"event_loop_lag_seconds_sum {counts[-1] * 0.01}", f"event_loop_lag_seconds_count {counts[-1]}"]
+        return parse_histogram("\n".join(lines), "event_loop_lag_seconds")
+
+    delta = histogram_delta(scrape([10, 10, 10]), scrape([100, 109, 110]))
+    assert delta["count"] == 100
+    assert histogram_quantile(delta, 0.5) == 0.01
+    assert histogram_quantile(delta, 0.99) == 0.1
+
+
+def test_import_costs_charges_packages_where_they_are_entered():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       500 |        500 | site",
+        "import time:       100 |        100 |       starlette.routing",
+        "import time:       200 |        300 |     fastapi.routing",
+        "import time:        50 |        350 |   fastapi",
+        "import time:        40 |         40 |     botocore",
+        "import time:        60 |        100 |   boto3",
+        "import time:        10 |         10 |   app.config",
+        "import time:        20 |        480 | app.main",
+    ])
+    assert import_costs(stderr) == [("fastapi", 0.00035), ("boto3", 0.0001)]
@@ -0,0 +1,80 @@
+"""Tests for the offline voice-pipeline benchmark and its fake ElevenLabs server."""
+import argparse
+import asyncio
+import base64
+import json
+
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+
+from app.voice.vad import is_speech
+from bench.fake_elevenlabs import FakeElevenLabs, tone_pcm
+from bench.voice_pipeline import FakeAudioStream, check_thresholds, synthetic_speech
+
+
+def _fake_args(**overrides) -> argparse.Namespace:
+    defaults = dict(
+        connect_ms=0.0, jitter_ms=0.0, transcript="hello there", stt_partial_ms=100.0,
+        stt_finalize_ms=0.0, tts_first_audio_ms=0.0, tts_ms_per_char=50.0, tts_chunk_ms=100.0,
+        tts_speed=100.0, tts_sample_rate=24000,
+    )
+    return argparse.Namespace(**{**defaults, **overrides})
+
+
+def test_synthetic_speech_is_speech_between_silences():
+    pcm = synthetic_speech(16000, 500, silence_ms=100)
+    frame = 320
+    assert len(pcm) == (100 + 500 + 100) * 16 * 2
+    assert not is_speech(pcm[:frame], -45.0, 0.3)
+    voiced = [pcm[i:i + frame] for i in range(3200, 3200 + 500 * 32, frame)]
+    assert sum(is_speech(f, -45.0, 0.3) for f in voiced) / len(voiced) > 0.9
+
+
+def test_fake_audio_stream_yields_frames_then_releases_talk():
+    async def run():
+        active = asyncio.Event()
+        active.set()
+        stream = FakeAudioStream(bytes(48 * 2 * 30), 48000, active)
+        frames = [event.frame async for event in stream]
+        return frames, active.is_set()
+
+    frames, still_active = asyncio.run(run())
+    assert [f.samples_per_channel for f in frames] == [480, 480, 480]
+    assert not still_active
+
+
+def test_fake_elevenlabs_stt_and_tts_protocols():
+    async def run():
+        fake = FakeElevenLabs(_fake_args())
+        async with serve(fake.handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            async with connect(f"ws://127.0.0.1:{port}/v1/speech-to-text/realtime") as ws:
+                stt = [json.loads(await ws.recv())["message_type"]]
+                audio = base64.b64encode(bytes(32 * 200)).decode()
+                await ws.send(json.dumps({"message_type": "input_audio_chunk", "audio_base_64": audio, "commit": True}))
+                stt += [json.loads(await ws.recv()) for _ in range(2)]
+            async with connect(f"ws://127.0.0.1:{port}/v1/text-to-speech/v/stream-input") as ws:
+                await ws.send(json.dumps({"text": "abcd", "flush": True}))
+                await ws.send(json.dumps({"text": ""}))
+                tts = [json.loads(m) async for m in ws]
+        return stt, tts
+
+    stt, tts = asyncio.run(run())
+    assert stt[0] == "session_started"
+    assert stt[1] == {"message_type": "partial_transcript", "text": "hello"}
+    assert stt[2] == {"message_type": "committed_transcript", "text": "hello there"}
+    # 4 chars * 50 ms = 200 ms of audio in 100 ms chunks, then the final marker
+    assert [base64.b64decode(m["audio"]) for m in tts[:-1]] == [tone_pcm(24000, 100)] * 2
+    assert tts[-1] == {"audio": None, "isFinal": True}
+
+
+def test_check_thresholds_flags_errors_and_slow_first_audio():
+    levels = [
+        {"rooms": 1, "outcomes": {"translated": 3}, "steps_ms": {"speech_end_to_first_audio": {"p95": 800.0}}},
+        {"rooms": 4, "outcomes": {"translated": 11, "error": 1},
+         "steps_ms": {"speech_end_to_first_audio": {"p95": 1500.0}}},
+    ]
+    assert check_thresholds(levels, None) == ["1 turns failed at rooms=4"]
+    failures = check_thresholds(levels, 1000.0)
+    assert len(failures) == 2
+    assert "1500.0 ms > 1000.0 ms at rooms=4" in failures[1]
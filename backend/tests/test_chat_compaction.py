@@ -0,0 +1,144 @@
+"""Tests for compacting old messages into cold blocks and reading across them."""
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+import pytest
+from boto3.dynamodb.conditions import Key
+from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.auth.dependencies import get_current_user
+from app.chat import compaction, service
+from app.config import settings
+from tests.conftest import make_user
+
+
+def _legacy_item(owner, chat_id, message_id, sent, text):
+    timestamp = sent.isoformat()
+    return {
+        "PK": f"USER#{owner}#CHAT#{chat_id}",
+        "SK": f"MSG#{timestamp}#{message_id}",
+        "messageId": message_id,
+        "text": text,
+        "fromUserId": "alice",
+        "language": "en",
+        "timestamp": timestamp,
+    }
+
+
+def _seed(dynamo):
+    """A chat with two legacy-format messages on each of four days in March 2026."""
+    chat_id = service.create_chat(make_user("alice", "en"), make_user("bob", "en"))
+    table = dynamo.Table("messages")
+    for day in range(1, 5):
+        for hour in (9, 17):
+            sent = datetime(2026, 3, day, hour, tzinfo=timezone.utc)
+            for owner in ("alice", "bob"):
+                table.put_item(Item=_legacy_item(owner, chat_id, f"m{day}-{hour}", sent, f"day {day} {hour}h"))
+    return chat_id
+
+
+def _all_pages(chat_id, limit):
+    pages, cursor = [], None
+    while True:
+        items, cursor = service.get_messages("bob", chat_id, cursor, limit)
+        pages.append(([m["messageId"] for m in items], cursor))
+        if cursor is None:
+            return pages
+
+
+def _sort_keys(dynamo, chat_id):
+    items = dynamo.Table("messages").query(KeyConditionExpression=Key("PK").eq(f"USER#bob#CHAT#{chat_id}"))["Items"]
+    return [item["SK"] for item in items]
+
+
+def test_reads_span_hot_items_and_blocks_with_the_same_cursors(dynamo, monkeypatch):
+    chat_id = _seed(dynamo)
+    before = _all_pages(chat_id, 3)
+    exported = list(service.iter_messages("bob", chat_id))
+    held_cursor = before[1][1]
+
+    monkeypatch.setattr(compaction.settings, "history_hot_days", 30)
+    assert compaction.compact_history(datetime(2026, 4, 3, tzinfo=timezone.utc)) == 12
+    assert _sort_keys(dynamo, chat_id)[:3] == [
+        "BLK#2026-03-01#000", "BLK#2026-03-02#000", "BLK#2026-03-03#000",
+    ]
+    assert len(_sort_keys(dynamo, chat_id)) == 5
+
+    assert _all_pages(chat_id, 3) == before
+    assert list(service.iter_messages("bob", chat_id)) == exported
+    resumed, _ = service.get_messages("bob", chat_id, held_cursor, 3)
+    assert [m["messageId"] for m in resumed] == before[2][0]
+    tail = list(service.iter_messages("bob", chat_id, cursor=exported[2]["SK"]))
+    assert tail == exported[3:]
+
+
+def test_interrupted_compaction_is_finished_by_the_next_pass(dynamo):
+    chat_id = _seed(dynamo)
+    table = dynamo.Table("messages")
+    leftover = _legacy_item("bob", chat_id, "m1-9", datetime(2026, 3, 1, 9, tzinfo=timezone.utc), "day 1 9h")
+    assert compaction.compact_partition("bob", chat_id, "2026-03-02") == 2
+    # As if the deletes had not run: the message is in a block and still an item
+    table.put_item(Item=leftover)
+    page, _ = service.get_messages("bob", chat_id, limit=20)
+    assert [m["messageId"] for m in page].count("m1-9") == 1
+
+    assert compaction.compact_partition("bob", chat_id, "2026-03-02") == 1
+    assert [sk for sk in _sort_keys(dynamo, chat_id) if sk.startswith("BLK#")] == ["BLK#2026-03-01#000"]
+    assert len(service.get_messages("bob", chat_id, limit=20)[0]) == 8
+
+
+def test_large_days_split_into_several_blocks(dynamo, monkeypatch):
+    chat_id = _seed(dynamo)
+    monkeypatch.setattr(compaction, "_BLOCK_MAX_BYTES", 100)
+    compaction.compact_partition("bob", chat_id, "2026-03-02")
+    assert [sk for sk in _sort_keys(dynamo, chat_id) if sk.startswith("BLK#")] == [
+        "BLK#2026-03-01#000", "BLK#2026-03-01#001",
+    ]
+    assert [m["messageId"] for m in service.get_messages("bob", chat_id, limit=20)[0]][-2:] == ["m1-17", "m1-9"]
+
+
+def test_malformed_cursors_are_rejected(app, dynamo):
+    chat_id = _seed(dynamo)
+    app.dependency_overrides[get_current_user] = lambda: make_user("bob", "en")
+    try:
+        client = TestClient(app)
+        for cursor in ("bogus", "MSG#yesterday"):
+            assert client.get(f"/api/chats/{chat_id}/messages", params={"cursor": cursor}).status_code == 400
+            assert client.get(f"/api/chats/{chat_id}/messages/export", params={"cursor": cursor}).status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_redis_is_logged_once(monkeypatch, caplog):
+    class _Redis:
+        down = True
+
+        async def set(self, *args, **kwargs):
+            if self.down:
+                raise RedisConnectionError("Connection refused")
+            return False
+
+    redis = _Redis()
+
+    async def get_client():
+        return redis
+
+    monkeypatch.setattr(compaction, "get_redis_client", get_client)
+    monkeypatch.setattr(settings, "history_compaction_interval_seconds", 0.001)
+    task = asyncio.create_task(compaction._compaction_loop())
+    try:
+        with caplog.at_level(logging.INFO, logger=compaction.__name__):
+            await asyncio.sleep(0.05)
+            redis.down = False
+            await asyncio.sleep(0.02)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    assert [r.getMessage() for r in caplog.records] == [
+        "Redis unreachable, history compaction paused until it is back",
+        "Redis reachable again, history compaction resumed",
+    ]
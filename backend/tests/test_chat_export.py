@@ -0,0 +1,64 @@
+"""Tests for the streaming NDJSON history export."""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth.dependencies import get_current_user
+from app.chat import router, service
+from app.config import settings
+from tests.conftest import make_user
+
+
+@pytest.fixture
+def history(dynamo, monkeypatch):
+    monkeypatch.setattr(service, "translate_text", lambda text, source, target: f"[{target}] {text}")
+    monkeypatch.setattr(settings, "export_page_size", 3)
+    alice, bob = make_user("alice", "en"), make_user("bob", "es")
+    chat_id = service.create_chat(alice, bob)
+    for i in range(7):
+        service.send_message(chat_id, alice, [bob], f"m{i}")
+    return chat_id
+
+
+def test_iter_messages_pages_with_projection_and_resumes(dynamo, history):
+    queries = []
+    dynamo.meta.client.meta.events.register(
+        "provide-client-params.dynamodb.Query", lambda params, **kwargs: queries.append(dict(params)),
+    )
+
+    items = list(service.iter_messages("bob", history))
+    assert [item["text"] for item in items] == [f"[es] m{i}" for i in range(7)]
+    assert set(items[0]) == {"SK", "messageId", "text", "fromUserId", "language", "timestamp"}
+    assert len(queries) == 3
+    assert all(q["Limit"] == 3 and "ProjectionExpression" in q for q in queries)
+
+    resumed = list(service.iter_messages("bob", history, cursor=items[3]["SK"]))
+    assert [item["text"] for item in resumed] == ["[es] m4", "[es] m5", "[es] m6"]
+
+
+def test_export_rows_are_chunked(dynamo, history, monkeypatch):
+    monkeypatch.setattr(router, "_EXPORT_CHUNK_CHARS", 200)
+    chunks = list(router._export_chunks("alice", history, None))
+    assert len(chunks) > 1
+    rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert [row["text"] for row in rows] == [f"m{i}" for i in range(7)]
+
+
+def test_export_endpoint_streams_ndjson_to_members_only(app, dynamo, history):
+    client = TestClient(app)
+    try:
+        app.dependency_overrides[get_current_user] = lambda: make_user("bob", "es")
+        resp = client.get(f"/api/chats/{history}/messages/export")
+        assert resp.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+        assert [row["text"] for row in rows] == [f"[es] m{i}" for i in range(7)]
+        assert rows[0]["from_user_id"] == "alice"
+
+        resumed = client.get(f"/api/chats/{history}/messages/export", params={"cursor": rows[5]["cursor"]})
+        assert [json.loads(line)["text"] for line in resumed.text.splitlines()] == ["[es] m6"]
+
+        app.dependency_overrides[get_current_user] = lambda: make_user("mallory", "en")
+        assert client.get(f"/api/chats/{history}/messages/export").status_code == 403
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,66 @@
+"""Tests for multi-member message writes with per-language translation."""
+import threading
+
+from app.chat import service
+from tests.conftest import make_user
+
+
+class _FakeDynamo:
+    def __init__(self):
+        self.written = []
+        self.changes = []
+        self.batch_sizes = []
+
+    def batch_write_item(self, RequestItems):
+        self.batch_sizes.append(sum(len(writes) for writes in RequestItems.values()))
+        for table, writes in RequestItems.items():
+            target = self.written if table == "messages" else self.changes
+            target.extend(write["PutRequest"]["Item"] for write in writes)
+        return {"UnprocessedItems": {}}
+
+
+def test_translates_once_per_distinct_language(monkeypatch, preview_buffer):
+    calls = []
+    lock = threading.Lock()
+
+    def fake_translate(text, source, target):
+        with lock:
+            calls.append(target)
+        return f"{target}:{text}"
+
+    dynamo = _FakeDynamo()
+    monkeypatch.setattr(service, "translate_text", fake_translate)
+    monkeypatch.setattr(service, "get_dynamo_client", lambda: dynamo)
+
+    recipients = [make_user("b", "es"), make_user("c", "es"), make_user("d", "fr"), make_user("e", "en")]
+    sender_item, recipient_items = service.send_message("chat-1", make_user("a", "en"), recipients, "hello")
+
+    assert sorted(calls) == ["es", "fr"]
+    assert sender_item["text"] == "hello"
+    assert recipient_items["b"]["text"] == recipient_items["c"]["text"] == "es:hello"
+    assert recipient_items["d"]["text"] == "fr:hello"
+    assert recipient_items["e"]["text"] == "hello"
+    # One lean copy per member, all sharing the sort key, which carries the message ID
+    assert len(dynamo.written) == 5
+    assert {item["SK"] for item in dynamo.written} == {f"m{sender_item['messageId']}"}
+    assert set(dynamo.written[0]) == {"PK", "SK", "t", "f", "l"}
+    # Each member's sync feed gets their own copy, in the same batch request
+    assert sorted(item["PK"] for item in dynamo.changes) == [f"USER#{uid}" for uid in "abcde"]
+    assert {item["text"] for item in dynamo.changes if item["PK"] == "USER#d"} == {"fr:hello"}
+    assert dynamo.batch_sizes == [10]
+    # Every recipient's unread count goes up, the sender's does not, with the inbox previews
+    assert {uid: chats["chat-1"][2] for uid, chats in preview_buffer.items()} == {
+        "a": (), **{uid: (sender_item["SK"],) for uid in "bcde"},
+    }
+
+
+def test_previews_are_buffered_for_every_member(monkeypatch, preview_buffer):
+    dynamo = _FakeDynamo()
+    monkeypatch.setattr(service, "translate_text", lambda text, source, target: text)
+    monkeypatch.setattr(service, "get_dynamo_client", lambda: dynamo)
+
+    recipients = [make_user(f"u{i}", "en") for i in range(150)]
+    service.send_message("chat-1", make_user("a", "en"), recipients, "hi")
+
+    assert len(preview_buffer) == 151
+    assert preview_buffer["u7"]["chat-1"][0] == "hi"
@@ -0,0 +1,50 @@
+"""Tests for compact message keys and reading partitions that mix them with legacy keys."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.chat import keys, service
+from tests.conftest import make_user
+
+
+def test_message_ids_sort_by_time_and_encode_it():
+    sent = datetime(2026, 10, 19, 12, 30, 1, 123000, tzinfo=timezone.utc)
+    message_id = keys.new_message_id(sent)
+    sort_key = keys.message_sort_key(message_id)
+    assert len(sort_key) == 27
+    assert keys.parse_sort_key(sort_key) == (message_id, sent.isoformat())
+    later = keys.message_sort_key(keys.new_message_id(sent + timedelta(milliseconds=1)))
+    assert sort_key < later < keys.key_bound(sent + timedelta(seconds=1))
+    assert keys.key_bound(sent) < sort_key
+    # Legacy keys sort before current ones
+    assert f"MSG#{sent.isoformat()}#x" < sort_key
+    for bad in ("m123", "mILLEGAL0000000000000000000", "MSG#2026-10-19#x"):
+        with pytest.raises(ValueError):
+            keys.key_time(bad)
+
+
+def test_legacy_and_compact_items_page_together(dynamo, monkeypatch):
+    monkeypatch.setattr(service, "translate_text", lambda text, source, target: text)
+    alice, bob = make_user("alice", "en"), make_user("bob", "en")
+    chat_id = service.create_chat(alice, bob)
+    legacy_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    for i in range(3):
+        sent = (legacy_at + timedelta(minutes=i)).isoformat()
+        dynamo.Table("messages").put_item(Item={
+            "PK": f"USER#bob#CHAT#{chat_id}", "SK": f"MSG#{sent}#old-{i}", "messageId": f"old-{i}",
+            "text": f"old {i}", "fromUserId": "alice", "language": "en", "timestamp": sent,
+        })
+    sent_ids = [service.send_message(chat_id, alice, [bob], f"new {i}")[0]["messageId"] for i in range(3)]
+
+    page, cursor = service.get_messages("bob", chat_id, limit=4)
+    assert [m["text"] for m in page] == ["new 2", "new 1", "new 0", "old 2"]
+    assert page[0]["messageId"] == sent_ids[2]
+    assert cursor.startswith("MSG#")
+    rest, _ = service.get_messages("bob", chat_id, cursor)
+    assert [m["text"] for m in rest] == ["old 1", "old 0"]
+
+    # A cursor of either form resumes the oldest-first export too
+    exported = list(service.iter_messages("bob", chat_id, cursor=page[2]["SK"]))
+    assert [m["text"] for m in exported] == ["new 1", "new 2"]
+    assert exported[0]["fromUserId"] == "alice" and exported[0]["language"] == "en"
+    assert [m["text"] for m in service.iter_messages("bob", chat_id, cursor=cursor)][:2] == ["new 0", "new 1"]
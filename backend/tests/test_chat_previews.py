@@ -0,0 +1,115 @@
+"""Tests for the coalescing write-back buffer of inbox previews."""
+import threading
+import time
+
+import pytest
+from botocore.exceptions import EndpointConnectionError
+
+from app.chat import previews, service
+from app.config import settings
+from tests.conftest import make_user
+
+
+@pytest.fixture
+def updates(dynamo, monkeypatch):
+    monkeypatch.setattr(service, "translate_text", lambda text, source, target: f"[{target}] {text}")
+    calls = []
+
+    def record(params, **kwargs):
+        if "lastMessagePreview" in params["UpdateExpression"]:
+            calls.append(params["Key"]["PK"])
+
+    dynamo.meta.client.meta.events.register("provide-client-params.dynamodb.UpdateItem", record)
+    return calls
+
+
+def test_burst_writes_one_preview_per_member_and_reads_see_it(updates):
+    alice, bob = make_user("alice", "en"), make_user("bob", "es")
+    chat_id = service.create_chat(alice, bob)
+    for i in range(20):
+        service.send_message(chat_id, alice, [bob], f"m{i}")
+    assert updates == []
+
+    assert service.list_user_chats("bob")[0]["lastMessagePreview"] == "[es] m19"
+    assert updates == ["USER#bob"]
+    previews.flush_previews()
+    assert updates == ["USER#bob", "USER#alice"]
+    assert service.list_user_chats("alice")[0]["lastMessagePreview"] == "m19"
+
+
+def test_stale_or_orphaned_previews_are_not_written(dynamo, updates):
+    alice, bob = make_user("alice", "en"), make_user("bob", "en")
+    chat_id = service.create_chat(alice, bob)
+    service.send_message(chat_id, alice, [bob], "newer")
+    previews.flush_previews()
+
+    # Another process buffered an older preview, and one for a chat bob is not in
+    previews.buffer_previews(chat_id, {"bob": "older"}, "2020-01-01T00:00:00+00:00")
+    previews.buffer_previews("gone", {"bob": "ghost"}, "2030-01-01T00:00:00+00:00")
+    inbox = service.list_user_chats("bob")
+    assert [item["lastMessagePreview"] for item in inbox] == ["newer"]
+    assert previews._pending == {}
+
+
+def test_failed_writes_are_retried_and_interval_zero_writes_through(updates, monkeypatch):
+    alice, bob = make_user("alice", "en"), make_user("bob", "en")
+    chat_id = service.create_chat(alice, bob)
+    write = previews._write
+    monkeypatch.setattr(previews, "_write", lambda user_id, chat_id, *entry: entry)
+    service.send_message(chat_id, alice, [bob], "hello")
+    previews.flush_previews()
+    assert set(previews._pending) == {"alice", "bob"}
+
+    monkeypatch.setattr(previews, "_write", write)
+    monkeypatch.setattr(settings, "preview_flush_interval_seconds", 0)
+    service.send_message(chat_id, alice, [bob], "again")
+    assert previews._pending == {}
+    assert sorted(updates) == ["USER#alice", "USER#bob"]
+
+
+def test_previews_survive_a_connection_error(dynamo, updates):
+    alice, bob = make_user("alice", "en"), make_user("bob", "en")
+    chat_id = service.create_chat(alice, bob)
+    service.send_message(chat_id, alice, [bob], "hello")
+
+    def unreachable(params, **kwargs):
+        if "lastMessagePreview" in params["UpdateExpression"]:
+            raise EndpointConnectionError(endpoint_url="http://mock-dynamodb")
+
+    dynamo.meta.client.meta.events.register("provide-client-params.dynamodb.UpdateItem", unreachable)
+    assert service.list_user_chats("bob")[0]["lastMessagePreview"] is None
+    previews.flush_previews()
+    assert {user: list(chats) for user, chats in previews._pending.items()} == {"alice": [chat_id], "bob": [chat_id]}
+
+    dynamo.meta.client.meta.events.unregister("provide-client-params.dynamodb.UpdateItem", unreachable)
+    assert service.list_user_chats("bob")[0]["lastMessagePreview"] == "hello"
+
+
+def test_a_users_flush_waits_only_for_their_own_previews(monkeypatch):
+    release, written = threading.Event(), []
+
+    def slow_write(user_id, chat_id, preview, updated_at, unread):
+        if user_id == "alice":
+            release.wait(5)
+        written.append(user_id)
+
+    monkeypatch.setattr(previews, "_write", slow_write)
+    previews.buffer_previews("chat-1", {"alice": "hi"}, "2026-10-19T00:00:00+00:00")
+    timer_flush = threading.Thread(target=previews.flush_previews)
+    timer_flush.start()
+    while "alice" in previews._pending:
+        time.sleep(0.01)
+
+    previews.buffer_previews("chat-2", {"bob": "yo"}, "2026-10-19T00:00:00+00:00")
+    previews.flush_previews(["bob"])
+    assert written == ["bob"]
+    alice_read = threading.Thread(target=previews.flush_previews, args=(["alice"],))
+    alice_read.start()
+    alice_read.join(0.2)
+    assert alice_read.is_alive()
+
+    release.set()
+    alice_read.join(5)
+    timer_flush.join(5)
+    assert written == ["bob", "alice"]
+    assert previews._in_flight == {}
@@ -0,0 +1,89 @@
+"""Tests for the per-user change feed behind GET /api/sync."""
+import pytest
+from boto3.dynamodb.conditions import Key
+from fastapi.testclient import TestClient
+
+from app.auth.dependencies import get_current_user
+from app.chat import service
+from app.config import settings
+from tests.conftest import make_user
+
+
+@pytest.fixture(autouse=True)
+def _fake_translation(monkeypatch):
+    monkeypatch.setattr(service, "translate_text", lambda text, source, target: f"[{target}] {text}")
+    monkeypatch.setattr(settings, "sync_settle_seconds", 0.0)
+
+
+def test_feed_returns_new_chats_and_messages_across_chats(dynamo):
+    alice, bob, carol = make_user("alice", "en"), make_user("bob", "es"), make_user("carol", "fr")
+    first = service.create_chat(alice, bob)
+    second = service.create_group_chat(carol, [alice, bob], "trip")
+    service.send_message(first, alice, [bob], "hi")
+    service.send_message(second, carol, [alice, bob], "bonjour")
+
+    changes = service.get_changes("bob")
+    assert changes["chat_ids"] == [first, second]
+    assert [(m["chatId"], m["text"]) for m in changes["messages"]] == [
+        (first, "[es] hi"), (second, "[es] bonjour"),
+    ]
+    assert not changes["has_more"] and not changes["reset"]
+
+    caught_up = service.get_changes("bob", changes["next_token"])
+    assert caught_up["messages"] == [] and caught_up["chat_ids"] == []
+
+    service.send_message(first, alice, [bob], "again")
+    later = service.get_changes("bob", changes["next_token"])
+    assert [m["text"] for m in later["messages"]] == ["[es] again"]
+    assert later["chat_ids"] == [first]
+
+
+def test_feed_pages_and_settle_window_repeats_recent_changes(dynamo, monkeypatch):
+    alice, bob = make_user("alice", "en"), make_user("bob", "en")
+    chat_id = service.create_chat(alice, bob)
+    for i in range(3):
+        service.send_message(chat_id, alice, [bob], f"m{i}")
+
+    page = service.get_changes("bob", limit=2)
+    assert page["has_more"]
+    sent = dynamo.Table("sync_log").query(KeyConditionExpression=Key("PK").eq("USER#bob"))["Items"][:2]
+    assert page["next_token"] == sent[-1]["SK"]
+    rest = service.get_changes("bob", page["next_token"], limit=2)
+    assert [m["text"] for m in rest["messages"]] == ["m1", "m2"]
+    assert not rest["has_more"]
+
+    # The token never passes unsettled changes, so they are returned again
+    monkeypatch.setattr(settings, "sync_settle_seconds", 60.0)
+    unsettled = service.get_changes("bob", page["next_token"])
+    again = service.get_changes("bob", unsettled["next_token"])
+    assert [m["text"] for m in again["messages"]] == ["m0", "m1", "m2"]
+
+
+def test_expired_or_malformed_tokens(dynamo, monkeypatch):
+    monkeypatch.setattr(settings, "sync_log_ttl_seconds", 3600)
+    stale = service.get_changes("bob", "CHG#2020-01-01T00:00:00+00:00#x")
+    assert stale["reset"] and stale["messages"] == []
+    for token in ("MSG#2020-01-01T00:00:00+00:00", "CHG#yesterday", "CHG#2020-01-01T00:00:00"):
+        with pytest.raises(ValueError):
+            service.get_changes("bob", token)
+
+
+def test_sync_endpoint_returns_messages_and_inbox_entries(app, dynamo):
+    alice, bob = make_user("alice", "en"), make_user("bob", "es")
+    chat_id = service.create_chat(alice, bob)
+    service.send_message(chat_id, alice, [bob], "hello")
+    app.dependency_overrides[get_current_user] = lambda: bob
+    try:
+        client = TestClient(app)
+        body = client.get("/api/sync").json()
+        assert [(m["chat_id"], m["text"], m["from_user_id"]) for m in body["messages"]] == [
+            (chat_id, "[es] hello", "alice"),
+        ]
+        assert body["chats"][0]["other_username"] == "alice"
+        assert body["chats"][0]["last_message_preview"] == "[es] hello"
+
+        empty = client.get("/api/sync", params={"since": body["next_token"]}).json()
+        assert empty["messages"] == [] and empty["chats"] == []
+        assert client.get("/api/sync", params={"since": "bogus"}).status_code == 400
+    finally:
+        app.dependency_overrides.clear()
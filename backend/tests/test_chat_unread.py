@@ -0,0 +1,158 @@
+"""Tests for unread counters and read receipts on user_chats."""
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth.dependencies import get_current_user
+from app.chat import previews, router, service, websocket
+from app.chat.keys import new_message_id
+from tests.conftest import make_user
+
+
+@pytest.fixture
+def chat(dynamo, monkeypatch):
+    monkeypatch.setattr(service, "translate_text", lambda text, source, target: text)
+    return service.create_chat(make_user("alice", "en"), make_user("bob", "en"))
+
+
+def _unread(user_id):
+    return service.list_user_chats(user_id)[0]["unreadCount"]
+
+
+def test_sends_count_and_mark_read_moves_the_watermark(chat):
+    alice, bob = make_user("alice", "en"), make_user("bob", "en")
+    sent = [service.send_message(chat, alice, [bob], f"m{i}")[1]["bob"] for i in range(3)]
+    assert _unread("bob") == 3
+    assert _unread("alice") == 0
+
+    item = service.mark_read("bob", chat, sent[1]["SK"])
+    assert item["unreadCount"] == 1 and item["lastReadKey"] == sent[1]["SK"]
+    # Going backwards changes nothing
+    assert service.mark_read("bob", chat, sent[0]["SK"]) is None
+    # An increment for a message already read past is not counted
+    previews.buffer_previews(chat, {"bob": "late"}, "2020-01-01T00:00:00+00:00", sent[0]["SK"], ["bob"])
+    assert _unread("bob") == 1
+
+    service.send_message(chat, bob, [alice], "reply")
+    service.send_message(chat, alice, [bob], "m3")
+    assert _unread("bob") == 2
+    page, _ = service.get_messages("bob", chat, limit=1)
+    assert service.mark_read("bob", chat, page[0]["SK"])["unreadCount"] == 0
+    for cursor in ("bogus", "m7" + "Z" * 25):
+        with pytest.raises(ValueError):
+            service.mark_read("bob", chat, cursor)
+    assert _unread("bob") == 0
+
+
+def test_a_message_from_a_clock_running_ahead_can_be_read(chat, monkeypatch):
+    ahead = datetime.now(timezone.utc) + timedelta(seconds=30)
+    monkeypatch.setattr(service, "new_message_id", lambda: new_message_id(ahead))
+    sent, _ = service.send_message(chat, make_user("alice", "en"), [make_user("bob", "en")], "hi")
+    assert service.mark_read("bob", chat, sent["SK"])["unreadCount"] == 0
+    with pytest.raises(ValueError):
+        service.mark_read("bob", chat, sent["SK"][:11] + "Z" * 16)
+
+
+def test_a_message_arriving_during_mark_read_is_counted(chat, monkeypatch):
+    alice, bob = make_user("alice", "en"), make_user("bob", "en")
+    first, _ = service.send_message(chat, alice, [bob], "m0")
+    unread_keys = service._unread_keys
+    arrivals = []
+
+    def racing_count(user_id, chat_id, message_key):
+        keys = unread_keys(user_id, chat_id, message_key)
+        if not arrivals:
+            arrivals.append(service.send_message(chat, alice, [bob], "m1"))
+        return keys
+
+    monkeypatch.setattr(service, "_unread_keys", racing_count)
+    assert service.mark_read("bob", chat, first["SK"])["unreadCount"] == 0
+    assert _unread("bob") == 1
+
+
+def test_an_increment_landing_after_the_recount_is_not_counted_twice(chat):
+    alice, bob = make_user("alice", "en"), make_user("bob", "en")
+    first, _ = service.send_message(chat, alice, [bob], "m0")
+    assert _unread("bob") == 1
+    # Written, but its increment is still in the buffer when bob reads up to the first message
+    second, _ = service.send_message(chat, alice, [bob], "m1")
+
+    item = service.mark_read("bob", chat, first["SK"])
+    assert item["unreadCount"] == 1
+    assert item["recountedKeys"] == {second["SK"]} and item["recountedTo"] == second["SK"]
+    assert _unread("bob") == 1
+
+    third, _ = service.send_message(chat, alice, [bob], "m2")
+    assert _unread("bob") == 2
+    assert "recountedKeys" not in service.mark_read("bob", chat, third["SK"])
+
+
+def test_reads_reach_the_sync_feed(chat, monkeypatch):
+    monkeypatch.setattr(service.settings, "sync_settle_seconds", 0.0)
+    sent, _ = service.send_message(chat, make_user("alice", "en"), [make_user("bob", "en")], "hi")
+    token = service.get_changes("bob")["next_token"]
+
+    service.mark_read("bob", chat, sent["SK"])
+    changes = service.get_changes("bob", token)
+    assert changes["chat_ids"] == [chat] and changes["messages"] == []
+    # Going nowhere writes nothing
+    assert service.mark_read("bob", chat, sent["SK"]) is None
+    assert service.get_changes("bob", changes["next_token"])["chat_ids"] == []
+
+
+def test_read_endpoint_and_receipts(app, dynamo, chat, monkeypatch):
+    alice, bob = make_user("alice", "en"), make_user("bob", "en")
+    service.send_message(chat, alice, [bob], "hello")
+    receipts = []
+
+    async def fake_publish(chat_id, member_ids, user_id, item):
+        receipts.append((chat_id, user_id, item["lastReadKey"]))
+
+    monkeypatch.setattr(router, "publish_read_receipt", fake_publish)
+    client = TestClient(app)
+    try:
+        app.dependency_overrides[get_current_user] = lambda: bob
+        assert client.get("/api/chats").json()[0]["unread_count"] == 1
+        cursor = client.get(f"/api/chats/{chat}/messages").json()["messages"][0]["cursor"]
+
+        body = client.post(f"/api/chats/{chat}/read", json={"cursor": cursor}).json()
+        assert body["unread_count"] == 0 and body["last_read_cursor"] == cursor
+        assert receipts == [(chat, "bob", cursor)]
+        # Repeating it reports the state without another receipt
+        assert client.post(f"/api/chats/{chat}/read", json={"cursor": cursor}).json()["unread_count"] == 0
+        assert len(receipts) == 1
+        assert client.get("/api/chats").json()[0]["last_read_cursor"] == cursor
+        assert client.post(f"/api/chats/{chat}/read", json={"cursor": "bogus"}).status_code == 400
+        assert client.post(f"/api/chats/{chat}/read", json={"cursor": "m7" + "Z" * 25}).status_code == 400
+
+        app.dependency_overrides[get_current_user] = lambda: make_user("mallory", "en")
+        assert client.post(f"/api/chats/{chat}/read", json={"cursor": cursor}).status_code == 403
+
+        # A member whose inbox entry is gone
+        dynamo.Table("user_chats").delete_item(Key={"PK": "USER#bob", "SK": f"CHAT#{chat}"})
+        app.dependency_overrides[get_current_user] = lambda: bob
+        assert client.post(f"/api/chats/{chat}/read", json={"cursor": cursor}).status_code == 404
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_receipt_carries_the_unread_count_only_to_the_reader(monkeypatch):
+    deliveries = []
+
+    async def fake_fan_out(batch):
+        deliveries.extend(batch)
+
+    monkeypatch.setattr(websocket, "_fan_out", fake_fan_out)
+    item = {"lastReadKey": "m01", "lastReadAt": "2026-10-19T00:00:00+00:00", "unreadCount": 2}
+    await websocket.publish_read_receipt("chat-1", ["alice", "bob", "carol"], "bob", item)
+
+    (reader, own), (others, shared) = deliveries
+    assert reader == ["bob"] and json.loads(own)["unread_count"] == 2
+    assert others == ["alice", "carol"]
+    assert json.loads(shared) == {
+        "type": "read", "chat_id": "chat-1", "user_id": "bob",
+        "last_read_cursor": "m01", "read_at": "2026-10-19T00:00:00+00:00",
+    }
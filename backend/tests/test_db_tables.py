@@ -0,0 +1,52 @@
+"""Tests for startup table bootstrap and deferred SDK imports."""
+import subprocess
+import sys
+
+import boto3
+
+from app.db import dynamo
+from bench.common import BACKEND_DIR
+from bench.mock_dynamodb import DynamoStore, attach
+
+
+def _resource(store: DynamoStore):
+    resource = boto3.resource(
+        "dynamodb", endpoint_url="http://mock-dynamodb", region_name="us-east-1",
+        aws_access_key_id="local", aws_secret_access_key="local",
+    )
+    attach(resource.meta.client, store)
+    return resource
+
+
+def test_create_tables_creates_only_missing_tables(monkeypatch):
+    resource = _resource(DynamoStore())
+    monkeypatch.setattr(dynamo, "get_dynamo_client", lambda: resource)
+    resource.meta.client.create_table(**dynamo.TABLE_DEFINITIONS[0])
+    resource.Table("users").put_item(Item={"PK": "USER#u", "SK": "PROFILE"})
+    calls = []
+    resource.meta.client.meta.events.register(
+        "before-call.dynamodb.*", lambda model, **kwargs: calls.append(model.name),
+    )
+
+    dynamo.create_tables()
+
+    names = resource.meta.client.list_tables()["TableNames"]
+    assert sorted(names) == sorted(d["TableName"] for d in dynamo.TABLE_DEFINITIONS)
+    assert resource.Table("users").get_item(Key={"PK": "USER#u", "SK": "PROFILE"})["Item"]
+    tables = len(dynamo.TABLE_DEFINITIONS)
+    assert calls.count("DescribeTable") == tables
+    assert calls.count("CreateTable") == tables - 1
+    assert calls.count("UpdateTimeToLive") == len(dynamo.TTL_ATTRIBUTES)
+
+    calls.clear()
+    dynamo.create_tables()
+    assert calls == ["DescribeTable"] * tables
+
+
+def test_app_import_defers_voice_and_translation_sdks():
+    code = (
+        "import sys, app.main; "
+        "print(sorted(m for m in ('openai', 'livekit', 'websockets', 'numpy') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,64 @@
+"""Tests for HTTP and DynamoDB metrics instrumentation."""
+import boto3
+from botocore.stub import Stubber
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.observability import dynamo as dynamo_metrics
+from app.observability import http as http_metrics
+from app.observability.metrics import Counter, Histogram
+
+
+def _counts(hist: Histogram) -> dict[tuple[str, ...], int]:
+    return {tuple(labels): sum(value["counts"]) for labels, value in hist.snapshot()["series"]}
+
+
+def test_http_requests_are_labelled_by_router(monkeypatch):
+    hist = Histogram("http_request_duration_seconds", "test", ("router", "method", "status"))
+    monkeypatch.setattr(http_metrics, "_request_seconds", hist)
+
+    router = APIRouter()
+
+    @router.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/items")
+    app.add_middleware(http_metrics.MetricsMiddleware)
+    client = TestClient(app)
+
+    client.get("/api/items/items/1")
+    client.get("/api/items/items/2")
+    client.get("/nowhere")
+
+    assert _counts(hist) == {("items", "GET", "2xx"): 2, ("unmatched", "GET", "4xx"): 1}
+
+
+def test_dynamodb_calls_record_latency_capacity_and_errors(monkeypatch):
+    calls = Histogram("dynamodb_call_duration_seconds", "test", ("operation", "table"))
+    capacity = Counter("dynamodb_consumed_capacity_units_total", "test", ("operation", "table"))
+    errors = Counter("dynamodb_call_errors_total", "test", ("operation", "table", "code"))
+    monkeypatch.setattr(dynamo_metrics, "_call_seconds", calls)
+    monkeypatch.setattr(dynamo_metrics, "_consumed_capacity", capacity)
+    monkeypatch.setattr(dynamo_metrics, "_call_errors", errors)
+
+    client = boto3.client(
+        "dynamodb", region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="x",
+    )
+    dynamo_metrics.instrument_client(client)
+    with Stubber(client) as stub:
+        stub.add_response("batch_get_item", {
+            "Responses": {"users": []},
+            "ConsumedCapacity": [{"TableName": "users", "CapacityUnits": 1.5}],
+        })
+        stub.add_client_error("put_item", service_error_code="ConditionalCheckFailedException")
+        client.batch_get_item(RequestItems={"users": {"Keys": [{"PK": {"S": "USER#1"}, "SK": {"S": "PROFILE"}}]}})
+        try:
+            client.put_item(TableName="users", Item={"PK": {"S": "a"}, "SK": {"S": "b"}})
+        except client.exceptions.ConditionalCheckFailedException:
+            pass
+
+    assert _counts(calls) == {("BatchGetItem", "users"): 1, ("PutItem", "users"): 1}
+    assert capacity.snapshot()["series"] == [[["BatchGetItem", "users"], 1.5]]
+    assert errors.snapshot()["series"] == [[["PutItem", "users", "ConditionalCheckFailedException"], 1.0]]
@@ -0,0 +1,86 @@
+"""Tests for the queue-based structured logging setup."""
+import json
+import logging
+import queue
+
+from app.observability.logs import (
+    JsonFormatter,
+    RateLimitFilter,
+    SamplingFilter,
+    _NonBlockingQueueHandler,
+    lazy_json,
+    parse_sample_rates,
+)
+
+
+def _record(name="app.test", level=logging.INFO, msg="hello %s", args=("world",), lineno=1, **extra):
+    record = logging.LogRecord(name, level, __file__, lineno, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    entry = json.loads(JsonFormatter().format(_record(chat_id="c1")))
+    assert entry["message"] == "hello world"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app.test"
+    assert entry["chat_id"] == "c1"
+    assert "args" not in entry
+
+
+def test_lazy_json_is_not_serialized_for_disabled_level():
+    calls = []
+
+    class Payload:
+        def __repr__(self):
+            calls.append(1)
+            return "payload"
+
+    logger = logging.getLogger("app.test.lazy")
+    logger.setLevel(logging.INFO)
+    logger.debug("STT << %s", lazy_json({"p": Payload()}))
+    assert calls == []
+    assert str(lazy_json({"text": "abcdef"}, 10)) == '{"text": "'
+
+
+def test_rate_limit_drops_repeats_and_reports_suppressed():
+    now = [0.0]
+    limiter = RateLimitFilter(per_second=2, clock=lambda: now[0])
+    # One call site, whatever its rendered message
+    results = [limiter.filter(_record(msg=f"hello {i}", args=None)) for i in range(5)]
+    assert results == [True, True, False, False, False]
+    # Other call sites have their own budget, and warnings are never limited
+    assert limiter.filter(_record(lineno=2))
+    assert all(limiter.filter(_record(level=logging.ERROR)) for _ in range(5))
+
+    now[0] = 1.0
+    record = _record()
+    assert limiter.filter(record)
+    assert record.suppressed == 3
+
+
+def test_rate_limit_forgets_the_least_recently_used_call_sites():
+    limiter = RateLimitFilter(per_second=1, clock=lambda: 0.0, max_buckets=2)
+    for lineno in (1, 2, 1, 3):
+        limiter.filter(_record(lineno=lineno))
+    assert [key[2] for key in limiter._buckets] == [1, 3]
+
+
+def test_sampling_applies_to_children_and_spares_warnings(monkeypatch):
+    sampler = SamplingFilter(parse_sample_rates("app.chat=0, uvicorn.access=0.5"))
+    assert not sampler.filter(_record(name="app.chat.websocket"))
+    assert sampler.filter(_record(name="app.chat.websocket", level=logging.WARNING))
+    assert sampler.filter(_record(name="app.voice.service"))
+
+    monkeypatch.setattr("app.observability.logs.random.random", lambda: 0.4)
+    assert sampler.filter(_record(name="uvicorn.access"))
+
+
+def test_queue_handler_drops_when_full_instead_of_blocking():
+    handler = _NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(_record())
+    handler.handle(_record())
+    queued = handler.queue.get_nowait()
+    assert queued.msg == "hello world"
+    assert queued.args is None
+    assert handler.queue.empty()
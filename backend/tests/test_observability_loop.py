@@ -0,0 +1,47 @@
+"""Tests for event-loop lag sampling and blocking-call detection."""
+import asyncio
+import logging
+import time
+
+import pytest
+
+from app.observability import loop as loop_module
+from app.observability.loop import LoopMonitor
+from app.observability.metrics import Histogram
+
+
+def _block_the_loop():
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_detector_reports_blocking_stack_and_task(monkeypatch, caplog):
+    lag = Histogram("event_loop_lag_seconds", "test", buckets=(0.1,))
+    monkeypatch.setattr(loop_module, "_lag_seconds", lag)
+    monitor = LoopMonitor(interval_seconds=0.02, block_threshold_ms=50)
+    await monitor.start()
+
+    async def handler():
+        await asyncio.sleep(0.05)
+        _block_the_loop()
+
+    with caplog.at_level(logging.WARNING, logger=loop_module.__name__):
+        await asyncio.create_task(handler(), name="GET /api/chats")
+        await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    reports = [r.getMessage() for r in caplog.records if "Event loop blocked" in r.getMessage()]
+    assert len(reports) == 1
+    assert "GET /api/chats" in reports[0]
+    assert "_block_the_loop" in reports[0]
+    # The stall also shows up as lag above the 100 ms bucket
+    counts = lag.snapshot()["series"][0][1]["counts"]
+    assert counts[-1] >= 1
+
+
+@pytest.mark.asyncio
+async def test_sampler_only_mode_starts_no_watchdog():
+    monitor = LoopMonitor(interval_seconds=0.01)
+    await monitor.start()
+    assert monitor._watchdog is None
+    await monitor.stop()
@@ -0,0 +1,63 @@
+"""Tests for the metrics registry, cross-process merging and Prometheus rendering."""
+import pytest
+
+from app.observability.metrics import Counter, Gauge, Histogram, merge_snapshots, render_prometheus
+
+
+def _snapshot(*metrics):
+    return {metric.name: metric.snapshot() for metric in metrics}
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="stt")
+    hist.observe(0.5, stage="stt")
+    hist.observe(3.0, stage="stt")
+
+    text = render_prometheus(_snapshot(hist))
+
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{stage="stt",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="stt",le="1"} 2' in text
+    assert 'latency_seconds_bucket{stage="stt",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{stage="stt"} 3.55' in text
+    assert 'latency_seconds_count{stage="stt"} 3' in text
+
+
+def test_labels_must_match_declaration():
+    total = Counter("requests_total", "Requests", ("router",))
+    with pytest.raises(ValueError):
+        total.inc(route="chat")
+
+
+def test_merge_sums_counters_and_histograms_and_keeps_gauges_per_process():
+    def process_metrics(count, depth):
+        total = Counter("requests_total", "Requests", ("router",))
+        total.inc(count, router="chat")
+        hist = Histogram("latency_seconds", "Latency", buckets=(1.0,))
+        hist.observe(0.5)
+        queue = Gauge("queue_depth", "Queue depth")
+        queue.set(depth)
+        return _snapshot(total, hist, queue)
+
+    merged = merge_snapshots({"p1": process_metrics(2, 3), "p2": process_metrics(5, 7)})
+    text = render_prometheus(merged)
+
+    assert 'requests_total{router="chat"} 7' in text
+    assert 'latency_seconds_count 2' in text
+    assert 'queue_depth{process="p1"} 3' in text
+    assert 'queue_depth{process="p2"} 7' in text
+
+
+def test_label_values_are_escaped():
+    total = Counter("errors_total", "Errors", ("message",))
+    total.inc(message='bad "quote"\nline')
+    assert 'errors_total{message="bad \\"quote\\"\\nline"} 1' in render_prometheus(_snapshot(total))
+
+
+def test_function_gauge_is_computed_on_collection():
+    depth = [4]
+    queue = Gauge("executor_queue_depth", "Queued jobs")
+    queue.set_function(lambda: depth[0])
+    depth[0] = 9
+    assert "executor_queue_depth 9" in render_prometheus(_snapshot(queue))
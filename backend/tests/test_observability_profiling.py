@@ -0,0 +1,85 @@
+"""Tests for on-demand profiling and its admin gating."""
+import asyncio
+import marshal
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth.dependencies import get_current_user
+from app.config import settings
+from app.observability.profiling import CPUProfiler, MemoryTracer, ProfilerBusyError
+
+
+def _spin(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.mark.asyncio
+async def test_sampling_profile_collects_collapsed_stacks():
+    profiler = CPUProfiler()
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,), name="spinner")
+    worker.start()
+    profiler.start("sampling", seconds=5, interval_ms=2)
+    with pytest.raises(ProfilerBusyError):
+        profiler.start("cprofile", seconds=5)
+    await asyncio.sleep(0.1)
+    mode, output = profiler.stop()
+    stop.set()
+    worker.join()
+
+    assert mode == "sampling"
+    lines = output.decode().splitlines()
+    spinner = [line for line in lines if line.startswith("spinner;")]
+    assert spinner and all(":_spin:" in line for line in spinner)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+@pytest.mark.asyncio
+async def test_cprofile_stops_at_deadline_and_keeps_result(monkeypatch):
+    monkeypatch.setattr(settings, "profiling_max_seconds", 0.05)
+    profiler = CPUProfiler()
+    profiler.start("cprofile", seconds=60)
+    sum(range(10000))
+    await asyncio.sleep(0.1)
+
+    assert not profiler.running
+    mode, output = profiler.stop()
+    assert mode == "cprofile"
+    assert isinstance(marshal.loads(output), dict)
+
+
+@pytest.mark.asyncio
+async def test_tracemalloc_diff_reports_new_allocations():
+    tracer = MemoryTracer()
+    tracer.start(frames=5)
+    try:
+        retained = [bytearray(1024) for _ in range(2000)]
+        report = tracer.snapshot_diff(limit=5, group_by="lineno")
+    finally:
+        tracer.stop()
+    assert "test_observability_profiling.py" in report
+    assert len(retained) == 2000
+
+
+def test_debug_endpoints_are_gated(app, monkeypatch):
+    app.dependency_overrides[get_current_user] = lambda: {"userId": "u1", "username": "alice"}
+    try:
+        client = TestClient(app)
+        monkeypatch.setattr(settings, "profiling_enabled", False)
+        monkeypatch.setattr(settings, "admin_usernames", "alice")
+        assert client.get("/api/debug/state").status_code == 404
+
+        monkeypatch.setattr(settings, "profiling_enabled", True)
+        monkeypatch.setattr(settings, "admin_usernames", "bob, carol")
+        assert client.get("/api/debug/state").status_code == 403
+
+        monkeypatch.setattr(settings, "admin_usernames", "bob, alice")
+        state = client.get("/api/debug/state")
+        assert state.status_code == 200
+        assert state.json()["tracemalloc_running"] is False
+        assert client.post("/api/debug/profile/stop").status_code == 409
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,74 @@
+"""Tests for language-aware tokenization and the per-user message index."""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth.dependencies import get_current_user
+from app.chat import service as chat_service
+from app.search.service import search_messages
+from app.search.tokenize import tokenize
+from tests.conftest import make_user
+
+
+def test_tokenize_is_language_aware():
+    assert tokenize("The cats are at the Café!", "en") == ["cat", "café"]
+    # Diacritics are folded where they are often left out when typing
+    assert tokenize("Nos vemos en la estación", "es") == tokenize("nos vemos en la ESTACION", "es")
+    assert tokenize("Встреча в 5 часов", "ru") == ["встреча", "5", "часов"]
+    assert tokenize("東京駅で", "ja") == ["東京", "京駅", "駅で"]
+    assert tokenize("meet at 東京 station", "en") == ["meet", "東京", "station"]
+
+
+@pytest.fixture
+def chat(dynamo, monkeypatch):
+    monkeypatch.setattr(
+        chat_service, "translate_text", lambda text, source, target: text.replace("station", "estación"),
+    )
+    alice, bob = make_user("alice", "en"), make_user("bob", "es")
+    chat_id = chat_service.create_chat(alice, bob)
+    chat_service.send_message(chat_id, alice, [bob], "Meet me at the train station")
+    chat_service.send_message(chat_id, alice, [bob], "The station cafe has good coffee, coffee, coffee")
+    chat_service.send_message(chat_id, alice, [bob], "See you tomorrow")
+    return chat_id
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_each_users_own_copies(chat):
+    results = await search_messages("alice", "coffee station", "en")
+    assert len(results) == 1
+    assert results[0]["chat_id"] == chat
+
+    ranked = await search_messages("alice", "stations", "en")
+    assert len(ranked) == 2
+    # Both mention the station once; the shorter message weighs it more
+    page, _ = chat_service.get_messages("alice", chat, limit=10)
+    texts = {m["messageId"]: m["text"] for m in page}
+    assert texts[ranked[0]["message_id"]] == "Meet me at the train station"
+
+    # Bob's index holds his translated copies, searched in his language
+    assert len(await search_messages("bob", "estación", "es")) == 2
+    assert await search_messages("bob", "tomorrow unicorn", "es") == []
+    assert await search_messages("alice", "the", "en") == []
+
+
+@pytest.mark.asyncio
+async def test_search_can_be_limited_to_one_chat(dynamo, chat):
+    other = chat_service.create_chat(make_user("alice", "en"), make_user("carol", "en"))
+    chat_service.send_message(other, make_user("alice", "en"), [make_user("carol", "en")], "station again")
+
+    assert len(await search_messages("alice", "station", "en")) == 3
+    only_other = await search_messages("alice", "station", "en", chat_id=other)
+    assert [r["chat_id"] for r in only_other] == [other]
+    page, _ = chat_service.get_messages("alice", other)
+    assert only_other[0]["cursor"] == page[0]["SK"]
+    assert only_other[0]["message_id"] == page[0]["messageId"]
+
+
+def test_search_endpoint(app, chat):
+    app.dependency_overrides[get_current_user] = lambda: make_user("alice", "en")
+    try:
+        client = TestClient(app)
+        body = client.get("/api/search", params={"q": "coffee"}).json()
+        assert [r["chat_id"] for r in body["results"]] == [chat]
+        assert client.get("/api/search", params={"q": ""}).status_code == 422
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,52 @@
+"""Tests for phrase segmentation of streamed translation text."""
+import pytest
+
+from app.voice.phrases import chunk_phrases
+
+
+async def _tokens(*parts: str):
+    for part in parts:
+        yield part
+
+
+async def _collect(tokens, min_chars: int = 40) -> list[str]:
+    return [phrase async for phrase in chunk_phrases(tokens, min_chars)]
+
+
+@pytest.mark.asyncio
+async def test_splits_on_sentence_boundaries():
+    phrases = await _collect(_tokens("Hola", ", ¿cómo", " estás? ", "Bien", " gracias."))
+    assert phrases == ["Hola, ¿cómo estás? ", "Bien gracias."]
+
+
+@pytest.mark.asyncio
+async def test_concatenation_reproduces_input():
+    parts = ("Uno. Dos", " tres, cuatro", "! Cinco ", "seis")
+    phrases = await _collect(_tokens(*parts), min_chars=5)
+    assert "".join(phrases) == "".join(parts)
+
+
+@pytest.mark.asyncio
+async def test_does_not_split_decimals_or_unfinished_punctuation():
+    phrases = await _collect(_tokens("Son 3.", "14 euros"))
+    assert phrases == ["Son 3.14 euros"]
+
+
+@pytest.mark.asyncio
+async def test_comma_splits_only_long_phrases():
+    short = await _collect(_tokens("Sí, ", "claro"))
+    assert short == ["Sí, claro"]
+
+    long = await _collect(_tokens("Esta es una frase bastante larga, ", "y sigue"), min_chars=20)
+    assert long == ["Esta es una frase bastante larga, ", "y sigue"]
+
+
+@pytest.mark.asyncio
+async def test_cjk_punctuation_needs_no_whitespace():
+    phrases = await _collect(_tokens("你好。", "我很好"))
+    assert phrases == ["你好。", "我很好"]
+
+
+@pytest.mark.asyncio
+async def test_empty_stream_yields_nothing():
+    assert await _collect(_tokens()) == []
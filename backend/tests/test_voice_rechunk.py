@@ -0,0 +1,50 @@
+"""Tests for fixed-size PCM rechunking of TTS audio."""
+import array
+
+from app.voice.rechunk import PCMRechunker
+
+
+def _pcm(samples: range) -> bytes:
+    return array.array("h", samples).tobytes()
+
+
+def test_frame_size_matches_duration():
+    rechunker = PCMRechunker(sample_rate=24000, frame_ms=20)
+    assert rechunker.samples_per_channel == 480
+    assert rechunker.frame_bytes == 960
+    assert PCMRechunker(sample_rate=16000, frame_ms=10).frame_bytes == 320
+
+
+def test_odd_sized_chunks_keep_sample_alignment():
+    rechunker = PCMRechunker(sample_rate=1000, frame_ms=4)  # 4 samples per frame
+    pcm = _pcm(range(1, 13))
+
+    frames = []
+    # Split at odd offsets so samples straddle chunk boundaries
+    for chunk in (pcm[:3], pcm[3:10], pcm[10:17], pcm[17:]):
+        frames.extend(array.array("h", bytes(frame)).tolist() for frame in rechunker.push(chunk))
+
+    assert frames == [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12]]
+    assert rechunker.flush() is None
+
+
+def test_flush_pads_partial_frame_with_silence():
+    rechunker = PCMRechunker(sample_rate=1000, frame_ms=4)
+    assert list(rechunker.push(_pcm(range(1, 7)))) != []
+    tail = rechunker.flush()
+    assert array.array("h", bytes(tail)).tolist() == [5, 6, 0, 0]
+    assert rechunker.flush() is None
+
+
+def test_flush_drops_incomplete_trailing_sample():
+    rechunker = PCMRechunker(sample_rate=1000, frame_ms=4)
+    list(rechunker.push(_pcm(range(1, 3)) + b"\x7f"))
+    tail = rechunker.flush()
+    assert array.array("h", bytes(tail)).tolist() == [1, 2, 0, 0]
+
+
+def test_frames_reuse_one_buffer():
+    rechunker = PCMRechunker(sample_rate=1000, frame_ms=2)
+    frames = list(rechunker.push(_pcm(range(8))))
+    assert len(frames) == 4
+    assert all(frame is frames[0] for frame in frames)
@@ -0,0 +1,157 @@
+"""Tests for room-agent placement across workers."""
+import asyncio
+import json
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth.dependencies import get_current_user
+from app.config import settings
+from app.voice import scheduler
+from app.voice.scheduler import ROOMS_KEY, WORKERS_KEY, RoomScheduler, plan_assignments
+
+
+def test_assigns_to_least_loaded_worker():
+    plan = plan_assignments(["chat-a"], {"w1": 3, "w2": 1, "w3": 2})
+    assert plan == {"chat-a": "w2"}
+
+
+def test_spreads_rooms_using_projected_load():
+    plan = plan_assignments(["chat-a", "chat-b", "chat-c"], {"w1": 0, "w2": 1})
+    assert plan == {"chat-a": "w1", "chat-b": "w1", "chat-c": "w2"}
+
+
+def test_plan_is_deterministic_across_workers():
+    loads = {"w2": 0, "w1": 0}
+    rooms = ["chat-b", "chat-a"]
+    assert plan_assignments(rooms, loads) == plan_assignments(list(reversed(rooms)), dict(reversed(loads.items())))
+    assert plan_assignments(rooms, loads) == {"chat-a": "w1", "chat-b": "w2"}
+
+
+def test_no_live_workers_means_no_plan():
+    assert plan_assignments(["chat-a"], {}) == {}
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    async def get_client():
+        return client
+
+    async def publish(channel, message):
+        pass
+
+    monkeypatch.setattr(scheduler, "get_redis_client", get_client)
+    monkeypatch.setattr(scheduler, "publish", publish)
+    return client
+
+
+def _worker(worker_id, started):
+    async def run_agent(room_name, chat_id):
+        started.append((worker_id, room_name))
+        await asyncio.Event().wait()
+
+    return RoomScheduler(run_agent, worker_id=worker_id)
+
+
+@pytest.mark.asyncio
+async def test_a_room_is_claimed_once_and_renewed(redis):
+    started = []
+    w1, w2 = _worker("w1", started), _worker("w2", started)
+    await w1.request_room("room-a", "chat-a")
+    await w1.reconcile()
+    await w2.reconcile()
+    await asyncio.sleep(0)
+    assert started == [("w1", "room-a")]
+    assert await redis.get("voice:lease:room-a") == "w1"
+
+    await redis.pexpire("voice:lease:room-a", 100)
+    await w1.reconcile()
+    assert await redis.pttl("voice:lease:room-a") > 100
+    # Another worker's lease on the room makes the agent stop at the next renewal
+    await redis.set("voice:lease:room-a", "w2")
+    await w1.reconcile()
+    await asyncio.sleep(0)
+    assert w1.local_rooms == []
+    await w2.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_releases_leases_for_failover(redis):
+    started = []
+    w1, w2 = _worker("w1", started), _worker("w2", started)
+    await w1.request_room("room-a", "chat-a")
+    await w1.reconcile()
+    await asyncio.sleep(0)
+    await w1.stop()
+    assert await redis.get("voice:lease:room-a") is None
+    assert not await redis.hexists(WORKERS_KEY, "w1")
+    assert await redis.hget(ROOMS_KEY, "room-a") == "chat-a"
+
+    await w2.reconcile()
+    await asyncio.sleep(0)
+    assert started == [("w1", "room-a"), ("w2", "room-a")]
+    await w2.stop()
+
+
+@pytest.mark.asyncio
+async def test_an_expired_lease_fails_over_to_another_worker(redis, monkeypatch):
+    started = []
+    w1, w2 = _worker("w1", started), _worker("w2", started)
+    await w1.request_room("room-a", "chat-a")
+    await w1.reconcile()
+    await w2.reconcile()
+    await asyncio.sleep(0)
+    assert started == [("w1", "room-a")]
+
+    # w1 dies: its heartbeat goes stale and its lease runs out
+    dead = json.dumps({"rooms": 1, "heartbeat": 0})
+    await redis.hset(WORKERS_KEY, "w1", dead)
+    await redis.pexpire("voice:lease:room-a", 1)
+    await asyncio.sleep(0.01)
+    await w2.reconcile()
+    await asyncio.sleep(0)
+    assert started[-1] == ("w2", "room-a")
+    assert await redis.get("voice:lease:room-a") == "w2"
+    # Long-dead workers are dropped from the registry
+    assert not await redis.hexists(WORKERS_KEY, "w1")
+
+    # A room its planned worker never claims is taken by another after the grace period
+    monkeypatch.setattr(settings, "voice_scheduler_interval_seconds", 0)
+    await redis.hset(WORKERS_KEY, "w0", json.dumps({"rooms": 0, "heartbeat": 1e12}))
+    await w2.request_room("room-b", "chat-b")
+    await w2.reconcile()
+    await asyncio.sleep(0.01)
+    await w2.reconcile()
+    await asyncio.sleep(0)
+    assert sorted(w2.local_rooms) == ["room-a", "room-b"]
+    await w2.stop()
+    await w1.stop()
+
+
+@pytest.mark.asyncio
+async def test_a_finished_agent_unregisters_its_room(redis):
+    async def run_agent(room_name, chat_id):
+        pass
+
+    worker = RoomScheduler(run_agent, worker_id="w1")
+    await worker.request_room("room-a", "chat-a")
+    await worker.reconcile()
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert await redis.hgetall(ROOMS_KEY) == {}
+    assert await redis.get("voice:lease:room-a") is None
+
+
+def test_status_is_for_admins_only(app, redis, monkeypatch):
+    app.dependency_overrides[get_current_user] = lambda: {"userId": "u1", "username": "alice"}
+    try:
+        client = TestClient(app)
+        monkeypatch.setattr(settings, "admin_usernames", "bob")
+        assert client.get("/api/voice/scheduler").status_code == 403
+        monkeypatch.setattr(settings, "admin_usernames", "alice")
+        assert client.get("/api/voice/scheduler").json() == {"workers": [], "rooms": []}
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,73 @@
+"""Tests for per-stage walkie-talkie turn traces."""
+import json
+import logging
+
+from app.config import settings
+from app.observability.logs import JsonFormatter
+from app.voice import trace as trace_module
+from app.voice.trace import TurnTrace
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_steps_use_first_mark_and_per_language_stages(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(trace_module.time, "monotonic", clock)
+    trace = TurnTrace("chat-1", "speaker")
+
+    clock.now = 100.3
+    trace.mark("stt_connected")
+    clock.now = 102.0
+    trace.mark("speech_end")
+    es = trace.marker("es")
+    fr = trace.marker("fr")
+    clock.now = 102.5
+    es("translation_start")
+    fr("translation_start")
+    clock.now = 102.7
+    es("translation_first_token")
+    clock.now = 102.9
+    es("translation_first_token")  # later chunks do not move the first mark
+    fr("translation_first_token")
+
+    steps = {(step, lang): round(seconds, 3) for step, lang, seconds in trace.steps()}
+    assert steps[("stt_connect", "")] == 0.3
+    assert steps[("translation_first_token", "es")] == 0.2
+    assert steps[("translation_first_token", "fr")] == 0.4
+    # Stages that never happened produce no step
+    assert ("tts_first_audio", "es") not in steps
+
+
+def test_finish_records_histograms_and_outcome(monkeypatch):
+    observed = []
+    outcomes = []
+    monkeypatch.setattr(trace_module._step_seconds, "observe", lambda v, **labels: observed.append(labels["step"]))
+    monkeypatch.setattr(trace_module._turns_total, "inc", lambda **labels: outcomes.append(labels["outcome"]))
+
+    trace = TurnTrace("chat-1", "speaker")
+    trace.mark("stt_connected")
+    trace.outcome = "no_speech"
+    trace.finish()
+
+    assert outcomes == ["no_speech"]
+    assert set(observed) == {"stt_connect", "turn"}
+    assert "turn_end" in trace.to_dict()["marks"]
+
+
+def test_trace_is_logged_as_a_field(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "voice_turn_trace_log", True)
+    trace = TurnTrace("chat-1", "speaker")
+    with caplog.at_level(logging.INFO, logger="app.voice.trace"):
+        trace.finish()
+
+    (record,) = caplog.records
+    assert record.getMessage() == "Walkie-talkie turn trace"
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["trace"]["room"] == "chat-1"
+    assert "turn_end" in entry["trace"]["marks"]
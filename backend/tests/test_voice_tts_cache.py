@@ -0,0 +1,151 @@
+"""Tests for the on-disk TTS audio cache."""
+import os
+from contextlib import asynccontextmanager
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.config import settings
+from app.voice import service, tts_cache
+from app.voice.tts_cache import TTSCache, tts_cache_key
+
+
+def test_key_depends_on_every_component():
+    base = tts_cache_key("hola", "voice", "model", "pcm_24000")
+    assert base == tts_cache_key("hola", "voice", "model", "pcm_24000")
+    assert base != tts_cache_key("hola.", "voice", "model", "pcm_24000")
+    assert base != tts_cache_key("hola", "other-voice", "model", "pcm_24000")
+    assert base != tts_cache_key("hola", "voice", "other-model", "pcm_24000")
+    assert base != tts_cache_key("hola", "voice", "model", "pcm_16000")
+
+
+def test_put_and_get_roundtrip(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=1024)
+    cache.put("a", b"\x01\x02\x03\x04")
+    view = cache.get("a")
+    assert view is not None
+    assert bytes(view) == b"\x01\x02\x03\x04"
+    assert cache.get("missing") is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=10)
+    cache.put("a", b"x" * 4)
+    cache.put("b", b"y" * 4)
+    assert cache.get("a") is not None  # "b" is now least recently used
+    cache.put("c", b"z" * 4)
+
+    assert cache.get("b") is None
+    assert not os.path.exists(tmp_path / "b.pcm")
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.total_bytes == 8
+
+
+def test_rejects_empty_and_oversized_entries(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=4)
+    cache.put("empty", b"")
+    cache.put("big", b"x" * 5)
+    assert cache.get("empty") is None
+    assert cache.get("big") is None
+    assert cache.total_bytes == 0
+
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    TTSCache(str(tmp_path), max_bytes=1024).put("a", b"abcd")
+    reopened = TTSCache(str(tmp_path), max_bytes=1024)
+    assert bytes(reopened.get("a")) == b"abcd"
+    assert reopened.total_bytes == 4
+
+
+def test_missing_file_is_a_miss(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=1024)
+    cache.put("a", b"abcd")
+    os.unlink(tmp_path / "a.pcm")
+    assert cache.get("a") is None
+    assert cache.total_bytes == 0
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = TTSCache(str(tmp_path), max_bytes=1024)
+    monkeypatch.setattr(tts_cache, "_tts_cache", cache)
+    monkeypatch.setattr(settings, "tts_cache_enabled", True)
+    monkeypatch.setattr(settings, "tts_cache_redis", False)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_lookup_reads_the_disk_only_for_indexed_keys(cache, monkeypatch):
+    cache.put("a", b"abcd")
+    assert bytes(await tts_cache.lookup("a")) == b"abcd"
+
+    def no_disk(key):
+        raise AssertionError("read the disk for a key that is not indexed")
+
+    monkeypatch.setattr(cache, "get", no_disk)
+    assert await tts_cache.lookup("missing") is None
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Runs _tts_and_publish with a fake track and TTS, recording what happened in order."""
+    events = []
+
+    @asynccontextmanager
+    async def fake_track(*args):
+        async def write(pcm):
+            events.append(("play", bytes(pcm)))
+
+        yield write
+
+    async def fake_synthesize(phrases, write_audio, keep_audio=False):
+        audio = b""
+        async for phrase in phrases:
+            events.append(("synthesize", phrase))
+            audio += phrase.encode()
+            await write_audio(phrase.encode())
+        return audio if keep_audio else None
+
+    monkeypatch.setattr(service, "_translated_track", fake_track)
+    monkeypatch.setattr(service, "_synthesize_and_publish", fake_synthesize)
+
+    async def run(*phrases):
+        async def translated():
+            for phrase in phrases:
+                events.append(("translated", phrase))
+                yield phrase
+
+        events.clear()
+        await service._tts_and_publish(translated(), MagicMock(), "track", ["u2"], MagicMock())
+        return list(events)
+
+    return run
+
+
+@pytest.mark.asyncio
+async def test_phrases_are_cached_and_served_one_by_one(cache, pipeline):
+    # A single short phrase is synthesized once, then served from the cache
+    assert await pipeline("Sí. ") == [("translated", "Sí. "), ("synthesize", "Sí. "), ("play", "Sí. ".encode())]
+    assert await pipeline("Sí. ") == [("translated", "Sí. "), ("play", "Sí. ".encode())]
+
+    # A cached first phrase plays before the rest of the translation is read
+    events = await pipeline("Sí. ", "Nos vemos en la estación.")
+    assert events == [
+        ("translated", "Sí. "), ("play", "Sí. ".encode()),
+        ("translated", "Nos vemos en la estación."), ("synthesize", "Nos vemos en la estación."),
+        ("play", "Nos vemos en la estación.".encode()),
+    ]
+
+    # A miss is not held back, and audio of several phrases is not cached as one
+    events = await pipeline("Claro. ", "Hasta luego.")
+    assert events[:2] == [("translated", "Claro. "), ("synthesize", "Claro. ")]
+    assert await pipeline("Claro. ") == [("translated", "Claro. "), ("synthesize", "Claro. "), ("play", b"Claro. ")]
+
+
+@pytest.mark.asyncio
+async def test_long_phrases_skip_the_cache(cache, pipeline, monkeypatch):
+    monkeypatch.setattr(settings, "tts_cache_max_chars", 5)
+    await pipeline("Nos vemos. ")
+    await pipeline("Nos vemos. ")
+    assert cache.total_bytes == 0
@@ -0,0 +1,129 @@
+"""Tests for voice activity detection against a synthetic PCM corpus."""
+import numpy as np
+
+from app.voice.vad import SilenceGate, frame_features, is_speech
+
+SAMPLE_RATE = 16000
+FRAME_MS = 10
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+
+
+# --- Synthetic corpus -------------------------------------------------------
+
+def silence(ms: int) -> np.ndarray:
+    return np.zeros(SAMPLE_RATE * ms // 1000, dtype=np.float64)
+
+
+def voiced(ms: int, level_db: float = -20.0, f0: float = 160.0) -> np.ndarray:
+    """Harmonic-rich tone approximating a voiced vowel."""
+    t = np.arange(SAMPLE_RATE * ms // 1000) / SAMPLE_RATE
+    wave = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+    return wave / np.sqrt(np.mean(wave ** 2)) * 10 ** (level_db / 20)
+
+
+def noise(ms: int, level_db: float, seed: int = 0) -> np.ndarray:
+    """White noise; high zero-crossing rate like fan or line hiss."""
+    rng = np.random.default_rng(seed)
+    wave = rng.standard_normal(SAMPLE_RATE * ms // 1000)
+    return wave / np.sqrt(np.mean(wave ** 2)) * 10 ** (level_db / 20)
+
+
+def to_frames(*segments: np.ndarray) -> list[bytes]:
+    pcm = (np.concatenate(segments) * 32767).clip(-32768, 32767).astype(np.int16).tobytes()
+    frame_bytes = FRAME_SAMPLES * 2
+    return [pcm[i:i + frame_bytes] for i in range(0, len(pcm), frame_bytes)]
+
+
+def run_gate(frames: list[bytes], **kwargs) -> tuple[SilenceGate, bytes]:
+    gate = SilenceGate(sample_rate=SAMPLE_RATE, **kwargs)
+    out = b"".join(gate.process(frame) for frame in frames)
+    return gate, out
+
+
+def ms_of(pcm: bytes) -> float:
+    return len(pcm) / 2 / SAMPLE_RATE * 1000
+
+
+# --- Frame classification ---------------------------------------------------
+
+def test_frame_features():
+    level, zcr = frame_features(to_frames(voiced(10, level_db=-20.0))[0])
+    assert abs(level - (-20.0)) < 0.5
+    assert zcr < 0.1
+
+    level, zcr = frame_features(to_frames(silence(10))[0])
+    assert level < -85.0
+    assert zcr == 0.0
+
+
+def test_classifies_speech_and_noise():
+    assert is_speech(to_frames(voiced(10))[0], -45.0, 0.3)
+    assert not is_speech(to_frames(silence(10))[0], -45.0, 0.3)
+    # Quiet room tone below the energy threshold
+    assert not is_speech(to_frames(noise(10, level_db=-60.0))[0], -45.0, 0.3)
+    # Audible hiss is rejected by its zero-crossing rate
+    assert not is_speech(to_frames(noise(10, level_db=-40.0))[0], -45.0, 0.3)
+    # ...unless it is loud enough to be a fricative
+    assert is_speech(to_frames(noise(10, level_db=-20.0))[0], -45.0, 0.3)
+
+
+def test_threshold_is_configurable():
+    quiet = to_frames(voiced(10, level_db=-50.0))[0]
+    assert not is_speech(quiet, -45.0, 0.3)
+    assert is_speech(quiet, -55.0, 0.3)
+
+
+# --- Silence gate -----------------------------------------------------------
+
+def test_silent_turn_forwards_nothing():
+    gate, out = run_gate(to_frames(silence(2000)))
+    assert out == b""
+    assert not gate.speech_detected
+    assert gate.dropped_ms == gate.total_ms
+
+
+def test_noise_only_turn_is_not_speech():
+    gate, out = run_gate(to_frames(noise(2000, level_db=-55.0)))
+    assert out == b""
+    assert not gate.speech_detected
+
+
+def test_click_is_not_speech():
+    gate, _ = run_gate(to_frames(silence(500), voiced(20), silence(500)), min_speech_ms=60)
+    assert not gate.speech_detected
+
+
+def test_trims_leading_and_trailing_silence():
+    gate, out = run_gate(
+        to_frames(silence(1000), voiced(500), silence(1000)),
+        preroll_ms=200,
+        hangover_ms=300,
+    )
+    assert gate.speech_detected
+    assert ms_of(out) == 200 + 500 + 300
+    assert gate.forwarded_ms == 1000
+    assert gate.dropped_ms == 1500
+
+
+def test_preroll_keeps_audio_before_onset():
+    frames = to_frames(silence(300), voiced(100))
+    _, out = run_gate(frames, preroll_ms=100, hangover_ms=0)
+    # The last 100 ms of silence precede the speech, unmodified
+    assert out == b"".join(frames[-20:])
+
+
+def test_compresses_long_pauses():
+    gate, out = run_gate(
+        to_frames(voiced(300), silence(2000), voiced(300)),
+        preroll_ms=100,
+        hangover_ms=200,
+    )
+    assert gate.speech_detected
+    # 2 s pause shrinks to hangover + pre-roll
+    assert ms_of(out) == 300 + 200 + 100 + 300
+
+
+def test_short_pauses_pass_through():
+    frames = to_frames(voiced(300), silence(200), voiced(300))
+    _, out = run_gate(frames, hangover_ms=400)
+    assert out == b"".join(frames)
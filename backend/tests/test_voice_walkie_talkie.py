@@ -1,10 +1,14 @@
 """Tests for the walkie-talkie pipeline orchestration logic."""
 import asyncio
 import json
+from contextlib import asynccontextmanager
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from app.config import settings
+from app.voice import service
+from app.voice.service import group_listeners_by_language
 from app.voice.signals import Signal, TOPIC, decode_signal
 
 
@@ -45,3 +49,86 @@ def test_recording_stop_signal_decoded():
     raw = json.dumps({"signal": "RECORDING_STOP", "userId": "user-1"})
     sig, data = decode_signal(raw)
     assert sig == Signal.RECORDING_STOP
+
+
+def test_listeners_grouped_once_per_language():
+    members = {
+        "speaker": {"nativeLanguage": "en"},
+        "a": {"nativeLanguage": "es"},
+        "b": {"nativeLanguage": "fr"},
+        "c": {"nativeLanguage": "es"},
+        "d": {"nativeLanguage": "en"},
+    }
+    by_lang, same_lang = group_listeners_by_language(members, "speaker")
+    assert by_lang == {"es": ["a", "c"], "fr": ["b"]}
+    assert same_lang == ["d"]
+
+
+def test_two_party_same_language_needs_no_translation():
+    members = {"speaker": {"nativeLanguage": "en"}, "other": {"nativeLanguage": "en"}}
+    by_lang, same_lang = group_listeners_by_language(members, "speaker")
+    assert by_lang == {}
+    assert same_lang == ["other"]
+
+
+async def _failing_translation():
+    yield "Hola, "
+    raise RuntimeError("translation stream dropped")
+
+
+@asynccontextmanager
+async def _fake_track(*args):
+    async def write(pcm):
+        pass
+
+    yield write
+
+
+@pytest.mark.asyncio
+async def test_translation_failure_reaches_the_turn(monkeypatch):
+    sent = []
+
+    async def fake_synthesize(phrases, write_audio, keep_audio=False):
+        async for phrase in phrases:
+            sent.append(phrase)
+
+    monkeypatch.setattr(settings, "tts_cache_enabled", False)
+    monkeypatch.setattr(service, "_translated_track", _fake_track)
+    monkeypatch.setattr(service, "_synthesize_and_publish", fake_synthesize)
+    with pytest.raises(service._TranslationFailed):
+        await service._tts_and_publish(_failing_translation(), MagicMock(), "track", ["u2"], MagicMock())
+    assert sent == ["Hola, "]
+
+
+@pytest.mark.asyncio
+async def test_tts_failure_is_only_logged(monkeypatch):
+    async def phrases():
+        yield "Hola."
+
+    async def broken_synthesize(phrases, write_audio, keep_audio=False):
+        raise ConnectionError("ElevenLabs unreachable")
+
+    monkeypatch.setattr(settings, "tts_cache_enabled", False)
+    monkeypatch.setattr(service, "_translated_track", _fake_track)
+    monkeypatch.setattr(service, "_synthesize_and_publish", broken_synthesize)
+    await service._tts_and_publish(phrases(), MagicMock(), "track", ["u2"], MagicMock())
+
+
+@pytest.mark.asyncio
+async def test_a_failing_language_cancels_the_others():
+    cancelled = []
+
+    async def speaking(lang):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(lang)
+            raise
+
+    async def failing():
+        await asyncio.sleep(0)
+        raise service._TranslationFailed("translation stream dropped")
+
+    with pytest.raises(service._TranslationFailed):
+        await service._gather_or_cancel(speaking("es"), failing(), speaking("fr"))
+    assert sorted(cancelled) == ["es", "fr"]
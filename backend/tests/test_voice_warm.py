@@ -0,0 +1,60 @@
+"""Tests for warming room agents ahead of the first voice session."""
+import pytest
+
+from app.config import settings
+from app.voice import service
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+        self.ttls[key] = ex
+
+    async def exists(self, key):
+        return int(key in self.values)
+
+    async def hexists(self, name, key):
+        return key in self.values.get(name, {})
+
+
+@pytest.mark.asyncio
+async def test_warming_marks_room_and_requests_agent(monkeypatch):
+    fake = _FakeRedis()
+    requested = []
+
+    async def fake_client():
+        return fake
+
+    async def fake_request_room(room_name, chat_id):
+        requested.append((room_name, chat_id))
+
+    monkeypatch.setattr(service, "get_redis_client", fake_client)
+    monkeypatch.setattr(service.room_scheduler, "request_room", fake_request_room)
+
+    room_name = service.room_name_for_chat("abc")
+    assert not await service._is_warm(room_name)
+    await service.ensure_pipeline_for_room(room_name, "abc")
+
+    assert requested == [("chat-abc", "abc")]
+    assert await service._is_warm(room_name)
+    assert fake.ttls["voice:warm:chat-abc"] == settings.voice_agent_idle_seconds
+
+    # Once the room is registered, opening the chat again only refreshes the warm mark
+    fake.values["voice:rooms"] = {room_name: "abc"}
+    del fake.values["voice:warm:chat-abc"]
+    await service.ensure_pipeline_for_room(room_name, "abc")
+    assert requested == [("chat-abc", "abc")]
+    assert await service._is_warm(room_name)
+
+
+@pytest.mark.asyncio
+async def test_unreachable_redis_counts_as_cold(monkeypatch):
+    async def broken_client():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(service, "get_redis_client", broken_client)
+    assert not await service._is_warm("chat-abc")
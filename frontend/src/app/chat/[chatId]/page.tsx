@@ -48,6 +48,12 @@ export default function ChatConversationPage() {
 
   const { send } = useWebSocket(handleWsMessage);
 
+  // Let the server warm the voice agent so the first push-to-talk starts quickly
+  useEffect(() => {
+    if (!user || !chatId) return;
+    send(JSON.stringify({ type: "open_chat", chat_id: chatId }));
+  }, [user, chatId, send]);
+
   // Fetch other user's name from chat list
   useEffect(() => {
     if (!user || !chatId) return;
@@ -57,7 +63,7 @@ export default function ChatConversationPage() {
         const chat = data.find(
           (c: Record<string, string>) => c.chat_id === chatId
         );
-        if (chat) setOtherName(chat.other_username);
+        if (chat) setOtherName(chat.other_username ?? chat.name);
       })
       .catch(() => {});
   }, [user, chatId]);
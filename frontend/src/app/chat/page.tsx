@@ -30,7 +30,7 @@ export default function ChatListPage() {
         setChats(
           data.map((c: Record<string, string>) => ({
             chatId: c.chat_id,
-            otherUsername: c.other_username,
+            otherUsername: c.other_username ?? c.name,
             otherUserId: c.other_user_id,
             lastMessagePreview: c.last_message_preview,
             updatedAt: c.updated_at,
@@ -135,10 +135,14 @@ function WalkieTalkieControls({
 }
 
 /**
- * Custom audio renderer that only plays TTS tracks from the "translation-agent"
- * participant, and only for the listener (not the speaker who initiated the turn).
- * Track names follow the pattern "translated-{speakerId}", so we skip tracks
- * where the speakerId matches the current user.
+ * Custom audio renderer for walkie-talkie playback.
+ *
+ * - TTS tracks from the "translation-agent" are named
+ *   "translated-{speakerId}-{language}". The agent only lets each listener
+ *   subscribe to the track in their own language; we also skip tracks where
+ *   the speakerId matches the current user.
+ * - Raw microphone audio is played only from speakers whose "language"
+ *   attribute matches ours, since no translation is produced for them.
  */
 function AgentAudioRenderer({ userId }: { userId: string }) {
   const room = useRoomContext();
@@ -152,18 +156,22 @@ function AgentAudioRenderer({ userId }: { userId: string }) {
       publication: any,
       participant: any,
     ) => {
-      // Only play audio from the translation-agent
-      if (participant.identity !== "translation-agent") return;
       if (track.kind !== Track.Kind.Audio) return;
-
-      // Skip playback if this translation was triggered by the current user
       const trackName: string = publication.trackName || "";
-      if (trackName === `translated-${userId}`) {
+
+      if (participant.identity !== "translation-agent") {
+        // Same-language speakers are heard directly, without translation
+        const myLanguage = room.localParticipant.attributes?.language;
+        if (!myLanguage || participant.attributes?.language !== myLanguage) return;
+        console.log(`[walkie] Playing original audio from ${participant.identity}`);
+      } else if (trackName.startsWith(`translated-${userId}-`)) {
+        // Skip playback if this translation was triggered by the current user
         console.log(`[walkie] Skipping TTS playback for own speech (track=${trackName})`);
         return;
+      } else {
+        console.log(`[walkie] Playing TTS track: ${trackName}`);
       }
 
-      console.log(`[walkie] Playing TTS track: ${trackName}`);
       const audioEl = track.attach();
       audioEl.autoplay = true;
       audioElementsRef.current.set(publication.trackSid, audioEl);